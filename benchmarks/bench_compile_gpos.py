@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+'''
+Compare compiling kerning straight into GPOS with the round trip through a
+dumped feature file (dumpKernFeatureFromOTF.py + feaLib).
+
+usage:
+python bench_compile_gpos.py [source.otf] [-n repeats]
+
+'''
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from fontTools import ttLib
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.append(str(BASE_DIR))
+
+import compileKerningToGPOS  # noqa: E402
+import dumpKernFeatureFromOTF  # noqa: E402
+
+DEFAULT_SOURCE = BASE_DIR / 'tests' / 'roundtrip' / 'otf_kern_example.otf'
+
+
+def load_target(source):
+    font = ttLib.TTFont(source)
+    del font['GPOS']
+    return font
+
+
+def via_gpos(source):
+    font = load_target(source)
+    lookups = compileKerningToGPOS.kernLookupsFromOTF(source, font)
+    compileKerningToGPOS.setKernLookups(font, lookups)
+    font['GPOS'].compile(font)
+
+
+def via_fea(source):
+    font = load_target(source)
+    fea = '\n'.join(dumpKernFeatureFromOTF.makeKernFeature(source))
+    fea = (
+        'languagesystem DFLT dflt;\n'
+        f'feature kern {{\n{fea}\n}} kern;\n')
+    addOpenTypeFeaturesFromString(font, fea)
+    font['GPOS'].compile(font)
+
+
+def best_of(function, source, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'source', nargs='?', default=DEFAULT_SOURCE,
+        help='kerned OTF')
+    parser.add_argument(
+        '-n', '--repeats', type=int, default=5,
+        help='number of runs (the best is reported)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    gpos = best_of(via_gpos, args.source, args.repeats)
+    fea = best_of(via_fea, args.source, args.repeats)
+    print(f'direct GPOS:   {gpos * 1000:8.1f} ms')
+    print(f'via .fea:      {fea * 1000:8.1f} ms')
+    print(f'speedup:       {fea / gpos:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+'''
+Compare the single-pass OTF to UFO conversion with the previous pipeline,
+which wrote the UFO, then opened and saved it again for the kerning, and
+once more for the OS/2 data.
+
+Without an input font, a CJK-sized test font (many glyphs, class kerning)
+is built first. With --tx, `tx` draws the glyphs in both pipelines.
+
+usage:
+python bench_convert_otf_to_ufo.py [font.otf] [--glyphs 20000] [--tx]
+
+'''
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from defcon import Font
+from fontTools import ttLib
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import convertKernedOTFtoKernedUFO as ckf  # noqa: E402
+
+
+def make_test_font(path, glyph_count):
+    glyph_order = ['.notdef'] + [f'uni{0x4E00 + i:04X}' for i in range(
+        glyph_count - 1)]
+    charstrings = {}
+    for i, gName in enumerate(glyph_order):
+        pen = T2CharStringPen(1000, None)
+        for j in range(4):
+            x = 50 + j * 220 + i % 7
+            pen.moveTo((x, 0))
+            pen.lineTo((x + 100, 0))
+            pen.curveTo((x + 150, 300), (x + 150, 500), (x + 100, 800))
+            pen.lineTo((x, 800))
+            pen.closePath()
+        charstrings[gName] = pen.getCharString()
+
+    fb = FontBuilder(1000, isTTF=False)
+    fb.setupGlyphOrder(glyph_order)
+    fb.setupCharacterMap({
+        int(gName[3:], 16): gName for gName in glyph_order[1:]})
+    fb.setupCFF('Test-Regular', {}, charstrings, {})
+    fb.setupHorizontalMetrics({gName: (1000, 50) for gName in glyph_order})
+    fb.setupHorizontalHeader(ascent=880, descent=-120)
+    fb.setupNameTable({'familyName': 'Test', 'styleName': 'Regular'})
+    fb.setupOS2(sTypoAscender=880, sTypoDescender=-120, sCapHeight=700)
+    fb.setupPost()
+
+    glyphs = glyph_order[1:]
+    classes = [glyphs[i:i + 50] for i in range(0, len(glyphs), 50)][:40]
+    fea = ['languagesystem DFLT dflt;', 'feature kern {']
+    for i, members in enumerate(classes):
+        fea.append(f'@L{i} = [{" ".join(members)}];')
+        fea.append(f'@R{i} = [{" ".join(members)}];')
+    for i in range(len(classes)):
+        for j in range(0, len(classes), 3):
+            fea.append(f'pos @L{i} @R{j} {-(i + j) % 90 - 10};')
+    fea.append('} kern;')
+    font = fb.font
+    addOpenTypeFeaturesFromString(font, '\n'.join(fea))
+    font.save(path)
+
+
+def draw_glyphs(otf_font, ufo):
+    # glyphs are built as defcon objects, like tx output is read back
+    glyph_set = otf_font.getGlyphSet()
+    for g_name in otf_font.getGlyphOrder():
+        glyph = ufo.newGlyph(g_name)
+        glyph.width = glyph_set[g_name].width
+        glyph_set[g_name].draw(glyph.getPen())
+
+
+def previous_pipeline(otf_path, use_tx):
+    # glyphs are written first (tx, or via defcon), then the UFO is read and
+    # saved twice more, and the OTF is read twice
+    ufo_path = ckf.prepareOutputPath(otf_path, True)
+    groups, kerning = ckf.makeKernObjects(otf_path, formatVersion=2)
+    if use_tx:
+        ckf.convertOTFtoUFO(otf_path, ufo_path, True)
+    else:
+        ufo = Font()
+        draw_glyphs(ttLib.TTFont(otf_path), ufo)
+        ufo.save(ufo_path)
+    ufo = Font(ufo_path)
+    ufo.groups.update(groups)
+    ufo.kerning.update(kerning)
+    ufo.save()
+    ufo = Font(ufo_path)
+    ckf.setOS2Info(ufo.info, ttLib.TTFont(otf_path))
+    ufo.save()
+
+
+def single_pass(otf_path, use_tx):
+    ckf.convertFont(otf_path, overwrite=True, ignore_errors=True, use_tx=use_tx)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('font', nargs='?', help='kerned OTF')
+    parser.add_argument(
+        '-g', '--glyphs', type=int, default=20000,
+        help='glyph count of the generated test font')
+    parser.add_argument(
+        '--tx', action='store_true', help='draw glyphs with tx')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        otf_path = str(Path(tmp) / 'test.otf')
+        if args.font:
+            shutil.copy(args.font, otf_path)
+        else:
+            make_test_font(otf_path, args.glyphs)
+
+        previous = timed(previous_pipeline, otf_path, args.tx)
+        single = timed(single_pass, otf_path, args.tx)
+    print(f'previous pipeline: {previous:8.2f} s')
+    print(f'single pass:       {single:8.2f} s')
+    print(f'speedup:           {previous / single:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
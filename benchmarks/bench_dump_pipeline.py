@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+'''
+Compare dumping a number of UFOs on a (simulated) slow volume one after the
+other, reading, flattening and writing each in turn, with the pipeline of
+kernDumpPipeline.py, which overlaps reading and writing with flattening.
+
+The UFOs are synthetic (group kerning and exceptions, no glyphs), and are
+read through a ThrottledFileSystem, which adds a latency to every request
+and shares a bandwidth between all of them. Ideally, the pipeline takes as
+long as the larger of the time spent on I/O and the time spent flattening,
+rather than their sum.
+
+usage:
+python bench_dump_pipeline.py [-u ufos] [-g glyphs] [-l latency] [-b MB/s]
+
+'''
+
+import argparse
+import asyncio
+import plistlib
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.append(str(BASE_DIR))
+
+from dumpkerning import makeOutputPath  # noqa: E402
+from kernDumpPipeline import (  # noqa: E402
+    DumpPipeline, ThrottledFileSystem, flattenSource, sourcePaths)
+
+
+def synthetic_ufo(path, num_glyphs, seed=1):
+    random.seed(seed)
+    glyphs = [f'glyph{i:05d}' for i in range(num_glyphs)]
+    groups = {}
+    for i in range(0, num_glyphs, 20):
+        groups[f'public.kern1.G{i}'] = glyphs[i:i + 20]
+        groups[f'public.kern2.G{i}'] = glyphs[i:i + 20]
+    kerning = {}
+    for left in [name for name in groups if 'kern1' in name]:
+        row = kerning.setdefault(left, {})
+        for right in [name for name in groups if 'kern2' in name]:
+            if random.random() < 0.5:
+                row[right] = random.randint(-100, 50)
+    for _ in range(num_glyphs * 5):
+        row = kerning.setdefault(random.choice(glyphs), {})
+        row[random.choice(glyphs)] = random.randint(-100, 50)
+
+    path.mkdir()
+    for name, data in [
+        ('metainfo.plist', {'creator': 'bench', 'formatVersion': 3}),
+        ('groups.plist', groups),
+        ('kerning.plist', kerning),
+    ]:
+        with open(path / name, 'wb') as blob:
+            plistlib.dump(data, blob)
+
+
+async def read_source(file_system, input_file):
+    paths = sourcePaths(input_file)
+    data = [await file_system.read(path) for path in paths.values()]
+    return dict(zip(paths, data))
+
+
+async def sequential(file_system, sources, output_dir, flattened=None):
+    '''
+    One source after the other. With dumps flattened beforehand, these are
+    written instead (for the I/O time alone).
+    '''
+    for input_file in sources:
+        files = await read_source(file_system, input_file)
+        if flattened:
+            dumps = flattened[input_file]
+        else:
+            dumps = flattenSource(input_file, files)
+        for label, text in dumps:
+            output_file = makeOutputPath(input_file, output_dir, label)
+            await file_system.write(output_file, text.encode('utf-8'))
+
+
+def flatten_only(sources):
+    files = [asyncio.run(read_source(
+        ThrottledFileSystem(latency=0), input_file)) for input_file in sources]
+    start = time.perf_counter()
+    flattened = {
+        input_file: flattenSource(input_file, source_files) for
+        input_file, source_files in zip(sources, files)}
+    return time.perf_counter() - start, flattened
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-u', '--ufos', type=int, default=8,
+        help='number of UFOs')
+    parser.add_argument(
+        '-g', '--glyphs', type=int, default=600,
+        help='number of glyphs per UFO')
+    parser.add_argument(
+        '-l', '--latency', type=float, default=0.1,
+        help='latency of each read and write (in seconds)')
+    parser.add_argument(
+        '-b', '--bandwidth', type=float, default=20,
+        help='bandwidth of the volume (in MB/s)')
+    parser.add_argument(
+        '-j', '--jobs', type=int,
+        help='number of flattening processes (default: number of CPUs)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        sources = []
+        for i in range(args.ufos):
+            sources.append(temp_dir / f'font{i:02d}.ufo')
+            synthetic_ufo(sources[-1], args.glyphs, seed=i)
+        output_dir = temp_dir / 'dumps'
+
+        def file_system():
+            return ThrottledFileSystem(
+                latency=args.latency,
+                bytesPerSecond=args.bandwidth * 2 ** 20)
+
+        cpu_time, flattened = flatten_only(sources)
+        io_time = timed(asyncio.run, sequential(
+            file_system(), sources, output_dir, flattened))
+        del flattened
+        sequential_time = timed(asyncio.run, sequential(
+            file_system(), sources, output_dir))
+        pipeline = DumpPipeline(
+            sources, output_dir, fileSystem=file_system(), jobs=args.jobs)
+        pipeline_time = timed(asyncio.run, pipeline.run())
+
+    print(f'{args.ufos} UFOs, {args.glyphs} glyphs each')
+    print(f'I/O only:          {io_time * 1000:8.1f} ms')
+    print(f'flattening only:   {cpu_time * 1000:8.1f} ms')
+    print(f'sequential:        {sequential_time * 1000:8.1f} ms')
+    print(
+        f'pipeline:          {pipeline_time * 1000:8.1f} ms'
+        f'  (at most {pipeline.maxInFlight} sources in memory)')
+    print(f'speedup:           {sequential_time / pipeline_time:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+'''
+Compare checking two kerning sources for equality by flattening both into
+dictionaries and comparing them, with comparing streamed fingerprints
+(kernFingerprint.py), for time and peak memory.
+
+The synthetic kerning is class kerning between groups of 20 glyphs, plus
+glyph exceptions; the second source is a copy with one changed exception.
+Fingerprints need a small fraction of the memory, but hashing every pair
+takes longer than comparing dictionaries.
+
+usage:
+python bench_fingerprint.py [-g glyphs] [-n repeats]
+
+'''
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.append(str(BASE_DIR))
+
+from kernFingerprint import KerningFingerprint  # noqa: E402
+from kernFlattening import KerningFlattener  # noqa: E402
+
+
+def synthetic_kerning(num_glyphs, seed=1):
+    random.seed(seed)
+    glyphs = [f'glyph{i:05d}' for i in range(num_glyphs)]
+    groups = {}
+    for i in range(0, num_glyphs, 20):
+        groups[f'public.kern1.G{i}'] = glyphs[i:i + 20]
+        groups[f'public.kern2.G{i}'] = glyphs[i:i + 20]
+    left_groups = [name for name in groups if 'kern1' in name]
+    right_groups = [name for name in groups if 'kern2' in name]
+    kerning = {}
+    for left in left_groups:
+        for right in random.sample(right_groups, len(right_groups) // 2):
+            kerning[(left, right)] = random.randint(-100, 50)
+    for _ in range(num_glyphs * 5):
+        pair = random.choice(glyphs), random.choice(glyphs)
+        kerning[pair] = random.randint(-100, 50)
+    return groups, kerning
+
+
+def compare_dicts(source_a, source_b):
+    flat_a = KerningFlattener(*source_a, 'public.').flatten(True)
+    flat_b = KerningFlattener(*source_b, 'public.').flatten(True)
+    return flat_a == flat_b
+
+
+def compare_fingerprints(source_a, source_b):
+    fingerprints = []
+    for groups, kerning in [source_a, source_b]:
+        fingerprint = KerningFingerprint()
+        flattener = KerningFlattener(groups, kerning, 'public.')
+        for left, row in flattener.iterRows(True):
+            fingerprint.addRow(left, row)
+        fingerprints.append(fingerprint)
+    return fingerprints[0] == fingerprints[1]
+
+
+def measure(function, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, result
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-g', '--glyphs', type=int, default=2000,
+        help='number of glyphs')
+    parser.add_argument(
+        '-n', '--repeats', type=int, default=3,
+        help='number of runs (the best is reported)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    groups, kerning = synthetic_kerning(args.glyphs)
+    changed = dict(kerning)
+    pair = next(pair for pair in changed if 'public.' not in pair[0])
+    changed[pair] += 1
+    source_a, source_b = (groups, kerning), (groups, changed)
+
+    flat = KerningFlattener(groups, kerning, 'public.').flatten(True)
+    print(f'{len(kerning)} kerning entries, {len(flat)} flat pairs')
+    del flat
+    for label, function in [
+        ('flat dictionaries', compare_dicts),
+        ('fingerprints', compare_fingerprints),
+    ]:
+        seconds, peak, equal = measure(
+            function, args.repeats, source_a, source_b)
+        assert not equal
+        print(
+            f'{label + ":":20s}{seconds * 1000:8.1f} ms'
+            f'  (peak {peak / 2 ** 20:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
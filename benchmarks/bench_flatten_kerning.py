@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+'''
+Compare the shared flattening code (kernFlattening.py) with the previous
+UFO/VFB reader implementation, which filled four intermediate dictionaries,
+merged them, and copied the result to drop zero values.
+
+Without a UFO, synthetic kerning is used: a number of glyphs in left and
+right groups, group-to-group pairs, and exceptions (some of them zero).
+
+usage:
+python bench_flatten_kerning.py [font.ufo] [-g glyphs] [-n repeats]
+
+'''
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.append(str(BASE_DIR))
+
+from kernFlattening import flattenKerning  # noqa: E402
+
+
+def legacy_flatten(groups, kerning, group_indicator, includeZero=False):
+    '''
+    The flattening of UFOkernReader/VFBkernReader before kernFlattening.py
+    '''
+    def allCombinations(left, right):
+        leftGlyphs = groups.get(left, [left])
+        rightGlyphs = groups.get(right, [right])
+        return list(itertools.product(leftGlyphs, rightGlyphs))
+
+    group_group_pairs = {}
+    group_glyph_pairs = {}
+    glyph_group_pairs = {}
+    glyph_glyph_pairs = {}
+    for (left, right), value in kerning.items():
+        if group_indicator in left and group_indicator in right:
+            for combo in allCombinations(left, right):
+                group_group_pairs[combo] = value
+        elif group_indicator in left and group_indicator not in right:
+            for combo in allCombinations(left, right):
+                group_glyph_pairs[combo] = value
+        elif group_indicator not in left and group_indicator in right:
+            for combo in allCombinations(left, right):
+                glyph_group_pairs[combo] = value
+        else:
+            glyph_glyph_pairs[(left, right)] = value
+
+    kerningPairs = {}
+    kerningPairs.update(group_group_pairs)
+    kerningPairs.update(group_glyph_pairs)
+    kerningPairs.update(glyph_group_pairs)
+    kerningPairs.update(glyph_glyph_pairs)
+    if includeZero is False:
+        cleanKerningPairs = dict(kerningPairs)
+        for pair in kerningPairs:
+            if kerningPairs[pair] == 0:
+                del cleanKerningPairs[pair]
+        return cleanKerningPairs
+    return kerningPairs
+
+
+def synthetic_kerning(num_glyphs, group_size=20, seed=1):
+    random.seed(seed)
+    glyphs = [f'glyph{i:05d}' for i in range(num_glyphs)]
+    groups = {}
+    for i in range(0, num_glyphs, group_size):
+        members = glyphs[i:i + group_size]
+        groups[f'public.kern1.G{i}'] = members
+        groups[f'public.kern2.G{i}'] = members
+    lefts = [name for name in groups if name.startswith('public.kern1')]
+    rights = [name for name in groups if name.startswith('public.kern2')]
+
+    kerning = {}
+    for left in lefts:
+        for right in random.sample(rights, min(len(rights), 40)):
+            kerning[(left, right)] = random.randint(-100, 50)
+    for _ in range(num_glyphs * 4):
+        left = random.choice(glyphs + lefts)
+        right = random.choice(glyphs + rights)
+        kerning[(left, right)] = random.choice([0, 0, -10, 10, -25])
+    return groups, kerning
+
+
+def load_ufo(path):
+    from defcon import Font
+    from getKerningPairsFromUFO import GROUP_INDICATOR
+    font = Font(path)
+    # groups of UFO 2 sources are read with UFO 3 names
+    return dict(font.groups), dict(font.kerning), GROUP_INDICATOR
+
+
+def best_of(function, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'ufo', nargs='?',
+        help='UFO (synthetic kerning is used otherwise)')
+    parser.add_argument(
+        '-g', '--glyphs', type=int, default=2000,
+        help='number of glyphs of the synthetic kerning')
+    parser.add_argument(
+        '-n', '--repeats', type=int, default=5,
+        help='number of runs (the best is reported)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    if args.ufo:
+        groups, kerning, group_indicator = load_ufo(args.ufo)
+    else:
+        groups, kerning = synthetic_kerning(args.glyphs)
+        group_indicator = 'public.'
+
+    legacy, legacy_pairs = best_of(
+        legacy_flatten, args.repeats, groups, kerning, group_indicator)
+    shared, shared_pairs = best_of(
+        flattenKerning, args.repeats, groups, kerning, group_indicator)
+    assert shared_pairs == legacy_pairs
+
+    print(f'{len(kerning)} kerning entries, {len(shared_pairs)} flat pairs')
+    print(f'previous readers: {legacy * 1000:8.1f} ms')
+    print(f'kernFlattening:   {shared * 1000:8.1f} ms')
+    print(f'speedup:          {legacy / shared:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+'''
+Compare reading the kerning of a Glyphs source with GlyphsKernReader (which
+skips glyph layers) with parsing the whole OpenStep plist first.
+
+Without a .glyphs file, a synthetic source is written to a temporary file:
+a number of glyphs with outlines in each master, kerning groups, and class
+kerning.
+
+usage:
+python bench_glyphs_reader.py [font.glyphs] [-g glyphs] [-m masters] [-n repeats]
+
+'''
+
+import argparse
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.append(str(BASE_DIR))
+
+from getKerningPairsFromGlyphs import (  # noqa: E402
+    GlyphsKernReader, openScanner)
+
+
+def synthetic_glyphs(path, num_glyphs, num_masters, nodes=120, seed=1):
+    random.seed(seed)
+    master_ids = [f'm{i:02d}' for i in range(num_masters)]
+    groups = [f'G{i}' for i in range(0, num_glyphs, 20)]
+    with open(path, 'w') as blob:
+        blob.write('{\n.formatVersion = 3;\nfontMaster = (\n')
+        blob.write(',\n'.join(
+            f'{{\nid = {master_id};\nname = "Master {master_id}";\n}}'
+            for master_id in master_ids))
+        blob.write('\n);\nglyphs = (\n')
+        for i in range(num_glyphs):
+            group = groups[i // 20]
+            node_list = ',\n'.join(
+                f'({random.randint(0, 999)},{random.randint(0, 999)},l)'
+                for _ in range(nodes))
+            layers = ',\n'.join(
+                f'{{\nlayerId = {master_id};\nshapes = (\n{{\nclosed = 1;\n'
+                f'nodes = (\n{node_list}\n);\n}}\n);\nwidth = 600;\n}}'
+                for master_id in master_ids)
+            blob.write(
+                f'{{\nglyphname = glyph{i:05d};\nkernLeft = {group};\n'
+                f'kernRight = {group};\nlayers = (\n{layers}\n);\n'
+                f'unicode = {0xE000 + i};\n}},\n')
+        blob.write(');\nkerningLTR = {\n')
+        for master_id in master_ids:
+            blob.write(f'{master_id} = {{\n')
+            for left in groups:
+                blob.write(f'"@MMK_L_{left}" = {{\n')
+                for right in random.sample(groups, min(len(groups), 30)):
+                    blob.write(
+                        f'"@MMK_R_{right}" = {random.randint(-100, 50)};\n')
+                blob.write('};\n')
+            blob.write('};\n')
+        blob.write('};\nunitsPerEm = 1000;\n}\n')
+
+
+def full_parse(path):
+    '''
+    Build the complete plist (as a generic parser would), then pick the
+    kerning.
+    '''
+    font = openScanner(path).readValue()
+    return font.get('kerningLTR', font.get('kerning', {}))
+
+
+def stream(path):
+    reader = GlyphsKernReader(path)
+    return reader.kerningLTR
+
+
+def best_of(function, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'glyphs_file', nargs='?',
+        help='.glyphs file (a synthetic source is used otherwise)')
+    parser.add_argument(
+        '-g', '--glyphs', type=int, default=2000,
+        help='number of glyphs of the synthetic source')
+    parser.add_argument(
+        '-m', '--masters', type=int, default=2,
+        help='number of masters of the synthetic source')
+    parser.add_argument(
+        '-n', '--repeats', type=int, default=3,
+        help='number of runs (the best is reported)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.glyphs_file:
+            path = Path(args.glyphs_file)
+        else:
+            path = Path(temp_dir) / 'synthetic.glyphs'
+            synthetic_glyphs(path, args.glyphs, args.masters)
+
+        streamed, stream_kerning = best_of(stream, args.repeats, path)
+        stream_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        parsed, parse_kerning = best_of(full_parse, args.repeats, path)
+        parse_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        assert stream_kerning.keys() == parse_kerning.keys()
+
+        size = path.stat().st_size / 2 ** 20
+        entries = sum(len(kerning) for kerning in stream_kerning.values())
+        print(f'{size:.1f} MB, {entries} kerning entries')
+        print(
+            f'full parse:        {parsed * 1000:8.1f} ms'
+            f'  (max RSS {parse_rss / 1024:.0f} MB)')
+        print(
+            f'GlyphsKernReader:  {streamed * 1000:8.1f} ms'
+            f'  (max RSS {stream_rss / 1024:.0f} MB)')
+        print(f'speedup:           {parsed / streamed:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
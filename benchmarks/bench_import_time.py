@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+'''
+Measure the startup cost of dumpkerning and kernMap with `-X importtime`,
+and the wall time of a complete dumpkerning run on a feature file (the
+target for which is well under 100 ms).
+
+For comparison, the modules which dumpkerning imported at load time before
+its imports were deferred (all readers, fontTools and defcon) are imported
+together as "eager".
+
+usage:
+python bench_import_time.py [kern.fea] [-n repeats]
+
+'''
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+FEA_EXAMPLE = BASE_DIR / 'tests' / 'roundtrip' / 'fea_kern_example.fea'
+
+EAGER_IMPORTS = (
+    'import defcon, getKerningPairsFromFEA, getKerningPairsFromOTF, '
+    'getKerningPairsFromUFO, dumpkerning')
+HEAVY_MODULES = ['fontTools', 'defcon', 'PIL', 'numpy']
+
+
+def import_time(statement):
+    '''
+    Cumulative import time (in ms) of all modules imported by a statement,
+    and the heavy modules among them.
+    '''
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith(' ' * 2):
+            # top level imports only; nested ones are part of their parent
+            total += int(cumulative)
+        modules.add(name.strip().split('.')[0])
+    return total / 1000, sorted(modules.intersection(HEAVY_MODULES))
+
+
+def run_time(command):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=BASE_DIR, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def best_of(function, repeats, *args):
+    results = [function(*args) for _ in range(repeats)]
+    return min(results)
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'fea', nargs='?', default=str(FEA_EXAMPLE),
+        help='feature file for the dumpkerning run')
+    parser.add_argument(
+        '-n', '--repeats', type=int, default=5,
+        help='number of runs (the best is reported)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    for label, statement in [
+        ('dumpkerning', 'import dumpkerning'),
+        ('dumpkerning (eager)', EAGER_IMPORTS),
+        ('kernMap', 'import kernMap'),
+    ]:
+        ms, modules = best_of(import_time, args.repeats, statement)
+        print(f'{"import " + label:32s}{ms:8.1f} ms  {", ".join(modules)}')
+
+    interpreter = best_of(
+        run_time, args.repeats, [sys.executable, '-c', 'pass'])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dump = best_of(run_time, args.repeats, [
+            sys.executable, 'dumpkerning.py', str(Path(args.fea).resolve()),
+            '-o', temp_dir])
+    print(f'{"python startup":32s}{interpreter:8.1f} ms')
+    print(f'{"dumpkerning " + Path(args.fea).name:32s}{dump:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+'''
+Compare reading the kerning of a FontLab JSON source with VFJkernReader
+(which skips glyph layers) with loading the whole file with json.load.
+
+Without a .vfj file, a synthetic source is written to a temporary file:
+a number of glyphs with outlines in each master, kerning classes, and
+class kerning.
+
+usage:
+python bench_vfj_reader.py [font.vfj] [-g glyphs] [-m masters] [-n repeats]
+
+'''
+
+import argparse
+import json
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.append(str(BASE_DIR))
+
+from getKerningPairsFromVFJ import VFJkernReader  # noqa: E402
+
+
+def synthetic_vfj(path, num_glyphs, num_masters, nodes=120, seed=1):
+    random.seed(seed)
+    master_names = [f'Master {i}' for i in range(num_masters)]
+    glyph_names = [f'glyph{i:05d}' for i in range(num_glyphs)]
+    classes = [
+        {'name': f'G{i}', 'names': glyph_names[i:i + 20]}
+        for i in range(0, num_glyphs, 20)]
+
+    with open(path, 'w') as blob:
+        # written glyph by glyph, so that the benchmark process stays small
+        blob.write('{\n "version": 8,\n "font": {\n  "glyphs": [\n')
+        for i, g_name in enumerate(glyph_names):
+            layers = [{
+                'name': master_name,
+                'advanceWidth': 600,
+                'elements': [{'elementData': {'contours': [{
+                    'nodes': [
+                        f'{random.randint(0, 999)} {random.randint(0, 999)}'
+                        for _ in range(nodes)],
+                }]}}],
+            } for master_name in master_names]
+            glyph = {
+                'name': g_name, 'unicode': f'{0xE000 + i:04X}',
+                'layers': layers}
+            if i:
+                blob.write(',\n')
+            blob.write(json.dumps(glyph, indent=1))
+        blob.write('\n  ],\n  "masters": [\n')
+
+        for i, master_name in enumerate(master_names):
+            pairs = {}
+            for left in classes:
+                pairs['@' + left['name']] = {
+                    '@' + right['name']: random.randint(-100, 50) for
+                    right in random.sample(classes, min(len(classes), 30))}
+            master = {'fontMaster': {
+                'name': master_name,
+                'kerning': {'kerningClasses': classes, 'pairs': pairs}}}
+            if i:
+                blob.write(',\n')
+            blob.write(json.dumps(master, indent=1))
+        blob.write('\n  ]\n }\n}\n')
+
+
+def full_load(path):
+    with open(path, 'r') as blob:
+        font = json.load(blob)['font']
+    return [
+        master['fontMaster']['kerning']['pairs'] for
+        master in font['masters']]
+
+
+def stream(path):
+    reader = VFJkernReader(path)
+    return [reader.masterPairs[masterID] for masterID in reader.masterIDs]
+
+
+def best_of(function, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'vfj_file', nargs='?',
+        help='.vfj file (a synthetic source is used otherwise)')
+    parser.add_argument(
+        '-g', '--glyphs', type=int, default=2000,
+        help='number of glyphs of the synthetic source')
+    parser.add_argument(
+        '-m', '--masters', type=int, default=2,
+        help='number of masters of the synthetic source')
+    parser.add_argument(
+        '-n', '--repeats', type=int, default=3,
+        help='number of runs (the best is reported)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.vfj_file:
+            path = Path(args.vfj_file)
+        else:
+            path = Path(temp_dir) / 'synthetic.vfj'
+            synthetic_vfj(path, args.glyphs, args.masters)
+
+        # the streaming reader runs first, so the max RSS after it is its own
+        streamed, stream_pairs = best_of(stream, args.repeats, path)
+        stream_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        loaded, load_pairs = best_of(full_load, args.repeats, path)
+        load_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        assert [len(pairs) for pairs in stream_pairs] == [
+            sum(len(row) for row in pairs.values()) for pairs in load_pairs]
+
+        size = path.stat().st_size / 2 ** 20
+        entries = sum(len(pairs) for pairs in stream_pairs)
+        print(f'{size:.1f} MB, {entries} kerning entries')
+        print(
+            f'json.load:      {loaded * 1000:8.1f} ms'
+            f'  (max RSS {load_rss / 1024:.0f} MB)')
+        print(
+            f'VFJkernReader:  {streamed * 1000:8.1f} ms'
+            f'  (max RSS {stream_rss / 1024:.0f} MB)')
+        print(f'speedup:        {loaded / streamed:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+'''
+Compile kerning straight into the GPOS `kern` feature of a target font,
+without the round trip through a feature file.
+
+The kerning source may be an OTF/TTF (the class structure recovered by
+`getKerningPairsFromOTF.py` is kept), or a UFO (groups and kerning).
+Single pairs are compiled into PairPos Format 1 subtables, class pairs into
+PairPos Format 2 subtables. Each kern lookup of an OTF/TTF source becomes a
+lookup of its own, with the same lookup flags. Existing `kern` lookups of the
+target font are replaced.
+
+usage:
+python compileKerningToGPOS.py source.otf target.otf -o output.otf
+python compileKerningToGPOS.py source.ufo target.otf -o output.otf
+
+'''
+
+import argparse
+import re
+from pathlib import Path
+
+from fontTools import ttLib
+from fontTools.misc.roundTools import otRound
+from fontTools.otlLib.builder import PairPosBuilder, buildValue
+from fontTools.ttLib.tables import otTables
+
+import getKerningPairsFromOTF
+import getKerningPairsFromUFO
+
+x_rtl_value = re.compile(r'<(-?\d+) 0 (-?\d+) 0>')
+
+
+def makeValueRecord(kernValue):
+    '''
+    Convert a kerning value as found by the kern readers (a number, or
+    a string like <-10 0 -10 0> for RTL pairs) to a ValueRecord. UFO values
+    may be floats, and are rounded.
+    '''
+    if isinstance(kernValue, str):
+        match = x_rtl_value.match(kernValue)
+        x_placement, x_advance = int(match.group(1)), int(match.group(2))
+        return buildValue({'XPlacement': x_placement, 'XAdvance': x_advance})
+    return buildValue({'XAdvance': otRound(kernValue)})
+
+
+def kernLookupsFromOTF(sourcePath, font):
+    '''
+    Build kern lookups from the single pairs, class definitions and class
+    pairs of a compiled font: one per kern lookup of the source, with its
+    lookup flags (and mark filtering set). Every class kerning subtable of
+    the source becomes (at least) one subtable of the new lookup.
+    '''
+    okr = getKerningPairsFromOTF.OTFKernReader(sourcePath)
+    glyphSet = set(font.getGlyphOrder())
+
+    lookups = []
+    for lookupIndex, sourceLookup in enumerate(okr.lookups):
+        builder = PairPosBuilder(font, str(sourcePath))
+        builder.lookupflag = sourceLookup.LookupFlag
+        builder.markFilterSet = getattr(
+            sourceLookup, 'MarkFilteringSet', None)
+
+        pairPosList = [
+            pairPos for pairPos, index in
+            zip(okr.pairPosList, okr.pairPosLookups) if index == lookupIndex]
+        singlePairs = okr.getSinglePairs(pairPosList)
+        for (left, right), value in singlePairs.items():
+            if left in glyphSet and right in glyphSet:
+                builder.addGlyphPair(
+                    None, left, makeValueRecord(value), right, None)
+
+        previousIndex = None
+        for index, leftGlyphs, rightGlyphs, value in (
+            okr.classData.flatRecords
+        ):
+            if okr.pairPosLookups[index] != lookupIndex:
+                continue
+            leftGlyphs = tuple(g for g in leftGlyphs if g in glyphSet)
+            rightGlyphs = tuple(g for g in rightGlyphs if g in glyphSet)
+            if not (leftGlyphs and rightGlyphs):
+                continue
+            if previousIndex is not None and index != previousIndex:
+                builder.add_subtable_break(None)
+            previousIndex = index
+            builder.addClassPair(
+                None, leftGlyphs, makeValueRecord(value), rightGlyphs, None)
+
+        if builder.glyphPairs or builder.pairs:
+            lookups.append(builder.build())
+    return lookups
+
+
+def kernLookupFromUFO(ufo, font):
+    '''
+    Build a kern lookup from the groups and kerning of a UFO. Exceptions
+    (glyph-to-glyph, glyph-to-group, group-to-glyph pairs) become single
+    pairs, which take precedence over the group-to-group pairs.
+    '''
+    ukr = getKerningPairsFromUFO.UFOkernReader(ufo, includeZero=True)
+    glyphSet = set(font.getGlyphOrder())
+    builder = PairPosBuilder(font, str(ufo.path))
+
+    # most specific first: the first value added for a pair wins
+    for pairs in [
+        ukr.glyph_glyph_pairs, ukr.glyph_group_pairs, ukr.group_glyph_pairs
+    ]:
+        for (left, right), value in pairs.items():
+            if left in glyphSet and right in glyphSet:
+                builder.addGlyphPair(
+                    None, left, makeValueRecord(value), right, None)
+
+    for (left, right), value in ufo.kerning.items():
+        if not (ukr.group_indicator in left and ukr.group_indicator in right):
+            continue
+        if value == 0:
+            continue
+        leftGlyphs = tuple(
+            g for g in ukr.groups.get(left, []) if g in glyphSet)
+        rightGlyphs = tuple(
+            g for g in ukr.groups.get(right, []) if g in glyphSet)
+        if leftGlyphs and rightGlyphs:
+            builder.addClassPair(
+                None, leftGlyphs, makeValueRecord(value), rightGlyphs, None)
+
+    return builder.build()
+
+
+def makeEmptyGPOS(font):
+    gpos = ttLib.newTable('GPOS')
+    table = gpos.table = otTables.GPOS()
+    table.Version = 0x00010000
+    table.ScriptList = otTables.ScriptList()
+    table.ScriptList.ScriptRecord = []
+    table.ScriptList.ScriptCount = 0
+    table.FeatureList = otTables.FeatureList()
+    table.FeatureList.FeatureRecord = []
+    table.FeatureList.FeatureCount = 0
+    table.LookupList = otTables.LookupList()
+    table.LookupList.Lookup = []
+    table.LookupList.LookupCount = 0
+    font['GPOS'] = gpos
+    return gpos
+
+
+def allLangSys(table):
+    if not table.ScriptList.ScriptRecord:
+        scriptRecord = otTables.ScriptRecord()
+        scriptRecord.ScriptTag = 'DFLT'
+        scriptRecord.Script = otTables.Script()
+        scriptRecord.Script.LangSysRecord = []
+        scriptRecord.Script.LangSysCount = 0
+        langSys = otTables.DefaultLangSys()
+        langSys.LookupOrder = None
+        langSys.ReqFeatureIndex = 0xFFFF
+        langSys.FeatureIndex = []
+        langSys.FeatureCount = 0
+        scriptRecord.Script.DefaultLangSys = langSys
+        table.ScriptList.ScriptRecord.append(scriptRecord)
+        table.ScriptList.ScriptCount = 1
+
+    for scriptRecord in table.ScriptList.ScriptRecord:
+        script = scriptRecord.Script
+        if script.DefaultLangSys is not None:
+            yield script.DefaultLangSys
+        for langSysRecord in script.LangSysRecord:
+            yield langSysRecord.LangSys
+
+
+def setKernLookups(font, lookups):
+    '''
+    Make the lookups the only lookups of the kern feature of the font. If
+    the font has no kern feature yet, one is added to all language systems.
+    Lookups which are no longer referenced are removed.
+    '''
+    # importing the subsetter adds the prune_lookups method to GPOS
+    import fontTools.subset  # noqa: F401
+
+    if 'GPOS' not in font:
+        makeEmptyGPOS(font)
+    gpos = font['GPOS']
+    table = gpos.table
+
+    firstIndex = len(table.LookupList.Lookup)
+    table.LookupList.Lookup.extend(lookups)
+    lookupIndexes = list(range(firstIndex, len(table.LookupList.Lookup)))
+
+    featureRecords = table.FeatureList.FeatureRecord
+    kernRecords = [fr for fr in featureRecords if fr.FeatureTag == 'kern']
+    if not kernRecords:
+        featureRecord = otTables.FeatureRecord()
+        featureRecord.FeatureTag = 'kern'
+        featureRecord.Feature = otTables.Feature()
+        featureRecord.Feature.FeatureParams = None
+        kernRecords = [featureRecord]
+
+        # feature records are sorted by tag
+        oldOrder = list(featureRecords)
+        featureRecords.append(featureRecord)
+        featureRecords.sort(key=lambda fr: fr.FeatureTag)
+        newIndex = {
+            oldIndex: featureRecords.index(fr) for
+            oldIndex, fr in enumerate(oldOrder)}
+        kernIndex = featureRecords.index(featureRecord)
+        for langSys in allLangSys(table):
+            langSys.FeatureIndex = sorted(
+                [newIndex[i] for i in langSys.FeatureIndex] + [kernIndex])
+            langSys.FeatureCount = len(langSys.FeatureIndex)
+            if langSys.ReqFeatureIndex != 0xFFFF:
+                langSys.ReqFeatureIndex = newIndex[langSys.ReqFeatureIndex]
+
+    for featureRecord in kernRecords:
+        featureRecord.Feature.LookupListIndex = list(lookupIndexes)
+        featureRecord.Feature.LookupCount = len(lookupIndexes)
+
+    table.FeatureList.FeatureCount = len(featureRecords)
+    table.LookupList.LookupCount = len(table.LookupList.Lookup)
+    gpos.prune_lookups()
+
+
+def compileKerning(sourcePath, targetPath, outputPath):
+    sourcePath = Path(sourcePath)
+    font = ttLib.TTFont(targetPath)
+    if sourcePath.suffix.lower() == '.ufo':
+        from defcon import Font
+        lookups = [kernLookupFromUFO(Font(sourcePath), font)]
+    else:
+        lookups = kernLookupsFromOTF(sourcePath, font)
+    setKernLookups(font, lookups)
+    font.save(outputPath)
+    return font
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        'source',
+        metavar='SOURCE',
+        help='font or UFO to take the kerning from',
+    )
+    parser.add_argument(
+        'target',
+        metavar='TARGET',
+        help='font to compile the kerning into',
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='output font (by default, the target font is overwritten)',
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    output = args.output or args.target
+    compileKerning(args.source, args.target, output)
+    print(f'kerning from {Path(args.source).name} compiled into {output}')
+
+
+if __name__ == '__main__':
+    main()
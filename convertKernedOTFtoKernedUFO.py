@@ -1,48 +1,51 @@
 #!/usr/bin/env python3
 '''
 This script extracts kerning and groups from a compiled OTF and injects
-them into a new UFO file (which is created via `tx`).
-It requires the Adobe FDK (tx) to be installed, as well as the module
-`getKerningPairsFromOTF.py`; which is distributed in the same folder.
+them into a new UFO file. The glyphs are drawn in-process, or optionally via
+`tx` (which requires the Adobe FDK to be installed).
+It requires the module `getKerningPairsFromOTF.py`; which is distributed in
+the same folder.
 
 usage:
 python convertKernedOTFtoKernedUFO.py font.otf
+python convertKernedOTFtoKernedUFO.py -j 8 family_dir "other/*.otf"
 
 '''
 
 import os
 import sys
+import glob
+import time
 import string
 import shutil
 import subprocess
 import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from argparse import RawTextHelpFormatter
-from defcon import Font
+from types import SimpleNamespace
 from fontTools import ttLib
+from fontTools.pens.pointPen import SegmentToPointPen
+from fontTools.ufoLib import UFOReader, UFOWriter
 
 import getKerningPairsFromOTF
+from kernClasses import ClassRegistry, sortGlyphs
 
+# limits the number of concurrent tx processes in batch mode
+txSemaphore = None
 
-def sortGlyphs(glyphlist):
-    '''
-    Sort glyphs in a way that glyphs from the exceptionList, or glyphs
-    starting with 'uni' names do not get to be key (first) glyphs.
-    An infinite loop is avoided, in case there are only glyphs matching
-    above mentioned properties.
-    '''
-    exceptionList = 'dotlessi dotlessj kgreenlandic ae oe AE OE uhorn'.split()
+# prefixes of left and right kerning group names, by UFO format version
+GROUP_PREFIXES = {
+    2: ('@MMK_L_', '@MMK_R_'),
+    3: ('public.kern1.', 'public.kern2.'),
+}
 
-    glyphs = sorted(glyphlist)
-    for i in range(len(glyphs)):
-        if glyphs[0] in exceptionList or glyphs[0].startswith('uni'):
-            glyphs.insert(len(glyphs), glyphs.pop(0))
-        else:
-            continue
 
-    return glyphs
+class ConversionError(Exception):
+    pass
 
 
-def nameClass(glyphlist, flag):
+def nameClass(glyphlist, prefix):
     glyphs = sortGlyphs(glyphlist)
     if len(glyphs) == 0:
         name = 'error!!!'
@@ -57,120 +60,342 @@ def nameClass(glyphlist, flag):
     else:
         case = ''
 
-    return '@MMK%s%s%s' % (flag, name, case)
-
-
-def makeKernObjects(fontPath):
-    f = getKerningPairsFromOTF.OTFKernReader(fontPath)
-
-    groups = {}
-    kerning = {}
-
-    for kerningClass in f.allLeftClasses:
-        glyphs = sortGlyphs(f.allLeftClasses[kerningClass])
-        className = nameClass(glyphs, '_L_')
-        groups.setdefault(className, glyphs)
+    return '%s%s%s' % (prefix, name, case)
 
-    for kerningClass in f.allRightClasses:
-        glyphs = sortGlyphs(f.allRightClasses[kerningClass])
-        className = nameClass(glyphs, '_R_')
-        groups.setdefault(className, glyphs)
 
-    for (leftClass, rightClass), value in sorted(f.classPairs.items()):
-        leftGlyphs = sortGlyphs(f.allLeftClasses[leftClass])
-        leftClassName = nameClass(leftGlyphs, '_L_')
-
-        rightGlyphs = sortGlyphs(f.allRightClasses[rightClass])
-        rightClassName = nameClass(rightGlyphs, '_R_')
+def makeKernObjects(font, formatVersion=3):
+    '''
+    Groups and kerning of a font (a path, or a TTFont object). Group names
+    follow the conventions of the UFO format version: public.kern1./
+    public.kern2. for UFO 3, @MMK_L_/@MMK_R_ for UFO 2.
+    '''
+    f = getKerningPairsFromOTF.OTFKernReader(font)
 
-        kerning[(leftClassName, rightClassName)] = value
+    leftPrefix, rightPrefix = GROUP_PREFIXES[min(formatVersion, 3)]
+    registry = ClassRegistry.fromKernReader(
+        f, nameClass, leftPrefix, rightPrefix)
+    groups = registry.classes
+    kerning = registry.classPairs(f.classPairs)
 
     kerning.update(f.singlePairs)
     return groups, kerning
 
 
-def injectKerningToUFO(ufoPath, groups, kerning):
-    ufo = Font(ufoPath)
-    ufo.kerning.clear()
-    ufo.groups.clear()
+def getName(otfFont, *nameIDs):
+    for nameID in nameIDs:
+        name = otfFont['name'].getDebugName(nameID)
+        if name:
+            return name
+
+
+# fontinfo attributes from name table strings
+NAME_INFO = [
+    ('copyright', 0),
+    ('trademark', 7),
+    ('postscriptFullName', 4),
+    ('openTypeNameUniqueID', 3),
+    ('openTypeNameVersion', 5),
+    ('openTypeNameManufacturer', 8),
+    ('openTypeNameDesigner', 9),
+    ('openTypeNameDescription', 10),
+    ('openTypeNameManufacturerURL', 11),
+    ('openTypeNameDesignerURL', 12),
+    ('openTypeNameLicense', 13),
+    ('openTypeNameLicenseURL', 14),
+]
+
+# fontinfo attributes from the CFF top dict (where the name table has none),
+# and from the CFF Private dict
+CFF_TOP_INFO = [
+    ('copyright', 'Copyright'),
+    ('trademark', 'Notice'),
+    ('postscriptFullName', 'FullName'),
+]
+CFF_PRIVATE_INFO = [
+    ('postscriptBlueValues', 'BlueValues'),
+    ('postscriptOtherBlues', 'OtherBlues'),
+    ('postscriptFamilyBlues', 'FamilyBlues'),
+    ('postscriptFamilyOtherBlues', 'FamilyOtherBlues'),
+    ('postscriptStemSnapH', 'StemSnapH'),
+    ('postscriptStemSnapV', 'StemSnapV'),
+    ('postscriptBlueScale', 'BlueScale'),
+    ('postscriptBlueShift', 'BlueShift'),
+    ('postscriptBlueFuzz', 'BlueFuzz'),
+    ('postscriptDefaultWidthX', 'defaultWidthX'),
+    ('postscriptNominalWidthX', 'nominalWidthX'),
+]
+
+
+def setOS2Info(info, otfFont):
+    '''
+    Vertical metrics and OS/2 values of the font, set on a fontinfo object.
+    '''
+    os2Table = otfFont['OS/2']
+    info.ascender = os2Table.sTypoAscender
+    info.capHeight = getattr(os2Table, 'sCapHeight', None)
+    info.descender = os2Table.sTypoDescender
+    info.xHeight = getattr(os2Table, 'sxHeight', None)
+
+    info.openTypeOS2VendorID = os2Table.achVendID
+    info.openTypeOS2TypoAscender = os2Table.sTypoAscender
+    info.openTypeOS2TypoDescender = os2Table.sTypoDescender
+    info.openTypeOS2TypoLineGap = os2Table.sTypoLineGap
+    info.openTypeOS2StrikeoutPosition = os2Table.yStrikeoutPosition
+    info.openTypeOS2StrikeoutSize = os2Table.yStrikeoutSize
+    info.openTypeOS2SubscriptXOffset = os2Table.ySubscriptXOffset
+    info.openTypeOS2SubscriptXSize = os2Table.ySubscriptXSize
+    info.openTypeOS2SubscriptYOffset = os2Table.ySubscriptYOffset
+    info.openTypeOS2SubscriptYSize = os2Table.ySubscriptYSize
+    info.openTypeOS2SuperscriptXOffset = os2Table.ySuperscriptXOffset
+    info.openTypeOS2SuperscriptXSize = os2Table.ySuperscriptXSize
+    info.openTypeOS2SuperscriptYOffset = os2Table.ySuperscriptYOffset
+    info.openTypeOS2SuperscriptYSize = os2Table.ySuperscriptYSize
+
+
+def makeFontInfo(otfFont):
+    '''
+    Font info of the OTF, with the values `tx` writes to a UFO (names,
+    version, italic angle, underline, and the CFF hinting values), plus
+    vertical metrics and OS/2 values.
+    '''
+    info = SimpleNamespace()
+    headTable = otfFont['head']
+    postTable = otfFont['post']
+
+    info.unitsPerEm = headTable.unitsPerEm
+    info.familyName = getName(otfFont, 16, 1)
+    info.styleName = getName(otfFont, 17, 2)
+    info.postscriptFontName = getName(otfFont, 6)
+    for attr, nameID in NAME_INFO:
+        value = getName(otfFont, nameID)
+        if value:
+            setattr(info, attr, value)
+
+    versionMajor = int(headTable.fontRevision)
+    info.versionMajor = versionMajor
+    info.versionMinor = max(
+        0, round((headTable.fontRevision - versionMajor) * 1000))
+    info.openTypeHeadLowestRecPPEM = headTable.lowestRecPPEM
+
+    info.italicAngle = postTable.italicAngle
+    info.postscriptUnderlinePosition = postTable.underlinePosition
+    info.postscriptUnderlineThickness = postTable.underlineThickness
+    info.postscriptIsFixedPitch = bool(postTable.isFixedPitch)
+
+    if 'CFF ' in otfFont:
+        topDict = otfFont['CFF '].cff.topDictIndex[0]
+        for attr, key in CFF_TOP_INFO:
+            value = topDict.rawDict.get(key)
+            if value and getattr(info, attr, None) is None:
+                setattr(info, attr, value)
+        private = topDict.Private.rawDict
+        for attr, key in CFF_PRIVATE_INFO:
+            if key in private:
+                setattr(info, attr, private[key])
+        if 'ForceBold' in private:
+            info.postscriptForceBold = bool(private['ForceBold'])
+
+    setOS2Info(info, otfFont)
+    return info
+
+
+def writeGlyphs(otfFont, writer):
+    '''
+    Write outlines, advance widths and code points of all glyphs to the UFO.
+    The outlines are drawn straight into the .glif files.
+    '''
+    glyphOrder = otfFont.getGlyphOrder()
+    otfGlyphs = otfFont.getGlyphSet()
+    unicodes = {}
+    for codepoint, gName in sorted(otfFont.getBestCmap().items()):
+        unicodes.setdefault(gName, []).append(codepoint)
+
+    glyphSet = writer.getGlyphSet()
+    for gName in glyphOrder:
+        otfGlyph = otfGlyphs[gName]
+        glyph = SimpleNamespace(
+            width=otfGlyph.width, unicodes=unicodes.get(gName, []))
+
+        def drawPoints(pointPen, otfGlyph=otfGlyph):
+            otfGlyph.draw(SegmentToPointPen(pointPen))
 
-    print('Injecting OTF groups and kerning into %s ...' % ufoPath)
-    ufo.groups.update(groups)
-    ufo.kerning.update(kerning)
-    ufo.save()
+        glyphSet.writeGlyph(gName, glyph, drawPoints)
+    glyphSet.writeContents()
+    writer.writeLayerContents()
+    writer.writeLib({'public.glyphOrder': glyphOrder})
 
 
-def injectOS2TableToUFO(otfPath, ufoPath):
-    otfFont = ttLib.TTFont(otfPath)
-    os2Table = otfFont['OS/2']
-    ufo = Font(ufoPath)
-
-    print('Injecting OS/2 table into %s ...' % ufoPath)
-
-    ufo.info.ascender = os2Table.sTypoAscender
-    ufo.info.capHeight = os2Table.sCapHeight
-    ufo.info.descender = os2Table.sTypoDescender
-    ufo.info.xHeight = os2Table.sxHeight
-
-    ufo.info.openTypeOS2VendorID = os2Table.achVendID
-    ufo.info.openTypeOS2TypoAscender = os2Table.sTypoAscender
-    ufo.info.openTypeOS2TypoDescender = os2Table.sTypoDescender
-    ufo.info.openTypeOS2TypoLineGap = os2Table.sTypoLineGap
-    ufo.info.openTypeOS2StrikeoutPosition = os2Table.yStrikeoutPosition
-    ufo.info.openTypeOS2StrikeoutSize = os2Table.yStrikeoutSize
-    ufo.info.openTypeOS2SubscriptXOffset = os2Table.ySubscriptXOffset
-    ufo.info.openTypeOS2SubscriptXSize = os2Table.ySubscriptXSize
-    ufo.info.openTypeOS2SubscriptYOffset = os2Table.ySubscriptYOffset
-    ufo.info.openTypeOS2SubscriptYSize = os2Table.ySubscriptYSize
-    ufo.info.openTypeOS2SuperscriptXOffset = os2Table.ySuperscriptXOffset
-    ufo.info.openTypeOS2SuperscriptXSize = os2Table.ySuperscriptXSize
-    ufo.info.openTypeOS2SuperscriptYOffset = os2Table.ySuperscriptYOffset
-    ufo.info.openTypeOS2SuperscriptYSize = os2Table.ySuperscriptYSize
-    ufo.save()
-
-
-def convertOTFtoUFO(otfPath, overwrite, ignore_errors):
+def prepareOutputPath(otfPath, overwrite):
     ufoPath = '%s.ufo' % os.path.splitext(otfPath)[0]
     if os.path.exists(ufoPath):
         if overwrite is True:
             shutil.rmtree(ufoPath)
         else:
-            print()
-            print(
+            raise ConversionError(
                 '%s already exists. '
                 'Use the -o flag to overwrite the existing file.' % ufoPath)
-            sys.exit()
+    return ufoPath
+
+
+def convertOTFtoUFO(otfPath, ufoPath, ignore_errors):
+    '''
+    Write the glyphs of the OTF to a new UFO, using `tx`.
+    '''
     print(
         'Creating %s from %s ...' % (ufoPath, otfPath))
     txCommand = ['tx', '-ufo', otfPath, ufoPath]
-    txProcess = subprocess.Popen(
-        txCommand,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE)
-    output, errors = txProcess.communicate()
+    if txSemaphore is not None:
+        txSemaphore.acquire()
+    try:
+        txProcess = subprocess.Popen(
+            txCommand,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        output, errors = txProcess.communicate()
+    except OSError as error:
+        raise ConversionError('tx could not be run: %s' % error)
+    finally:
+        if txSemaphore is not None:
+            txSemaphore.release()
 
     if errors:
         if ignore_errors:
             return ufoPath
         else:
-            print(errors)
-            print(
+            raise ConversionError(
+                '%s\n'
                 'A UFO file may now exist, but since tx complained, '
                 'no further steps were taken. '
-                'Use the -i flag to retry ignoring tx errors.')
-            sys.exit()
+                'Use the -i flag to retry ignoring tx errors.' %
+                errors.decode('utf-8', 'replace').strip())
 
     return ufoPath
 
 
-errorMessage = '''
+def convertFont(otfPath, overwrite=False, ignore_errors=False, use_tx=False):
+    '''
+    Convert a kerned OTF to a kerned UFO. The OTF is read once, and the UFO
+    is written once, without being read back (by default, the glyphs are
+    drawn in-process; with use_tx, `tx` writes the glyphs and font info
+    before groups, kerning and OS/2 values are added).
+    Returns the path of the UFO, and the number of glyphs converted.
+    '''
+    otfFont = ttLib.TTFont(otfPath)
+    ufoPath = prepareOutputPath(otfPath, overwrite)
+
+    if use_tx:
+        convertOTFtoUFO(otfPath, ufoPath, ignore_errors)
+        # the font info written by tx is kept; only OS/2 values are added
+        reader = UFOReader(ufoPath, validate=False)
+        info = SimpleNamespace()
+        reader.readInfo(info)
+        setOS2Info(info, otfFont)
+        writer = UFOWriter(ufoPath, formatVersion=reader.formatVersionTuple)
+    else:
+        print('Creating %s from %s ...' % (ufoPath, otfPath))
+        writer = UFOWriter(ufoPath)
+        writeGlyphs(otfFont, writer)
+        info = makeFontInfo(otfFont)
+
+    print('Adding OTF groups, kerning and font info ...')
+    groups, kerning = makeKernObjects(
+        otfFont, writer.formatVersionTuple[0])
+    writer.writeGroups(groups)
+    writer.writeKerning(kerning)
+    writer.writeInfo(info)
+    writer.close()
+    return ufoPath, len(otfFont.getGlyphOrder())
+
+
+def collectFonts(inputs):
+    '''
+    Font files from a list of files, directories and glob patterns.
+    '''
+    suffixes = ['.otf', '.ttf']
+    fontPaths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths = [
+                os.path.join(item, fileName) for
+                fileName in sorted(os.listdir(item))]
+        elif os.path.exists(item):
+            paths = [item]
+        else:
+            paths = sorted(glob.glob(item))
+        fontPaths.extend(
+            path for path in paths if
+            os.path.isfile(path) and
+            os.path.splitext(path)[1].lower() in suffixes)
+    # the same font may be matched more than once
+    return list(dict.fromkeys(fontPaths))
 
-ERROR:
-No valid font and/or UFO provided.
-Use the script like this:
 
-    python %s font.otf
-''' % os.path.basename(__file__)
+def initWorker(semaphore):
+    global txSemaphore
+    txSemaphore = semaphore
+
+
+def convertWorker(fontPath, overwrite, ignore_errors, use_tx):
+    '''
+    Convert one font, and report the result rather than raising: any error
+    (including those from malformed tables) only fails this font.
+    Returns a tuple (font path, UFO path, error message, glyph count, time).
+    '''
+    start = time.perf_counter()
+    try:
+        ufoPath, glyphCount = convertFont(
+            fontPath, overwrite, ignore_errors, use_tx)
+        error = None
+    except Exception as exception:
+        ufoPath = None
+        glyphCount = 0
+        if isinstance(exception, (ConversionError, OSError)):
+            error = str(exception)
+        else:
+            error = '%s: %s' % (type(exception).__name__, exception)
+    return fontPath, ufoPath, error, glyphCount, time.perf_counter() - start
+
+
+def convertFonts(
+    fontPaths, overwrite=False, ignore_errors=False, use_tx=False,
+    jobs=None, txJobs=1
+):
+    '''
+    Convert a batch of fonts in a process pool. At most txJobs tx processes
+    run at the same time, independent of the number of workers.
+    Returns a list of convertWorker results.
+    '''
+    jobs = jobs or os.cpu_count()
+    args = [(fontPath, overwrite, ignore_errors, use_tx) for
+            fontPath in fontPaths]
+    if jobs == 1 or len(fontPaths) == 1:
+        return [convertWorker(*fontArgs) for fontArgs in args]
+
+    with multiprocessing.Manager() as manager:
+        semaphore = manager.Semaphore(txJobs)
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=initWorker, initargs=(semaphore,)
+        ) as executor:
+            futures = [
+                executor.submit(convertWorker, *fontArgs) for
+                fontArgs in args]
+            return [future.result() for future in futures]
+
+
+def reportResults(results, elapsed):
+    failures = [result for result in results if result[2] is not None]
+    for fontPath, ufoPath, error, glyphCount, seconds in failures:
+        print('FAILED %s: %s' % (fontPath, error))
+
+    converted = len(results) - len(failures)
+    glyphCount = sum(result[3] for result in results)
+    print()
+    print('%d of %d fonts converted in %.1f s' % (
+        converted, len(results), elapsed))
+    if elapsed:
+        print('%.2f fonts/s, %d glyphs/s' % (
+            converted / elapsed, glyphCount / elapsed))
+    return failures
 
 
 def main():
@@ -179,8 +404,10 @@ def main():
         description=__doc__,
         formatter_class=RawTextHelpFormatter)
     parser.add_argument(
-        'fontfile',
-        help='input OTF file')
+        'inputs',
+        nargs='+',
+        metavar='INPUT',
+        help='input OTF file(s), folder(s) or glob pattern(s)')
     parser.add_argument(
         '-i', '--ignore_tx',
         action='store_true',
@@ -189,27 +416,32 @@ def main():
         '-o', '--overwrite',
         action='store_true',
         help='overwrite existing UFO')
+    parser.add_argument(
+        '-t', '--tx',
+        action='store_true',
+        help='draw the glyphs with tx, rather than in-process')
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument(
+        '--tx_jobs',
+        type=int,
+        default=2,
+        help='maximum number of tx processes running at the same time')
 
     args = parser.parse_args()
-    assumedFontPath = args.fontfile
-    ignore_errors = args.ignore_tx
-    overwrite = args.overwrite
-
-    if (
-        os.path.exists(assumedFontPath) and
-        os.path.splitext(assumedFontPath)[1].lower() in ['.otf', '.ttf']
-    ):
-
-        fontPath = assumedFontPath
-        groups, kerning = makeKernObjects(fontPath)
-        ufoPath = convertOTFtoUFO(fontPath, overwrite, ignore_errors)
-        injectKerningToUFO(ufoPath, groups, kerning)
-        injectOS2TableToUFO(fontPath, ufoPath)
-
-        print('done')
-
-    else:
-        print(errorMessage)
+    fontPaths = collectFonts(args.inputs)
+    if not fontPaths:
+        parser.error('no OTF or TTF files found')
+
+    start = time.perf_counter()
+    results = convertFonts(
+        fontPaths, args.overwrite, args.ignore_tx, args.tx,
+        args.jobs, args.tx_jobs)
+    failures = reportResults(results, time.perf_counter() - start)
+    if failures:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
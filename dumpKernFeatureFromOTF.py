@@ -16,27 +16,14 @@ from importlib import reload
 from pathlib import Path
 
 import getKerningPairsFromOTF
+from kernClasses import ClassRegistry, sortGlyphs
 reload(getKerningPairsFromOTF)
 
 # compress related single pairs into one line (using enum pos), or no?
 compressSinglePairs = True
 
-
-def sortGlyphs(glyphlist):
-    # Sort glyphs in a way that glyphs from the exceptionList, or glyphs
-    # starting with 'uni' names do not get to be key (first) glyphs.
-    # An infinite loop is avoided, in case there are only glyphs matching
-    # above mentioned properties.
-    exceptionList = 'dotlessi dotlessj kgreenlandic ae oe AE OE uhorn'.split()
-
-    glyphs = sorted(glyphlist)
-    for i in range(len(glyphs)):
-        if glyphs[0] in exceptionList or glyphs[0].startswith('uni'):
-            glyphs.insert(len(glyphs), glyphs.pop(0))
-        else:
-            continue
-
-    return glyphs
+# maximum estimated size of a class kerning subtable, in bytes
+SUBTABLE_SIZE_LIMIT = 0xFFFF
 
 
 def nameClass(glyphlist, flag):
@@ -71,36 +58,201 @@ def buildOutputList(sourceList, outputList, headlineString):
         outputList.append('')
 
 
-def makeKernFeature(fontPath):
+def _compressRows(pairs):
+    '''
+    Compress pairs into (left glyphs, right glyphs, value) rectangles, in
+    which every pair has the same value.
+
+    Right glyphs with identical columns (the same values for the same left
+    glyphs) are interchangeable, so they are clustered first by hashing
+    their columns. Then, each left glyph is split by value into sets of
+    column clusters; left glyphs sharing such a (set, value) signature
+    are merged into one rectangle.
+    '''
+    columns = {}
+    for (left, right), value in pairs.items():
+        columns.setdefault(right, []).append((left, value))
+
+    columnClusters = {}
+    for right, column in columns.items():
+        columnClusters.setdefault(frozenset(column), []).append(right)
+
+    rows = {}
+    for clusterIndex, column in enumerate(columnClusters):
+        for left, value in column:
+            rows.setdefault(left, {}).setdefault(value, []).append(
+                clusterIndex)
+
+    rectangles = {}
+    for left, valueClusters in rows.items():
+        for value, clusterIndexes in valueClusters.items():
+            signature = frozenset(clusterIndexes), value
+            rectangles.setdefault(signature, []).append(left)
+
+    clusterGlyphs = list(columnClusters.values())
+    compressed = []
+    for (clusterIndexes, value), lefts in rectangles.items():
+        rights = [
+            right for clusterIndex in clusterIndexes for
+            right in clusterGlyphs[clusterIndex]]
+        compressed.append((lefts, rights, value))
+    return compressed
+
+
+def compressPairs(pairs):
+    '''
+    Compress single pairs into a small number of (enum) pos statements.
+    Both orientations (merging left glyphs, or merging right glyphs) are
+    tried, and the one resulting in fewer statements wins. Every pair ends up
+    in exactly one statement, so the statements do not overlap.
+
+    Returns a sorted list of (left glyphs, right glyphs, value) tuples.
+    '''
+    byRows = _compressRows(pairs)
+    transposed = {(right, left): value for (left, right), value in pairs.items()}
+    byColumns = [
+        (lefts, rights, value) for
+        rights, lefts, value in _compressRows(transposed)]
+    compressed = min(byRows, byColumns, key=len)
+
+    return sorted(
+        (sortGlyphs(lefts), sortGlyphs(rights), value) for
+        lefts, rights, value in compressed)
+
+
+def getValueRecordSize(pairPosList):
+    '''
+    Size (in bytes) of the value records of one class pair, as compiled in
+    the font: 2 for XAdvance only, 4 for RTL kerning (XPlacement and
+    XAdvance, ValueFormat 5).
+    '''
+    valueCounts = [
+        bin(pairPos.ValueFormat1 | pairPos.ValueFormat2).count('1') for
+        pairPos in pairPosList if pairPos.Format == 2]
+    return 2 * max(valueCounts + [1])
+
+
+class KernSubtable(object):
+    '''
+    A group of class-to-class pairs, to be compiled into one PairPos
+    Format 2 subtable.
+    '''
+
+    def __init__(self, classSizes, valueRecordSize=2):
+        self.classSizes = classSizes
+        self.valueRecordSize = valueRecordSize
+        self.leftClasses = []
+        self.rightClasses = set()
+        self.pairs = []
+        self.leftGlyphCount = 0
+        self.rightGlyphCount = 0
+
+    @property
+    def cells(self):
+        # class 0 adds a row and a column to the class matrix
+        return (len(self.leftClasses) + 1) * (len(self.rightClasses) + 1)
+
+    def estimateSize(self, leftClasses=(), rightClasses=()):
+        '''
+        Estimate the compiled size (in bytes) of the subtable, optionally
+        with additional classes. The estimate errs on the large side: ClassDefs
+        are assumed to need one range per glyph.
+        '''
+        newRightClasses = set(rightClasses) - self.rightClasses
+        leftClassCount = len(self.leftClasses) + len(leftClasses)
+        rightClassCount = len(self.rightClasses) + len(newRightClasses)
+        leftGlyphs = self.leftGlyphCount + sum(
+            self.classSizes[c] for c in leftClasses)
+        rightGlyphs = self.rightGlyphCount + sum(
+            self.classSizes[c] for c in newRightClasses)
+
+        header = 16
+        coverage = 4 + 2 * leftGlyphs
+        classDef1 = 4 + 6 * leftGlyphs
+        classDef2 = 4 + 6 * rightGlyphs
+        matrix = (
+            (leftClassCount + 1) * (rightClassCount + 1) *
+            self.valueRecordSize)
+        return header + coverage + classDef1 + classDef2 + matrix
+
+    @property
+    def size(self):
+        return self.estimateSize()
+
+    def add(self, leftClass, pairs):
+        rightClasses = {right for (left, right), value in pairs}
+        newRightClasses = rightClasses - self.rightClasses
+        self.leftClasses.append(leftClass)
+        self.leftGlyphCount += self.classSizes[leftClass]
+        self.rightGlyphCount += sum(
+            self.classSizes[c] for c in newRightClasses)
+        self.rightClasses.update(newRightClasses)
+        self.pairs.extend(pairs)
+
+
+def splitClassPairs(
+    classPairsList, allClasses, sizeLimit=SUBTABLE_SIZE_LIMIT,
+    valueRecordSize=2
+):
+    '''
+    Split class-to-class pairs into subtables, so that the estimated size of
+    each subtable stays below the limit (16-bit offsets overflow otherwise).
+    The size of the value records of a class pair is given in bytes (see
+    getValueRecordSize).
+
+    All pairs of a left class end up in the same subtable. Left classes
+    kerned against the same right classes are kept together (and similar
+    ones next to each other), which limits the amount of empty (unkerned)
+    cells in each class matrix.
+    '''
+    classSizes = {name: len(glyphs) for name, glyphs in allClasses.items()}
+    rows = {}
+    for (left, right), value in classPairsList:
+        rows.setdefault(left, []).append(((left, right), value))
+
+    units = {}
+    for left, pairs in rows.items():
+        signature = tuple(sorted({right for (_, right), value in pairs}))
+        units.setdefault(signature, []).append(left)
+
+    subtables = []
+    subtable = KernSubtable(classSizes, valueRecordSize)
+    for signature in sorted(units):
+        lefts = units[signature]
+        if (
+            subtable.leftClasses and
+            subtable.estimateSize(lefts, signature) > sizeLimit
+        ):
+            subtables.append(subtable)
+            subtable = KernSubtable(classSizes, valueRecordSize)
+        for left in lefts:
+            # a unit too large for a subtable of its own is split up
+            if (
+                subtable.leftClasses and
+                subtable.estimateSize([left], signature) > sizeLimit
+            ):
+                subtables.append(subtable)
+                subtable = KernSubtable(classSizes, valueRecordSize)
+            subtable.add(left, rows[left])
+
+    if subtable.leftClasses:
+        subtables.append(subtable)
+    return subtables
+
+
+def makeKernFeature(fontPath, subtableSizeLimit=None):
+    if subtableSizeLimit is None:
+        subtableSizeLimit = SUBTABLE_SIZE_LIMIT
     okr = getKerningPairsFromOTF.OTFKernReader(fontPath)
-    allClasses = {}
+    registry = ClassRegistry.fromKernReader(okr, nameClass, '_LEFT', '_RIGHT')
+    allClasses = registry.classes
     classList = []
     fea_output = []
 
-    for kerningClass in okr.allLeftClasses:
-        glyphs = sortGlyphs(okr.allLeftClasses[kerningClass])
-        className = nameClass(glyphs, '_LEFT')
-        allClasses.setdefault(className, glyphs)
-
-    for kerningClass in okr.allRightClasses:
-        glyphs = sortGlyphs(okr.allRightClasses[kerningClass])
-        className = nameClass(glyphs, '_RIGHT')
-        allClasses.setdefault(className, glyphs)
-
     singlePairsList = sorted(okr.singlePairs.items())
+    classPairsList = sorted(registry.classPairs(okr.classPairs).items())
 
-    classPairsList = []
-    for (leftClass, rightClass), value in sorted(okr.classPairs.items()):
-        leftGlyphs = sortGlyphs(okr.allLeftClasses[leftClass])
-        leftClassName = nameClass(leftGlyphs, '_LEFT')
-
-        rightGlyphs = sortGlyphs(okr.allRightClasses[rightClass])
-        rightClassName = nameClass(rightGlyphs, '_RIGHT')
-
-        classPairsList.append(((leftClassName, rightClassName), value))
-
-    for className in sorted(allClasses):
-        glyphs = allClasses[className]
+    for className, glyphs in allClasses.items():
         classList.append(f'{className} = [ {" ".join(glyphs)} ];')
 
     buildOutputList(
@@ -110,76 +262,39 @@ def makeKernFeature(fontPath):
 
     if compressSinglePairs:
 
-        leftGlyphsDict = {}
-        rightGlyphsDict = {}
-
-        compressedLeft = []
-        compressedBoth = []
-
         class_glyph = []
         glyph_class = []
         glyph_glyph = []
         exploding_class_class = []
 
-        # Compress the single pairs to a more space-saving notation.
-        # First, create dictionaries for each left glyph.
-        # If the kerning value to any right glyph happens to be equal,
-        # merge those right glyphs into a 'class'.
-
-        for (left, right), value in singlePairsList:
-            leftGlyph = left
-            leftGlyphsDict.setdefault(leftGlyph, {})
-            kernValueDict = leftGlyphsDict[leftGlyph]
-            kernValueDict.setdefault(value, []).append(right)
-
-        for left in leftGlyphsDict:
-            for value in leftGlyphsDict[left]:
-                right = leftGlyphsDict[left][value]
-                right = sortGlyphs(right)
-                compressedLeft.append((left, right, value))
-
-        # Same happens for the right side; including classes that
-        # have been compressed before.
-
-        for left, right, value in compressedLeft:
-            rightGlyph = ' '.join(right)
-            rightGlyphsDict.setdefault(rightGlyph, {})
-            kernValueDict = rightGlyphsDict[rightGlyph]
-            kernValueDict.setdefault(value, []).append(left)
-
-        for right in rightGlyphsDict:
-            for value in rightGlyphsDict[right]:
-                left = rightGlyphsDict[right][value]
-                left = sortGlyphs(left)
-                compressedBoth.append((left, right.split(), value))
+        statements = compressPairs(okr.singlePairs)
 
         # Split the compressed single-pair kerning into four different
         # lists; organized by type:
 
-        for left, right, value in compressedBoth:
+        for left, right, value in statements:
             left_items = ' '.join(left)
             right_items = ' '.join(right)
             if len(left) != 1 and len(right) != 1:
                 exploding_class_class.append(
-                    f'enum pos [ {left_items} ] [ {right_items} ] ;')
+                    f'enum pos [ {left_items} ] [ {right_items} ] {value};')
             elif len(left) != 1 and len(right) == 1:
                 class_glyph.append(
                     f'enum pos [ {left_items} ] {right_items} {value};')
             elif len(left) == 1 and len(right) != 1:
                 glyph_class.append(
                     f'enum pos {left_items} [ {right_items} ] {value};')
-            elif len(left) == 1 and len(right) == 1:
+            else:
                 glyph_glyph.append(
                     f'pos {left_items} {right_items} {value};')
-            else:
-                print(f'ERROR with ({" ".join(left, right, value)})')
 
-        # Make sure all the pairs made it through the process:
-        if len(compressedBoth) != (
-            len(class_glyph) + len(glyph_class) +
-            len(glyph_glyph) + len(exploding_class_class)
-        ):
-            print('ERROR - we lost some kerning pairs.')
+        if statements:
+            ratio = len(singlePairsList) / len(statements)
+            buildOutputList([
+                f'# {len(singlePairsList)} single pairs written as '
+                f'{len(statements)} statements '
+                f'(compression ratio {ratio:.2f})'],
+                fea_output, 'single pairs')
 
         buildOutputList(glyph_glyph, fea_output, 'glyph to glyph')
         buildOutputList(glyph_class, fea_output, 'glyph to class')
@@ -196,10 +311,22 @@ def makeKernFeature(fontPath):
 
         buildOutputList(glyph_glyph, fea_output, 'glyph to glyph')
 
-    # List of class-to-class pairs
+    # List of class-to-class pairs, split into subtables which are not
+    # expected to overflow when compiled.
     class_class = []
-    for (left, right), value in classPairsList:
-        class_class.append(f'pos {left} {right} {value};')
+    subtables = splitClassPairs(
+        classPairsList, allClasses, subtableSizeLimit,
+        getValueRecordSize(okr.pairPosList))
+    for index, subtable in enumerate(subtables, 1):
+        if index > 1:
+            class_class.append('subtable;')
+        class_class.append(
+            f'# subtable {index}: '
+            f'{len(subtable.leftClasses)} x {len(subtable.rightClasses)} '
+            f'classes, {len(subtable.pairs)} of {subtable.cells} class pairs '
+            f'kerned, ~{subtable.size} bytes')
+        for (left, right), value in subtable.pairs:
+            class_class.append(f'pos {left} {right} {value};')
 
     buildOutputList(class_class, fea_output, 'class to class')
     return fea_output
@@ -215,6 +342,12 @@ def get_args(args=None):
         metavar='FONT',
         help='font file',
     )
+    parser.add_argument(
+        '-s', '--subtable_size',
+        type=int,
+        default=SUBTABLE_SIZE_LIMIT,
+        help='maximum estimated size of a class kerning subtable (bytes)',
+    )
     return parser.parse_args(args)
 
 
@@ -222,7 +355,7 @@ def main():
     args = get_args()
     font_path = Path(args.font_file)
     if font_path.exists() and font_path.suffix in ['.otf', '.ttf']:
-        fea = makeKernFeature(font_path)
+        fea = makeKernFeature(font_path, args.subtable_size)
         print('\n'.join(fea))
 
 
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+'''
+Write (flat) kerning from ufo, glyphs, vfj, ttf, otf or fea files into a SQLite database,
+for indexed queries across whole font families.
+
+Glyph names and sources are stored once in the `glyphs` and `sources` tables.
+Each source gets its own kerning table (the table name is recorded in the
+`sources` table), with indexes on the left glyph, right glyph, and value.
+A view with glyph names (`<kerning table>_names`) is created for convenience.
+Glyphs and FontLab JSON sources get a row (and a table) per master, named
+like their kerning dumps (e.g. `font.glyphs.Bold`).
+
+usage:
+python dumpKerningToSQLite.py family.db font_1.otf font_2.ufo
+
+example query (all pairs with T on the left, kerned tighter than -80):
+SELECT * FROM kerning_1_names WHERE left = 'T' AND value < -80;
+
+'''
+
+import argparse
+import sqlite3
+from pathlib import Path
+
+from dumpkerning import (
+    MASTER_SOURCES, extractKerning, iterMasterKerning, makeOutputPath)
+
+BATCH_SIZE = 100000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS glyphs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    kerning_table TEXT,
+    pair_count INTEGER
+);
+'''
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def get_glyph_ids(connection, glyph_names):
+    '''
+    Add glyph names to the glyphs table (unless they exist already), and
+    return a dictionary {glyph name: glyph id}.
+    '''
+    glyph_names = sorted(glyph_names)
+    with connection:
+        connection.executemany(
+            'INSERT OR IGNORE INTO glyphs (name) VALUES (?)',
+            ((name,) for name in glyph_names))
+
+    glyph_ids = {}
+    for batch in batched(glyph_names, 900):
+        placeholders = ', '.join('?' * len(batch))
+        rows = connection.execute(
+            f'SELECT name, id FROM glyphs WHERE name IN ({placeholders})',
+            batch)
+        glyph_ids.update(rows)
+    return glyph_ids
+
+
+def add_source(connection, source_path, label=None):
+    '''
+    Register a source file (or, with a label, one master of it; see
+    makeOutputPath), and return the name of a fresh kerning table.
+    Kerning of a source which has been added before is replaced.
+    '''
+    source_path = Path(source_path).resolve()
+    if label:
+        source_path = makeOutputPath(
+            source_path, label=label, mkdir=False).with_suffix('')
+    path = str(source_path)
+    with connection:
+        connection.execute(
+            'INSERT OR IGNORE INTO sources (name, path) VALUES (?, ?)',
+            (source_path.name, path))
+    source_id, = connection.execute(
+        'SELECT id FROM sources WHERE path = ?', (path,)).fetchone()
+
+    table = f'kerning_{source_id}'
+    with connection:
+        connection.execute(f'DROP VIEW IF EXISTS {table}_names')
+        connection.execute(f'DROP TABLE IF EXISTS {table}')
+        connection.execute(
+            f'CREATE TABLE {table} ('
+            'left INTEGER NOT NULL REFERENCES glyphs (id), '
+            'right INTEGER NOT NULL REFERENCES glyphs (id), '
+            'value)')
+        connection.execute(
+            'UPDATE sources SET kerning_table = ? WHERE id = ?',
+            (table, source_id))
+    return source_id, table
+
+
+def export_kerning(
+    connection, source_path, kerning, batch_size=BATCH_SIZE, label=None
+):
+    '''
+    Bulk-insert a flat kerning dictionary into a new table for the source
+    (or the master of the source given by label).
+    '''
+    source_id, table = add_source(connection, source_path, label)
+    glyph_names = {glyph for pair in kerning for glyph in pair}
+    glyph_ids = get_glyph_ids(connection, glyph_names)
+
+    rows = (
+        (glyph_ids[left], glyph_ids[right], value) for
+        (left, right), value in kerning.items())
+    for batch in batched(rows, batch_size):
+        with connection:
+            connection.executemany(
+                f'INSERT INTO {table} (left, right, value) VALUES (?, ?, ?)',
+                batch)
+
+    # building the indexes after inserting is faster than maintaining them
+    with connection:
+        for column in ['left', 'right', 'value']:
+            connection.execute(
+                f'CREATE INDEX {table}_{column} ON {table} ({column})')
+        connection.execute(
+            f'CREATE VIEW {table}_names AS '
+            'SELECT l.name AS left, r.name AS right, k.value AS value '
+            f'FROM {table} k '
+            'JOIN glyphs l ON l.id = k.left '
+            'JOIN glyphs r ON r.id = k.right')
+        connection.execute(
+            'UPDATE sources SET pair_count = ? WHERE id = ?',
+            (len(kerning), source_id))
+    return table
+
+
+def connect(db_path):
+    connection = sqlite3.connect(db_path)
+    # the database can be rebuilt from the sources, so trade durability
+    # for import speed
+    connection.execute('PRAGMA synchronous = OFF')
+    connection.execute('PRAGMA journal_mode = MEMORY')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def dumpKerningToSQLite(
+    db_path, sourceFiles, batch_size=BATCH_SIZE, glyphSubsets=None
+):
+    '''
+    Glyph subsets (if any) are given per source file.
+    '''
+    glyphSubsets = glyphSubsets or {}
+    connection = connect(db_path)
+    tables = []
+    try:
+        for source in sourceFiles:
+            input_file = Path(source)
+            print(f'extracting kerning from {input_file.name}')
+            glyphSubset = glyphSubsets.get(source)
+            if input_file.suffix in MASTER_SOURCES:
+                for label, kerning in iterMasterKerning(
+                    input_file, glyphSubset
+                ):
+                    tables.append(export_kerning(
+                        connection, input_file, kerning, batch_size, label))
+                continue
+            kerning = extractKerning(input_file, glyphSubset)
+            tables.append(
+                export_kerning(connection, input_file, kerning, batch_size))
+    finally:
+        connection.close()
+    return tables
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        'db_file',
+        metavar='DB',
+        help='SQLite database file (created if it does not exist)'
+    )
+    parser.add_argument(
+        'sourceFiles',
+        nargs='+',
+        metavar='SOURCE',
+        help='source file(s) to extract kerning from'
+    )
+    parser.add_argument(
+        '-b', '--batch_size',
+        type=int,
+        default=BATCH_SIZE,
+        help='number of pairs inserted per transaction'
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    dumpKerningToSQLite(args.db_file, args.sourceFiles, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,39 +2,331 @@
 '''
 Wrapper script for all the getKerningPairsFromXXX scripts.
 
+The readers (and their dependencies, such as fontTools and defcon) are only
+imported once a source of their format is read, so dumping a feature file
+does not pay for importing the font libraries.
+
 '''
 
-from getKerningPairsFromFEA import FEAKernReader
-from getKerningPairsFromOTF import OTFKernReader
-from getKerningPairsFromUFO import UFOkernReader
 from pathlib import Path
-import defcon
 import argparse
+import importlib
+import re
+import sys
+import time
 
+# sources with kerning per master: (module, reader class)
+MASTER_SOURCES = {
+    '.glyphs': ('getKerningPairsFromGlyphs', 'GlyphsKernReader'),
+    '.glyphspackage': ('getKerningPairsFromGlyphs', 'GlyphsKernReader'),
+    '.vfj': ('getKerningPairsFromVFJ', 'VFJkernReader'),
+}
 
-def dumpKerning(kernDict, fileName):
+
+def formatKerning(kernDict):
     output = [f"{g_1} {g_2} {value}" for (g_1, g_2), value in sorted(kernDict.items())]
+    return '\n'.join(output)
+
+
+def dumpKerning(kernDict, fileName):
     with open(fileName, "w") as blob:
-        blob.write('\n'.join(output))
+        blob.write(formatKerning(kernDict))
 
 
-def extractKerning(input_file):
+def extractKerning(input_file, glyphSubset=None):
+    '''
+    Extract flat kerning. If a glyph subset is given, glyphs outside of it
+    are dropped before any class kerning is expanded.
+    '''
+    if glyphSubset is not None:
+        glyphSubset = set(glyphSubset)
+
     if input_file.suffix in [".ttf", ".otf"]:
-        otfKern = OTFKernReader(input_file)
+        from getKerningPairsFromOTF import OTFKernReader
+        otfKern = OTFKernReader(input_file, glyphSubset=glyphSubset)
         return otfKern.kerningPairs
     elif input_file.suffix == ".ufo":
-        ufoKern = UFOkernReader(defcon.Font(input_file), includeZero=True)
+        import defcon
+        from getKerningPairsFromUFO import UFOkernReader
+        ufoKern = UFOkernReader(
+            defcon.Font(input_file), includeZero=True,
+            glyphSubset=glyphSubset)
         return ufoKern.allKerningPairs
+    elif input_file.suffix in MASTER_SOURCES:
+        # the first master; see dumpMasterKerning for all masters
+        return readMasterSource(input_file, glyphSubset).kerningPairs
     else:
         # assume .fea
-        feaOrgKern = FEAKernReader(input_file)
+        from getKerningPairsFromFEA import FEAKernReader
+        feaOrgKern = FEAKernReader(input_file, glyphSubset=glyphSubset)
         return feaOrgKern.flatKerningPairs
 
 
+def readGlyphList(glyph_list_file):
+    '''
+    Read a glyph list file (one glyph name per line).
+    '''
+    with open(glyph_list_file, 'r') as blob:
+        glyph_list = blob.read().split()
+    return glyph_list
+
+
+def parseUnicodes(unicode_string):
+    '''
+    Parse a string of hex code points and ranges, such as 0020-007E,00C4
+    '''
+    unicodes = set()
+    for chunk in unicode_string.replace(',', ' ').split():
+        chunk = chunk.upper().replace('U+', '')
+        if '-' in chunk:
+            start, end = chunk.split('-')
+            unicodes.update(range(int(start, 16), int(end, 16) + 1))
+        else:
+            unicodes.add(int(chunk, 16))
+    return unicodes
+
+
+def glyphsForUnicodes(input_file, unicodes):
+    '''
+    Map code points to glyph names, through the cmap of a font or the
+    unicodes of a UFO. Feature files carry no cmap, so AGL names (or uniXXXX
+    names) are assumed.
+    '''
+    glyphs = set()
+    if input_file.suffix in [".ttf", ".otf"]:
+        from fontTools.ttLib import TTFont
+        cmap = TTFont(input_file).getBestCmap()
+        glyphs.update(cmap[uv] for uv in unicodes if uv in cmap)
+    elif input_file.suffix == ".ufo":
+        from fontTools.ufoLib import UFOReader
+        cmap = UFOReader(input_file, validate=False).getCharacterMapping()
+        for uv in unicodes:
+            glyphs.update(cmap.get(uv, []))
+    elif input_file.suffix in MASTER_SOURCES:
+        cmap = readMasterSource(input_file).cmap
+        glyphs.update(cmap[uv] for uv in unicodes if uv in cmap)
+    else:
+        from fontTools.agl import UV2AGL
+        for uv in unicodes:
+            if uv in UV2AGL:
+                glyphs.add(UV2AGL[uv])
+            elif uv <= 0xFFFF:
+                glyphs.add(f'uni{uv:04X}')
+            else:
+                glyphs.add(f'u{uv:X}')
+    return glyphs
+
+
+def getGlyphSubset(input_file, glyph_list_file=None, unicode_string=None):
+    '''
+    Combine a glyph list file and/or code points into a glyph subset;
+    return None if neither is given.
+    '''
+    if not (glyph_list_file or unicode_string):
+        return None
+    glyphSubset = set()
+    if glyph_list_file:
+        glyphSubset.update(readGlyphList(glyph_list_file))
+    if unicode_string:
+        glyphSubset.update(
+            glyphsForUnicodes(input_file, parseUnicodes(unicode_string)))
+    return glyphSubset
+
+
+def getGlyphSubsets(sourceFiles, glyph_list_file=None, unicode_string=None):
+    '''
+    Glyph subset (or None) per source file.
+    '''
+    return {
+        source: getGlyphSubset(Path(source), glyph_list_file, unicode_string)
+        for source in sourceFiles}
+
+
+def makeOutputPath(input_file, outputDir=None, label=None, mkdir=True):
+    new_suffix = input_file.suffix + ".kerndump"
+    if label:
+        # e.g. the master name of a Glyphs source
+        label = re.sub(r'[^\w.-]+', '_', label).strip('_')
+        new_suffix = f"{input_file.suffix}.{label}.kerndump"
+    output_file = input_file.with_suffix(new_suffix)
+    if outputDir:
+        output_dir = Path(outputDir)
+        if mkdir:
+            output_dir.mkdir(exist_ok=True)
+        output_file = output_dir / output_file.name
+    return output_file
+
+
+def readMasterSource(input_file, glyphSubset=None):
+    '''
+    Reader for a source with kerning per master (Glyphs or FontLab JSON).
+    '''
+    if glyphSubset is not None:
+        glyphSubset = set(glyphSubset)
+    module_name, class_name = MASTER_SOURCES[input_file.suffix]
+    reader = getattr(importlib.import_module(module_name), class_name)
+    return reader(input_file, glyphSubset=glyphSubset)
+
+
+def iterMasterKerning(input_file, glyphSubset=None):
+    '''
+    Flat kerning of each master of a Glyphs or FontLab JSON source, as
+    (label, kerning) tuples. The label is the master name if there is more
+    than one master (None otherwise); RTL kerning of Glyphs sources (if any)
+    is labeled separately.
+    '''
+    masterKern = readMasterSource(input_file, glyphSubset)
+    multipleMasters = len(masterKern.masterIDs) > 1
+    rtlKerning = getattr(masterKern, 'kerningRTL', {})
+
+    for masterID in masterKern.masterIDs:
+        masterName = masterKern.masterNames[masterID]
+        label = masterName if multipleMasters else None
+        yield label, masterKern.masterKerning(masterID)
+
+        if masterID in rtlKerning:
+            label = f'{masterName}.RTL' if multipleMasters else 'RTL'
+            yield label, masterKern.masterKerning(masterID, rtl=True)
+
+
+def dumpMasterKerning(input_file, outputDir=None, glyphSubset=None):
+    '''
+    Write a dump for each master of a Glyphs or FontLab JSON source (see
+    iterMasterKerning for the file names). Returns the dump files written.
+    '''
+    written = []
+    for label, kerning in iterMasterKerning(input_file, glyphSubset):
+        output_file = makeOutputPath(input_file, outputDir, label)
+        dumpKerning(kerning, output_file)
+        written.append(output_file)
+    return written
+
+
+def sourceStamps(input_file):
+    '''
+    Modification stamps of the file(s) kerning is read from.
+    For a UFO, these are the plist files relevant for kerning; for a Glyphs
+    package, all of its plist files.
+    '''
+    if input_file.suffix == '.ufo':
+        paths = {
+            name: input_file / name for name in
+            ['metainfo.plist', 'groups.plist', 'kerning.plist']}
+    elif input_file.suffix == '.glyphspackage':
+        paths = {
+            name: input_file / name for name in
+            ['fontinfo.plist', 'order.plist']}
+        for path in sorted((input_file / 'glyphs').glob('*.glyph')):
+            paths[f'glyphs/{path.name}'] = path
+    else:
+        paths = {input_file.name: input_file}
+
+    stamps = {}
+    for name, path in paths.items():
+        try:
+            stat = path.stat()
+            stamps[name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamps[name] = None
+    return stamps
+
+
+class KernDumpWatcher(object):
+    '''
+    Keep .kerndump files up to date while their sources are being edited.
+
+    Sources are polled for modification. If only the kerning.plist of a UFO
+    changed, the changed kerning entries are flattened again using the group
+    index kept from the previous run; any other change (including a change
+    to groups.plist) triggers a full extraction.
+    '''
+
+    def __init__(
+        self, sourceFiles, outputDir=None, glyph_list_file=None,
+        unicode_string=None
+    ):
+        self.sources = [Path(source) for source in sourceFiles]
+        self.outputDir = outputDir
+        self.glyph_list_file = glyph_list_file
+        self.unicode_string = unicode_string
+        self.stamps = {}
+        self.incremental = {}
+
+    def extract(self, input_file, changed, glyphSubset=None):
+        if input_file.suffix != '.ufo':
+            return extractKerning(input_file, glyphSubset)
+
+        from fontTools.ufoLib import UFOReader
+        from getKerningPairsFromUFO import GROUP_INDICATOR, IncrementalKerning
+        reader = UFOReader(input_file, validate=False)
+        ik = self.incremental.get(input_file)
+        if ik is not None and changed == {'kerning.plist'}:
+            ik.updateKerning(reader.readKerning())
+        else:
+            ik = IncrementalKerning(
+                reader.readGroups(), reader.readKerning(), GROUP_INDICATOR)
+            self.incremental[input_file] = ik
+        if glyphSubset is None:
+            return ik.allKerningPairs
+        # the same as flattening with the subset
+        return {
+            (left, right): value for (left, right), value in
+            ik.allKerningPairs.items() if
+            left in glyphSubset and right in glyphSubset}
+
+    def dump(self, input_file, changed):
+        '''
+        Returns the dump files written for a source.
+        '''
+        glyphSubset = getGlyphSubset(
+            input_file, self.glyph_list_file, self.unicode_string)
+        if input_file.suffix in MASTER_SOURCES:
+            return dumpMasterKerning(input_file, self.outputDir, glyphSubset)
+        output_file = makeOutputPath(input_file, self.outputDir)
+        kerning = self.extract(input_file, changed, glyphSubset)
+        dumpKerning(kerning, output_file)
+        return [output_file]
+
+    def poll(self):
+        '''
+        Check all sources once; re-dump the ones which changed since they
+        were last dumped. Returns a list of the dump files written.
+        '''
+        written = []
+        for input_file in self.sources:
+            stamps = sourceStamps(input_file)
+            previous = self.stamps.get(input_file, {})
+            changed = {
+                name for name, value in stamps.items() if
+                previous.get(name) != value}
+            if not changed:
+                continue
+
+            try:
+                written.extend(self.dump(input_file, changed))
+            except Exception as e:
+                print(
+                    f'{time.strftime("%H:%M:%S")} could not dump '
+                    f'{input_file}: {type(e).__name__}: {e}',
+                    file=sys.stderr)
+                continue
+            self.stamps[input_file] = stamps
+        return written
+
+    def run(self, interval=0.5):
+        try:
+            while True:
+                for output_file in self.poll():
+                    print(f'{time.strftime("%H:%M:%S")} wrote {output_file}')
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+
 def get_args(args=None):
     parser = argparse.ArgumentParser(
         description=(
-            'Extract (flat) kerning from ufo, ttf, '
+            'Extract (flat) kerning from ufo, glyphs, vfj, ttf, '
             'otf or fea and write it to a text file.')
     )
     parser.add_argument(
@@ -47,6 +339,41 @@ def get_args(args=None):
         '-o', '--output',
         dest='outputDir'
     )
+    parser.add_argument(
+        '-g', '--glyph_list',
+        metavar='GLYPH_LIST',
+        help='only extract kerning between glyphs in this list file'
+    )
+    parser.add_argument(
+        '-u', '--unicodes',
+        help=(
+            'only extract kerning between glyphs mapped to these code points '
+            '(e.g. 0020-007E,00C4)')
+    )
+    parser.add_argument(
+        '-s', '--sqlite',
+        dest='dbFile',
+        metavar='DB',
+        help='write the kerning to a SQLite database, instead of text files'
+    )
+    parser.add_argument(
+        '-w', '--watch',
+        action='store_true',
+        help='keep watching the source file(s), and re-dump on change'
+    )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=0.5,
+        help='polling interval in seconds (for --watch)'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help=(
+            'flatten in this many processes, while further sources are read '
+            'and finished dumps are written (for sources on slow volumes)')
+    )
 
     return parser.parse_args(args)
 
@@ -54,18 +381,42 @@ def get_args(args=None):
 def main(args=None):
 
     args = get_args(args)
+    if args.watch:
+        watcher = KernDumpWatcher(
+            args.sourceFiles, args.outputDir, args.glyph_list, args.unicodes)
+        print('watching for changes, press Ctrl-C to stop')
+        watcher.run(args.interval)
+        return
+
+    if args.dbFile:
+        from dumpKerningToSQLite import dumpKerningToSQLite
+        glyphSubsets = getGlyphSubsets(
+            args.sourceFiles, args.glyph_list, args.unicodes)
+        dumpKerningToSQLite(
+            args.dbFile, args.sourceFiles, glyphSubsets=glyphSubsets)
+        return
+
+    if args.jobs:
+        from kernDumpPipeline import dumpSources
+        glyphSubsets = getGlyphSubsets(
+            args.sourceFiles, args.glyph_list, args.unicodes)
+        for output_file in dumpSources(
+            args.sourceFiles, args.outputDir, glyphSubsets, jobs=args.jobs
+        ):
+            print(f"wrote {output_file}")
+        return
+
     for source in args.sourceFiles:
         input_file = Path(source)
-        new_suffix = input_file.suffix + ".kerndump"
-        output_file = input_file.with_suffix(new_suffix)
+        output_file = makeOutputPath(input_file, args.outputDir)
 
         print(f"extracting kerning from {input_file.name}")
-        kerning = extractKerning(input_file)
-        if args.outputDir:
-            output_dir = Path(args.outputDir)
-            output_dir.mkdir(exist_ok=True)
-            output_file = output_dir / output_file.name
-
+        glyphSubset = getGlyphSubset(
+            input_file, args.glyph_list, args.unicodes)
+        if input_file.suffix in MASTER_SOURCES:
+            dumpMasterKerning(input_file, args.outputDir, glyphSubset)
+            continue
+        kerning = extractKerning(input_file, glyphSubset)
         dumpKerning(kerning, output_file)
 
 
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+'''
+FontLab kerning classes and kerning, converted to UFO-style groups and
+kerning, and flattened. This module does not need FontLab: the font data is
+read through an adapter. `getKerningPairsFromVFB.py` has the adapter for
+fonts open in FontLab 5; KerningDataFixture reads the same data from JSON
+(as written by exportKerningData), for batch processing and tests.
+
+JSON format:
+{
+    "fileName": "font.vfb",
+    "masters": 1,
+    "classes": ["_A_LEFT: A' Aacute Agrave", ...],
+    "kerning": [["A", "V", [-50]], ...]
+}
+
+usage:
+python flKerningData.py font.kerndata.json [more.kerndata.json ...]
+
+'''
+
+import argparse
+import json
+import os
+
+from kernFlattening import KerningFlattener
+
+leftTagsList = ['_LEFT', '_1ST', '_L_']
+rightTagsList = ['_RIGHT', '_2ND', '_R_']
+
+
+class KerningDataAdapter(object):
+    '''
+    Interface to the kerning data of a font.
+    '''
+
+    fileName = None
+
+    def classes(self):
+        'FontLab class strings, such as "_A_LEFT: A\' Aacute".'
+        raise NotImplementedError
+
+    def isMultipleMaster(self):
+        raise NotImplementedError
+
+    def kerningPairs(self):
+        '''
+        Iterate over (left glyph name, right glyph name, values) of all
+        kerning pairs; values is a list with one value per master.
+        '''
+        raise NotImplementedError
+
+
+class KerningDataFixture(KerningDataAdapter):
+    '''
+    Kerning data from a dictionary (or JSON file) in the format above.
+    '''
+
+    def __init__(self, data):
+        self.data = data
+        self.fileName = data.get('fileName')
+
+    @classmethod
+    def fromFile(cls, path):
+        with open(path, 'r') as blob:
+            data = json.load(blob)
+        data.setdefault('fileName', os.path.basename(path))
+        return cls(data)
+
+    def classes(self):
+        return list(self.data.get('classes', []))
+
+    def isMultipleMaster(self):
+        return self.data.get('masters', 1) > 1
+
+    def kerningPairs(self):
+        for left, right, values in self.data.get('kerning', []):
+            if not isinstance(values, list):
+                values = [values]
+            yield left, right, values
+
+
+def exportKerningData(adapter, path):
+    '''
+    Write the kerning data of an adapter to a JSON file, which can be read
+    by KerningDataFixture.
+    '''
+    kerning = [
+        [left, right, list(values)] for
+        left, right, values in adapter.kerningPairs()]
+    data = {
+        'fileName': adapter.fileName,
+        'masters': max([len(values) for _, _, values in kerning] + [1]),
+        'classes': adapter.classes(),
+        'kerning': kerning,
+    }
+    with open(path, 'w') as blob:
+        json.dump(data, blob, indent=1)
+
+
+def parseFLClass(cString):
+    '''
+    Parse a FontLab class string, e.g. "_L_LC_LEFT: l' lacute".
+    Returns the OT group name (@L_LC_LEFT), key glyph, glyph list, and
+    whether the key glyph is marked explicitly.
+    '''
+    FLclassName, glyphString = cString.split(':', 1)
+    OTgroupName = '@%s' % FLclassName.strip()[1:]
+    markedGlyphList = glyphString.split()
+    # strips out the keyglyph marker
+    cleanGlyphList = [gName.strip("'") for gName in markedGlyphList]
+
+    markedKeyGlyphs = [
+        gName.strip("'") for gName in markedGlyphList if gName[-1] == "'"]
+    if markedKeyGlyphs:
+        return OTgroupName, markedKeyGlyphs[0], cleanGlyphList, True
+    keyGlyphName = cleanGlyphList[0] if cleanGlyphList else None
+    return OTgroupName, keyGlyphName, cleanGlyphList, False
+
+
+def groupSides(groupName):
+    '''
+    Sides of a kerning class, based on the class name. Both sides are
+    assigned to classes without an explicit side-flag.
+    '''
+    if any([tag in groupName for tag in leftTagsList]):
+        return [True, False]
+    elif any([tag in groupName for tag in rightTagsList]):
+        return [False, True]
+    return [True, True]
+
+
+def formatKernValue(values, isMultipleMaster):
+    if isMultipleMaster:
+        # one value per master
+        return '<%s>' % ' '.join(map(str, values))
+    return int(values[0])
+
+
+class FLKerningData(object):
+
+    def __init__(self, adapter):
+        self.adapter = adapter
+        # the same for all pairs of a font
+        self.isMultipleMaster = adapter.isMultipleMaster()
+        self._readFLGroups()
+        self._splitFLGroups()
+        self.leftKeyGlyphs = self._filterKeyGlyphs(self.leftGroups)
+        self.rightKeyGlyphs = self._filterKeyGlyphs(self.rightGroups)
+        self._readFLKerning()
+
+    def _readFLGroups(self):
+        self.groupToKeyglyph = {}
+        self.groups = {}
+        self.groupOrder = []
+
+        flClassStrings = [
+            cString for cString in self.adapter.classes() if
+            cString.startswith('_') and ':' in cString]
+
+        for cString in flClassStrings:
+            OTgroupName, keyGlyphName, glyphList, explicitKey = parseFLClass(
+                cString)
+            if keyGlyphName is None:
+                continue
+            if not explicitKey:
+                print(
+                    '\tWARNING: Kerning class %s has no explicit key glyph.\n'
+                    '\tUsing first glyph found (%s).' % (
+                        cString, keyGlyphName))
+
+            self.groupOrder.append(OTgroupName)
+            self.groupToKeyglyph[OTgroupName] = keyGlyphName
+            self.groups[OTgroupName] = glyphList
+
+    def _splitFLGroups(self):
+        '''
+        Splits FontLab kerning classes into left and right sides; based on
+        the class name.
+        '''
+        self.leftGroups = []
+        self.rightGroups = []
+
+        for groupName in self.groupOrder:
+            isLeft, isRight = groupSides(groupName)
+            if isLeft:
+                self.leftGroups.append(groupName)
+            if isRight:
+                self.rightGroups.append(groupName)
+
+    def _filterKeyGlyphs(self, groupList):
+        '''
+        Returns a dictionary {keyGlyph: FLClassName}
+        for a given list of classNames.
+        '''
+        filteredKeyGlyphs = {}
+
+        for groupName in groupList:
+            keyGlyphName = self.groupToKeyglyph[groupName]
+            filteredKeyGlyphs[keyGlyphName] = groupName
+
+        return filteredKeyGlyphs
+
+    def _readFLKerning(self):
+        'Converts FontLab kerning into a UFO-style kerning dict.'
+        self.kerning = {}
+        for gNameLeft, gNameRight, values in self.adapter.kerningPairs():
+            pair = (
+                self.leftKeyGlyphs.get(gNameLeft, gNameLeft),
+                self.rightKeyGlyphs.get(gNameRight, gNameRight))
+            self.kerning[pair] = formatKernValue(
+                values, self.isMultipleMaster)
+
+
+class VFBkernReader(object):
+    '''
+    Flat kerning of FontLab classes (as @ groups) and kerning, made by the
+    same flattening code as the flat kerning of UFOs.
+    '''
+
+    def __init__(self, groups, kerning, includeZero=False):
+        self.groups = groups
+        self.kerning = kerning
+        flattener = KerningFlattener(groups, kerning, '@')
+        self.allKerningPairs = flattener.flatten(includeZero)
+        self.output = self.makeOutput(self.allKerningPairs)
+
+    def makeOutput(self, kerningDict):
+        output = []
+        for (left, right), value in list(kerningDict.items()):
+            output.append('/%s /%s %s' % (left, right, value))
+        output.sort()
+        return output
+
+
+def writeKernDump(kernReader, dumpFileName):
+    dumpFile = open(dumpFileName, 'w')
+    for (g1, g2), v in sorted(kernReader.allKerningPairs.items()):
+        dumpFile.write('%s %s %s\n' % (g1, g2, v))
+    dumpFile.close()
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        'input_files',
+        nargs='+',
+        metavar='JSON',
+        help='kerning data exported from FontLab',
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    for input_file in args.input_files:
+        kD = FLKerningData(KerningDataFixture.fromFile(input_file))
+        vkr = VFBkernReader(kD.groups, kD.kerning)
+        dumpFileName = '%s.kerndump' % os.path.splitext(input_file)[0]
+        writeKernDump(vkr, dumpFileName)
+        print('%s: %s kerning pairs written to %s' % (
+            input_file, len(vkr.allKerningPairs), dumpFileName))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ This script has the ability to use a GlyphOrderAndAliasDB file for translating
 import argparse
 import itertools
 import re
+from functools import cached_property
 
 
 # Regular expressions for parsing individual kerning commands:
@@ -56,33 +57,67 @@ class KerningPair(object):
 
 
 class FEAKernReader(object):
+    '''
+    Classes, kerning lines, flat pairs and sorted output are computed when
+    they are first accessed.
+    '''
 
-    def __init__(self, fea_file, goadb_file=None):
-
-        self.featureData = self.readFile(fea_file)
-        self.kernClasses = self.readKernClasses()
-
-        self.foundKerningPairs = self.parseKernLines()
-        self.flatKerningPairs = self.makeFlatPairs()
-
-        if goadb_file:
-            friendlyFinalDict = self.readGOADB(goadb_file)
-            self.flatKerningPairs = self.convertNames(
-                self.flatKerningPairs, friendlyFinalDict)
+    def __init__(
+        self, fea_file, goadb_file=None, glyphSubset=None, fea_text=None
+    ):
+        self.fea_file = fea_file
+        # the contents of fea_file, if these have been read already
+        self.fea_text = fea_text
+        self.goadb_file = goadb_file
+        # The glyph subset uses final names; with a GOADB, the friendly
+        # names used in the feature file are translated for comparison.
+        self.glyphSubset = glyphSubset
+
+    @cached_property
+    def friendlyFinalDict(self):
+        if self.goadb_file:
+            return self.readGOADB(self.goadb_file)
+        return {}
+
+    @cached_property
+    def featureData(self):
+        if self.fea_text is not None:
+            return self.filterLines(self.fea_text)
+        return self.readFile(self.fea_file)
+
+    @cached_property
+    def kernClasses(self):
+        return self.readKernClasses()
+
+    @cached_property
+    def foundKerningPairs(self):
+        return self.parseKernLines()
+
+    @cached_property
+    def flatKerningPairs(self):
+        flatKerningPairs = self.makeFlatPairs()
+        if self.goadb_file:
+            flatKerningPairs = self.convertNames(
+                flatKerningPairs, self.friendlyFinalDict)
+        return flatKerningPairs
 
-        self.output = []
+    @cached_property
+    def output(self):
+        output = []
         for (left, right), value in self.flatKerningPairs.items():
             line = f'{left} {right} {value}'
-            self.output.append(line)
-        self.output.sort()
+            output.append(line)
+        output.sort()
+        return output
 
     def readFile(self, filePath):
         # reads raw file, removes commented lines
-        filtered_lines = []
         with open(filePath, 'r') as inputfile:
-            data = inputfile.read().splitlines()
+            return self.filterLines(inputfile.read())
 
-        for line in data:
+    def filterLines(self, text):
+        filtered_lines = []
+        for line in text.splitlines():
             if '#' in line:
                 # remove # and everything after -- supporting in-line comments
                 line = line.split('#')[0].strip()
@@ -120,11 +155,30 @@ class FEAKernReader(object):
         # flatten nested kerning classes
         for className, itemList in classes.items():
             classes[className] = flatten_glyph_list(itemList, classes)
+
+        if self.glyphSubset is not None:
+            for className, itemList in classes.items():
+                classes[className] = self.filterGlyphs(itemList)
         return classes
 
+    def filterGlyphs(self, glyphs):
+        '''
+        Drop glyphs outside of the glyph subset (if there is one).
+        '''
+        if self.glyphSubset is None:
+            return glyphs
+        friendlyFinal = self.friendlyFinalDict
+        return [
+            gName for gName in glyphs if
+            friendlyFinal.get(gName, gName) in self.glyphSubset]
+
     def allCombinations(self, left, right):
-        leftGlyphs = self.kernClasses.get(left, [left])
-        rightGlyphs = self.kernClasses.get(right, [right])
+        leftGlyphs = self.kernClasses.get(left, None)
+        if leftGlyphs is None:
+            leftGlyphs = self.filterGlyphs([left])
+        rightGlyphs = self.kernClasses.get(right, None)
+        if rightGlyphs is None:
+            rightGlyphs = self.filterGlyphs([right])
 
         combinations = list(itertools.product(leftGlyphs, rightGlyphs))
         return combinations
@@ -186,6 +240,8 @@ class FEAKernReader(object):
             elif '@' not in left and '@' not in right:
                 # glyph-to-glyph kerning
                 pairList = [pair]
+                if len(self.filterGlyphs(pair)) != 2:
+                    pairList = []
 
             else:
                 # class-to-class, class-to-glyph, or glyph-to-class kerning
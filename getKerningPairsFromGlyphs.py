@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+'''
+Extract a list of all (flat) kerning pairs from a Glyphs source (.glyphs or
+.glyphspackage), per master, and report the absolute number of pairs.
+
+The OpenStep plist is scanned rather than parsed: only the masters, the
+kerning (`kerning`, `kerningLTR`, `kerningRTL`), and the name, kerning
+groups and code points of each glyph are read. Everything else (most of all
+the glyph layers) is skipped without being built, and the file is memory-
+mapped, so large sources are read quickly and with little memory.
+
+usage:
+python getKerningPairsFromGlyphs.py font.glyphs
+
+'''
+
+import argparse
+import re
+from functools import cached_property
+from pathlib import Path
+
+import mmapScanner
+from kernFlattening import KerningFlattener
+
+QUOTED = re.compile(rb'"([^"\\]*(?:\\.[^"\\]*)*)"', re.DOTALL)
+BARE = re.compile(rb'[^\s;,=(){}"<>]+')
+DATA = re.compile(rb'<[^>]*>')
+ESCAPE = re.compile(r'\\(U[0-9a-fA-F]{4}|[0-7]{3}|.)', re.DOTALL)
+
+GROUP_PREFIX = '@MMK_'
+
+
+def unescape(match):
+    escape = match.group(1)
+    if escape[0] == 'U':
+        return chr(int(escape[1:], 16))
+    if escape[0] in '01234567':
+        return chr(int(escape, 8))
+    return {'n': '\n', 't': '\t', 'r': '\r'}.get(escape, escape)
+
+
+def number(value):
+    '''
+    Kerning values are written as integers, but may be floats.
+    '''
+    value = float(value)
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+class OpenStepScanner(mmapScanner.MappedScanner):
+    '''
+    Reads an OpenStep plist front to back. Dictionaries and arrays are
+    iterated over, and every value is either read (readValue) or skipped
+    (skipValue) by the caller.
+    '''
+
+    BRACKETS = b'(){}'
+
+    def readScalar(self):
+        self.skipWhitespace()
+        for pattern in QUOTED, BARE, DATA:
+            match = pattern.match(self.data, self.pos)
+            if match:
+                self.pos = match.end()
+                if pattern is QUOTED:
+                    text = match.group(1).decode('utf-8')
+                    return ESCAPE.sub(unescape, text)
+                return match.group(0).decode('utf-8')
+        raise ValueError('no value at position %d' % self.pos)
+
+    def iterDict(self):
+        '''
+        Yield the keys of a dictionary. The value of each key needs to be
+        read or skipped before the next key is asked for.
+        '''
+        self.expect(b'{')
+        while self.peek() != b'}':
+            key = self.readScalar()
+            self.expect(b'=')
+            yield key
+            self.expect(b';')
+        self.pos += 1
+
+    def iterArray(self):
+        '''
+        Yield the index of each element of an array. The element needs to be
+        read or skipped before the next one is asked for.
+        '''
+        self.expect(b'(')
+        index = 0
+        while self.peek() != b')':
+            yield index
+            index += 1
+            if self.peek() == b',':
+                self.pos += 1
+        self.pos += 1
+
+    def readValue(self):
+        char = self.peek()
+        if char == b'{':
+            return {key: self.readValue() for key in self.iterDict()}
+        if char == b'(':
+            return [self.readValue() for _ in self.iterArray()]
+        return self.readScalar()
+
+    def skipValue(self):
+        if self.peek() not in (b'{', b'('):
+            self.readScalar()
+            return
+        self.skipBrackets()
+
+
+def openScanner(path):
+    return mmapScanner.openScanner(path, OpenStepScanner)
+
+
+class GlyphsKernReader(object):
+    '''
+    Masters, kerning and glyph kerning groups of a Glyphs source. Flat
+    kerning is made per master (when it is first accessed); the kerning of
+    the first master is available as kerningPairs.
+
+    Kerning groups are named like in UFOs converted by glyphsLib: the
+    right kerning group of a glyph is the @MMK_L_ group it is in when it is
+    on the left side of a pair, and vice versa.
+    '''
+
+    def __init__(self, path, glyphSubset=None):
+        self.path = Path(path)
+        self.glyphSubset = glyphSubset
+        self.formatVersion = 2
+        self.masterIDs = []
+        self.masterNames = {}
+        self.glyphOrder = []
+        self.glyphIDs = {}
+        self.unicodes = {}
+        self.leftKerningGroups = {}
+        self.rightKerningGroups = {}
+        self.kerningLTR = {}
+        self.kerningRTL = {}
+        self._flatKerning = {}
+
+        if self.path.suffix.lower() == '.glyphspackage':
+            self.readPackage()
+        else:
+            self.readFontInfo(openScanner(self.path), glyphs=True)
+
+    def readPackage(self):
+        self.readFontInfo(openScanner(self.path / 'fontinfo.plist'))
+        orderFile = self.path / 'order.plist'
+        order = []
+        if orderFile.exists():
+            order = openScanner(orderFile).readValue()
+        glyphFiles = sorted((self.path / 'glyphs').glob('*.glyph'))
+        for glyphFile in glyphFiles:
+            self.readGlyph(openScanner(glyphFile))
+        # glyphs in order.plist first, then the others in file order
+        glyphNames = set(self.glyphOrder)
+        ordered = [gName for gName in order if gName in glyphNames]
+        orderedSet = set(ordered)
+        self.glyphOrder = ordered + [
+            gName for gName in self.glyphOrder if gName not in orderedSet]
+
+    def readFontInfo(self, scanner, glyphs=False):
+        for key in scanner.iterDict():
+            if key == '.formatVersion':
+                self.formatVersion = int(scanner.readScalar())
+            elif key == 'fontMaster':
+                for _ in scanner.iterArray():
+                    self.readMaster(scanner)
+            elif key == 'glyphs' and glyphs:
+                for _ in scanner.iterArray():
+                    self.readGlyph(scanner)
+            elif key in ['kerning', 'kerningLTR']:
+                self.readKerning(scanner, self.kerningLTR)
+            elif key == 'kerningRTL':
+                self.readKerning(scanner, self.kerningRTL)
+            else:
+                scanner.skipValue()
+
+    def readMaster(self, scanner):
+        master = {}
+        for key in scanner.iterDict():
+            if key in ['id', 'name', 'weight', 'width', 'custom']:
+                master[key] = scanner.readScalar()
+            else:
+                scanner.skipValue()
+        masterID = master.get('id')
+        masterName = master.get('name')
+        if masterName is None:
+            # Glyphs 2 masters are named after their weight, width and custom
+            # name; Regular is implied
+            masterName = ' '.join([
+                master[key] for key in ['weight', 'width', 'custom'] if
+                master.get(key, 'Regular') != 'Regular']) or 'Regular'
+        self.masterIDs.append(masterID)
+        self.masterNames[masterID] = masterName
+
+    def readGlyph(self, scanner):
+        glyph = {}
+        for key in scanner.iterDict():
+            if key in [
+                'glyphname', 'id', 'leftKerningGroup', 'rightKerningGroup',
+                'kernLeft', 'kernRight', 'unicode'
+            ]:
+                glyph[key] = scanner.readValue()
+            else:
+                # layers, and everything else
+                scanner.skipValue()
+
+        gName = glyph.get('glyphname')
+        if gName is None:
+            return
+        self.glyphOrder.append(gName)
+        if 'id' in glyph:
+            self.glyphIDs[glyph['id']] = gName
+        self.unicodes[gName] = self.parseUnicodes(glyph.get('unicode'))
+        leftGroup = glyph.get('kernLeft', glyph.get('leftKerningGroup'))
+        rightGroup = glyph.get('kernRight', glyph.get('rightKerningGroup'))
+        if leftGroup:
+            self.leftKerningGroups[gName] = leftGroup
+        if rightGroup:
+            self.rightKerningGroups[gName] = rightGroup
+
+    def parseUnicodes(self, value):
+        '''
+        Code points are hex strings ("0041,0061") in Glyphs 2 files, and
+        integers (65, or a list of them) in Glyphs 3 files.
+        '''
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = value.split(',')
+        base = 10 if self.formatVersion >= 3 else 16
+        return [int(uv, base) for uv in value if uv]
+
+    def readKerning(self, scanner, kerning):
+        for masterID in scanner.iterDict():
+            masterKerning = kerning.setdefault(masterID, {})
+            for left in scanner.iterDict():
+                for right in scanner.iterDict():
+                    masterKerning[(left, right)] = number(
+                        scanner.readScalar())
+
+    @cached_property
+    def groups(self):
+        '''
+        Kerning groups, as @MMK_L_ and @MMK_R_ groups.
+        '''
+        groups = {}
+        for gName in self.glyphOrder:
+            if gName in self.rightKerningGroups:
+                groupName = GROUP_PREFIX + 'L_' + self.rightKerningGroups[gName]
+                groups.setdefault(groupName, []).append(gName)
+            if gName in self.leftKerningGroups:
+                groupName = GROUP_PREFIX + 'R_' + self.leftKerningGroups[gName]
+                groups.setdefault(groupName, []).append(gName)
+        return groups
+
+    def glyphName(self, name):
+        # older files may refer to glyphs by id
+        return self.glyphIDs.get(name, name)
+
+    def masterKerning(self, masterID, rtl=False):
+        '''
+        Flat kerning of one master (including zero values).
+        '''
+        key = masterID, rtl
+        if key not in self._flatKerning:
+            kerning = (self.kerningRTL if rtl else self.kerningLTR).get(
+                masterID, {})
+            if self.glyphIDs:
+                kerning = {
+                    (self.glyphName(left), self.glyphName(right)): value for
+                    (left, right), value in kerning.items()}
+            flattener = KerningFlattener(
+                self.groups, kerning, GROUP_PREFIX, self.glyphSubset)
+            self._flatKerning[key] = flattener.flatten(includeZero=True)
+        return self._flatKerning[key]
+
+    @property
+    def kerningPairs(self):
+        if not self.masterIDs:
+            return {}
+        return self.masterKerning(self.masterIDs[0])
+
+    @property
+    def cmap(self):
+        return {
+            uv: gName for gName, uvs in self.unicodes.items() for uv in uvs}
+
+
+def get_args(args=None):
+
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        'glyphs_file',
+        metavar='GLYPHS',
+        help='.glyphs file or .glyphspackage',
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    gkr = GlyphsKernReader(args.glyphs_file)
+    for masterID in gkr.masterIDs:
+        kerning = gkr.masterKerning(masterID)
+        print('%s: %d kerning pairs' % (gkr.masterNames[masterID], len(
+            [value for value in kerning.values() if value])))
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,7 @@ python getKerningPairsFromOTF.py <path to font file>
 '''
 
 from fontTools import ttLib
+from functools import cached_property
 from pathlib import Path
 import argparse
 import sys
@@ -30,6 +31,16 @@ class RightClass:
         self.class2Record = 0
 
 
+class ClassData:
+    def __init__(self):
+        self.allLeftClasses = {}
+        self.allRightClasses = {}
+        self.classPairs = {}
+        # (subtable index, left glyphs, right glyphs, flat value)
+        # for every class pair
+        self.flatRecords = []
+
+
 def collect_unique_kern_lookup_indexes(featureRecord):
     unique_kern_lookups = []
     for featRecItem in featureRecord:
@@ -46,16 +57,21 @@ def collect_unique_kern_lookup_indexes(featureRecord):
 
 
 class OTFKernReader(object):
-
-    def __init__(self, fontPath):
-        self.font = ttLib.TTFont(fontPath)
-        self.kerningPairs = {}
-        self.singlePairs = {}
-        self.classPairs = {}
+    '''
+    The products of the reader (classes, class pairs, single pairs, flat
+    pairs, sorted output) are computed when they are first accessed, so
+    callers which only need the class structure never pay for flattening.
+    '''
+
+    def __init__(self, fontPath, glyphSubset=None):
+        if isinstance(fontPath, ttLib.TTFont):
+            self.font = fontPath
+        else:
+            self.font = ttLib.TTFont(fontPath)
+        self.glyphSubset = glyphSubset
         self.pairPosList = []
-        self.allLeftClasses = {}
-        self.allRightClasses = {}
-        self.output = []
+        # index (in self.lookups) of the lookup of each PairPos subtable
+        self.pairPosLookups = []
 
         if 'GPOS' not in self.font:
             print("The font has no GPOS table", file=sys.stderr)
@@ -65,9 +81,42 @@ class OTFKernReader(object):
             self.analyzeFont()
             self.findKerningLookups()
             self.getPairPos()
-            self.getSinglePairs()
-            self.getClassPairs()
-            self.output = self.make_output()
+
+    @cached_property
+    def singlePairs(self):
+        return self.getSinglePairs()
+
+    @cached_property
+    def classData(self):
+        return self.getClassPairs()
+
+    @property
+    def allLeftClasses(self):
+        return self.classData.allLeftClasses
+
+    @property
+    def allRightClasses(self):
+        return self.classData.allRightClasses
+
+    @property
+    def classPairs(self):
+        return self.classData.classPairs
+
+    @cached_property
+    def kerningPairs(self):
+        return self.makeFlatPairs()
+
+    @cached_property
+    def output(self):
+        return self.make_output()
+
+    def filterGlyphs(self, glyphs):
+        '''
+        Drop glyphs outside of the glyph subset (if there is one).
+        '''
+        if self.glyphSubset is None:
+            return list(glyphs)
+        return [gName for gName in glyphs if gName in self.glyphSubset]
 
     def goodbye(self):
         print('The fun ends here.', file=sys.stderr)
@@ -130,7 +179,7 @@ class OTFKernReader(object):
             self.lookups.append(lookup)
 
     def getPairPos(self):
-        for lookup in self.lookups:
+        for lookupIndex, lookup in enumerate(self.lookups):
             for subtableItem in lookup.SubTable:
 
                 if subtableItem.LookupType == 9:  # extension table
@@ -161,25 +210,37 @@ class OTFKernReader(object):
                         file=sys.stderr)
 
                 self.pairPosList.append(subtableItem)
+                self.pairPosLookups.append(lookupIndex)
 
                 # Each glyph in this list will have a corresponding PairSet
                 # which will contain all the second glyphs and the kerning
                 # value in the form of PairValueRecord(s)
                 # self.firstGlyphsList.extend(subtableItem.Coverage.glyphs)
 
-    def getSinglePairs(self):
-        for pairPos in self.pairPosList:
+    def getSinglePairs(self, pairPosList=None):
+        '''
+        Single pairs of all PairPos subtables, or of the ones given.
+        '''
+        if pairPosList is None:
+            pairPosList = self.pairPosList
+        singlePairs = {}
+        for pairPos in pairPosList:
             if pairPos.Format == 1:
                 # single pair adjustment
 
                 firstGlyphsList = pairPos.Coverage.glyphs
+                subset = self.glyphSubset
 
                 # This iteration is done by index so we have a way
                 # to reference the firstGlyphsList:
                 for ps_index, pair_set in enumerate(pairPos.PairSet):
+                    firstGlyph = firstGlyphsList[ps_index]
+                    if subset is not None and firstGlyph not in subset:
+                        continue
                     for pairValueRecordItem in pair_set.PairValueRecord:
-                        firstGlyph = firstGlyphsList[ps_index]
                         secondGlyph = pairValueRecordItem.SecondGlyph
+                        if subset is not None and secondGlyph not in subset:
+                            continue
                         pair = firstGlyph, secondGlyph
                         valueFormat = pairPos.ValueFormat1
 
@@ -197,10 +258,11 @@ class OTFKernReader(object):
                                 file=sys.stdout)
                             continue  # skip the rest
 
-                        self.kerningPairs[pair] = kernValue
-                        self.singlePairs[pair] = kernValue
+                        singlePairs[pair] = kernValue
+        return singlePairs
 
     def getClassPairs(self):
+        classData = ClassData()
         for index, pairPos in enumerate(self.pairPosList):
             if pairPos.Format == 2:
 
@@ -228,16 +290,23 @@ class OTFKernReader(object):
                     else:
                         classGlyphs.append(gName)
                 # coverage glyphs minus glyphs in real class (without class 0)
-                lg0.glyphs = list(set(allLeftGlyphs) - set(classGlyphs))
+                lg0.glyphs = self.filterGlyphs(
+                    set(allLeftGlyphs) - set(classGlyphs))
 
                 lg0.glyphs.sort()
-                leftClasses[lg0.class1Record] = lg0
-                className = f"class_{index}_{lg0.class1Record}"
-                self.allLeftClasses[className] = lg0.glyphs
+                if lg0.glyphs or self.glyphSubset is None:
+                    leftClasses[lg0.class1Record] = lg0
+                    className = f"class_{index}_{lg0.class1Record}"
+                    classData.allLeftClasses[className] = lg0.glyphs
+
+                # Class members outside of the glyph subset are dropped
+                # before the classes are expanded into flat pairs.
+                classDef1 = pairPos.ClassDef1.classDefs
+                classDef2 = pairPos.ClassDef2.classDefs
 
                 # Find all the remaining left classes:
-                for leftGlyph in pairPos.ClassDef1.classDefs:
-                    class1Record = pairPos.ClassDef1.classDefs[leftGlyph]
+                for leftGlyph in self.filterGlyphs(classDef1):
+                    class1Record = classDef1[leftGlyph]
 
                     if class1Record != 0:  # this was the crucial line.
                         lg = LeftClass()
@@ -245,25 +314,27 @@ class OTFKernReader(object):
                         lg.class1Record = class1Record
                         leftClasses.setdefault(
                             class1Record, lg).glyphs.append(leftGlyph)
-                        self.allLeftClasses.setdefault(className, lg.glyphs)
+                        classData.allLeftClasses.setdefault(
+                            className, lg.glyphs)
 
                 # Same for the right classes:
-                for rightGlyph in pairPos.ClassDef2.classDefs:
-                    class2Record = pairPos.ClassDef2.classDefs[rightGlyph]
+                for rightGlyph in self.filterGlyphs(classDef2):
+                    class2Record = classDef2[rightGlyph]
                     rg = RightClass()
                     rg.class2Record = class2Record
                     className = f"class_{index}_{class2Record}"
                     rightClasses.setdefault(
                         class2Record, rg).glyphs.append(rightGlyph)
-                    self.allRightClasses.setdefault(className, rg.glyphs)
+                    classData.allRightClasses.setdefault(className, rg.glyphs)
 
                 for record_l in leftClasses:
                     for record_r in rightClasses:
-                        if pairPos.Class1Record[record_l].Class2Record[record_r]:
+                        class2Record = pairPos.Class1Record[record_l].Class2Record[record_r]
+                        if class2Record:
                             valueFormat = pairPos.ValueFormat1
 
                             if valueFormat in [4, 5]:
-                                kernValue = pairPos.Class1Record[record_l].Class2Record[record_r].Value1.XAdvance
+                                kernValue = class2Record.Value1.XAdvance
                             elif valueFormat == 0:
                                 # valueFormat zero is caused by a value of <0 0 0 0> on a class-class pair; skip these
                                 continue
@@ -276,23 +347,35 @@ class OTFKernReader(object):
                             if kernValue != 0:
                                 leftClassName = f'class_{index}_{leftClasses[record_l].class1Record}'
                                 rightClassName = f'class_{index}_{rightClasses[record_r].class2Record}'
-                                self.classPairs[(leftClassName, rightClassName)] = kernValue
+                                classData.classPairs[(leftClassName, rightClassName)] = kernValue
 
-                                for g_left in leftClasses[record_l].glyphs:
-                                    for g_right in rightClasses[record_r].glyphs:
-                                        if (g_left, g_right) in self.kerningPairs:
-                                            # if the kerning pair has already been assigned in pair-to-pair kerning
-                                            continue
-                                        else:
-                                            if valueFormat == 5:  # RTL kerning
-                                                x_placement = pairPos.Class1Record[record_l].Class2Record[record_r].Value1.XPlacement
-                                                x_advance = pairPos.Class1Record[record_l].Class2Record[record_r].Value1.XAdvance
-                                                kernValue = f"<{x_placement} 0 {x_advance} 0>"
+                                flatValue = kernValue
+                                if valueFormat == 5:  # RTL kerning
+                                    x_placement = class2Record.Value1.XPlacement
+                                    x_advance = class2Record.Value1.XAdvance
+                                    flatValue = f"<{x_placement} 0 {x_advance} 0>"
 
-                                            self.kerningPairs[(g_left, g_right)] = kernValue
+                                # kept in order, for flattening later
+                                classData.flatRecords.append((
+                                    index,
+                                    leftClasses[record_l].glyphs,
+                                    rightClasses[record_r].glyphs,
+                                    flatValue))
 
                         else:
                             print('ERROR', file=sys.stderr)
+        return classData
+
+    def makeFlatPairs(self):
+        kerningPairs = dict(self.singlePairs)
+        for _, leftGlyphs, rightGlyphs, flatValue in self.classData.flatRecords:
+            for g_left in leftGlyphs:
+                for g_right in rightGlyphs:
+                    # if the kerning pair has already been assigned in
+                    # pair-to-pair kerning (or by a previous class pair),
+                    # it is not overwritten
+                    kerningPairs.setdefault((g_left, g_right), flatValue)
+        return kerningPairs
 
 
 def get_args(args=None):
@@ -7,34 +7,102 @@ report the absolute number of pairs.
 
 import argparse
 import itertools
+from functools import cached_property
 from pathlib import Path
 
+from kernFlattening import (
+    KerningFlattener, GROUP_GROUP, GROUP_GLYPH, GLYPH_GROUP, GLYPH_GLYPH,
+    expandEntry, findGroupNames, makeExpander, rankEntry)
 
-class UFOkernReader(object):
+# UFOReader (and therefore defcon) renames the kerning groups of UFO 1 and 2
+# sources like in UFO 3 when reading them, so groups and kerning in memory
+# always use the UFO 3 group prefixes
+GROUP_INDICATOR = 'public.'
 
-    def __init__(self, font, includeZero=False):
-        self.f = font
 
-        try:
-            format_major = self.f.ufoFormatVersionTuple[0]
-        except AttributeError:
-            format_major = self.f.naked().ufoFormatVersionTuple[0]
+def upConvertKerning(groups, kerning, formatVersion, glyphNames=()):
+    '''
+    Groups and kerning as read from the plists of a UFO (kerning nested by
+    left side), in the form UFOReader returns them: kerning groups renamed
+    like in UFO 3, and kerning keyed by (left, right) tuples. Names of
+    glyphs in the font (glyphNames) are not taken for groups.
+    '''
+    if formatVersion < 3:
+        from fontTools.ufoLib.converters import (
+            convertUFO1OrUFO2KerningToUFO3Kerning)
+        kerning, groups, _ = convertUFO1OrUFO2KerningToUFO3Kerning(
+            kerning, groups, glyphNames)
+    return groups, {
+        (left, right): value for left, row in kerning.items() for
+        right, value in row.items()}
 
-        if int(format_major) >= 3:
-            self.group_indicator = 'public.'
-        else:
-            self.group_indicator = '@'
 
-        self.group_group_pairs = {}
-        self.group_glyph_pairs = {}
-        self.glyph_group_pairs = {}
-        self.glyph_glyph_pairs = {}
+def ufoFlattener(groups, kerning, glyphSubset=None):
+    '''
+    Flattener for the groups and kerning of a UFO as UFOReader or defcon
+    read them (or as upConvertKerning returns them). All UFO kerning is
+    flattened through here, whatever the format version of the source.
+    '''
+    return KerningFlattener(groups, kerning, GROUP_INDICATOR, glyphSubset)
 
-        self.allKerningPairs = self.makePairDicts(includeZero)
-        self.output = self.makeOutput(self.allKerningPairs)
 
-        self.totalKerning = sum(self.allKerningPairs.values())
-        self.absoluteKerning = sum(
+
+class UFOkernReader(object):
+    '''
+    Flat kerning, sorted output and totals are computed when they are first
+    accessed.
+    '''
+
+    def __init__(self, font, includeZero=False, glyphSubset=None):
+        self.f = font
+        self.includeZero = includeZero
+        self.glyphSubset = glyphSubset
+        # also for UFO 2 sources, see GROUP_INDICATOR
+        self.group_indicator = GROUP_INDICATOR
+
+    @cached_property
+    def flattener(self):
+        return ufoFlattener(self.f.groups, self.f.kerning, self.glyphSubset)
+
+    @property
+    def groups(self):
+        return self.flattener.groups
+
+    @cached_property
+    def categorizedPairs(self):
+        return tuple(self.flattener.pairs(rank) for rank in range(4))
+
+    @property
+    def group_group_pairs(self):
+        return self.categorizedPairs[GROUP_GROUP]
+
+    @property
+    def group_glyph_pairs(self):
+        return self.categorizedPairs[GROUP_GLYPH]
+
+    @property
+    def glyph_group_pairs(self):
+        return self.categorizedPairs[GLYPH_GROUP]
+
+    @property
+    def glyph_glyph_pairs(self):
+        return self.categorizedPairs[GLYPH_GLYPH]
+
+    @cached_property
+    def allKerningPairs(self):
+        return self.flattener.flatten(self.includeZero)
+
+    @cached_property
+    def output(self):
+        return self.makeOutput(self.allKerningPairs)
+
+    @cached_property
+    def totalKerning(self):
+        return sum(self.allKerningPairs.values())
+
+    @cached_property
+    def absoluteKerning(self):
+        return sum(
             [abs(value) for value in self.allKerningPairs.values()])
 
     def makeOutput(self, kerningDict):
@@ -44,65 +112,290 @@ class UFOkernReader(object):
         output.sort()
         return output
 
-    def allCombinations(self, left, right):
-        leftGlyphs = self.f.groups.get(left, [left])
-        rightGlyphs = self.f.groups.get(right, [right])
-        combinations = list(itertools.product(leftGlyphs, rightGlyphs))
-        return combinations
-
-    def makePairDicts(self, includeZero):
-        kerningPairs = {}
-
-        for (left, right), value in self.f.kerning.items():
-
-            if (
-                self.group_indicator in left and
-                self.group_indicator in right
-            ):
-                # group-to-group-pair
-                for combo in self.allCombinations(left, right):
-                    self.group_group_pairs[combo] = value
-
-            elif (
-                self.group_indicator in left and
-                self.group_indicator not in right
-            ):
-                # group-to-glyph-pair
-                for combo in self.allCombinations(left, right):
-                    self.group_glyph_pairs[combo] = value
-
-            elif (
-                self.group_indicator not in left and
-                self.group_indicator in right
-            ):
-                # glyph-to-group-pair
-                for combo in self.allCombinations(left, right):
-                    self.glyph_group_pairs[combo] = value
 
+class IncrementalKerning(object):
+    '''
+    Flat kerning (including zero values) which can be updated without
+    flattening everything again. The kerning is flattened by
+    KerningFlattener; after that, an index of group memberships is kept, so
+    a changed kerning entry only causes the flat pairs it touches to be
+    resolved anew. Kinds of pairs, group expansion and precedence are those
+    of kernFlattening.py: glyph-to-glyph before glyph-to-group before
+    group-to-glyph before group-to-group; within the same kind of pair, the
+    later kerning entry wins.
+    '''
+
+    def __init__(self, groups, kerning, group_indicator='public.'):
+        self.group_indicator = group_indicator
+        self.groups = {
+            name: list(glyphs) for name, glyphs in groups.items()}
+        self.kerning = dict(kerning)
+        self.groupNames = findGroupNames(
+            itertools.chain.from_iterable(self.kerning), group_indicator)
+        # looks groups up in self.groups, which is changed in place
+        self.expand = makeExpander(self.groups)
+        self.memberships = self.makeMemberships()
+        self.order = {key: i for i, key in enumerate(self.kerning)}
+        self.allKerningPairs = KerningFlattener(
+            self.groups, self.kerning, group_indicator).flatten(
+            includeZero=True)
+
+    def rank(self, key):
+        left, right = key
+        return rankEntry(left, right, self.groupNames)
+
+    def addKeys(self, keys):
+        self.groupNames.update(findGroupNames(
+            itertools.chain.from_iterable(keys), self.group_indicator))
+
+    def makeMemberships(self):
+        memberships = {}
+        for name, glyphs in self.groups.items():
+            for glyph in glyphs:
+                memberships.setdefault(glyph, set()).add(name)
+        return memberships
+
+    def expandingNames(self, glyph):
+        '''
+        The names which expand to a glyph (see kernFlattening.makeExpander).
+        '''
+        names = set(self.memberships.get(glyph, ()))
+        if glyph not in self.groups:
+            names.add(glyph)
+        return names
+
+    def resolvePair(self, left, right):
+        '''
+        Find the kerning entry that applies to a flat pair; return None if no
+        kerning entry does.
+        '''
+        expanded = set(itertools.product(
+            self.expandingNames(left), self.expandingNames(right)))
+        best = None
+        for key in expanded | {(left, right)}:
+            if key not in self.kerning:
+                continue
+            rank = self.rank(key)
+            # glyph-to-glyph entries are not expanded
+            if rank == GLYPH_GLYPH:
+                applies = key == (left, right)
             else:
-                # glyph-to-glyph-pair a.k.a. single pair
-                self.glyph_glyph_pairs[(left, right)] = value
-
-        # The updates occur from the most general pairs to the most specific.
-        # This means that any given class kerning values are overwritten with
-        # the intended exceptions.
-        kerningPairs.update(self.group_group_pairs)
-        kerningPairs.update(self.group_glyph_pairs)
-        kerningPairs.update(self.glyph_group_pairs)
-        kerningPairs.update(self.glyph_glyph_pairs)
-
-        if includeZero is False:
-            # delete any kerning values == 0.
-            # This cannot be done in the previous loop, since exceptions
-            # might set a previously established kerning pair to be 0.
-            cleanKerningPairs = dict(kerningPairs)
-            for pair in kerningPairs:
-                if kerningPairs[pair] == 0:
-                    del cleanKerningPairs[pair]
-            return cleanKerningPairs
+                applies = key in expanded
+            if applies:
+                priority = rank, self.order[key]
+                if best is None or priority > best[0]:
+                    best = priority, key
+        if best is None:
+            return None
+        return best[1]
+
+    def entryPairs(self, key):
+        '''
+        All flat pairs a kerning entry expands to.
+        '''
+        left, right = key
+        return set(expandEntry(left, right, self.rank(key), self.expand))
+
+    def setFlatPair(self, pair, value):
+        '''
+        Set a flat pair, or delete it if the value is None. Once the flat
+        kerning is made, all changes go through this method.
+        '''
+        if value is None:
+            self.allKerningPairs.pop(pair, None)
+        else:
+            self.allKerningPairs[pair] = value
 
+    def resolvePairs(self, pairs):
+        for pair in pairs:
+            key = self.resolvePair(*pair)
+            if key is None:
+                self.setFlatPair(pair, None)
+            else:
+                self.setFlatPair(pair, self.kerning[key])
+        return pairs
+
+    def updateKerning(self, kerning):
+        '''
+        Replace the kerning, and re-flatten only the entries which changed.
+        Returns the set of flat pairs which were resolved again.
+        '''
+        kerning = dict(kerning)
+        changedKeys = [
+            key for key, value in self.kerning.items() if
+            kerning.get(key, None) != value or key not in kerning]
+        changedKeys.extend(
+            key for key in kerning if key not in self.kerning)
+
+        self.kerning = kerning
+        self.order = {key: i for i, key in enumerate(self.kerning)}
+        self.addKeys(changedKeys)
+
+        affectedPairs = set()
+        for key in changedKeys:
+            affectedPairs.update(self.entryPairs(key))
+        return self.resolvePairs(affectedPairs)
+
+    def setPair(self, key, value):
+        '''
+        Set a single kerning entry (delete it if the value is None).
+        Returns the set of flat pairs which were resolved again.
+        '''
+        if value is None:
+            return self.deletePair(key)
+        if key not in self.kerning:
+            # deleted entries keep their place, so the counter only grows
+            self.order[key] = len(self.order)
+            self.addKeys([key])
+        self.kerning[key] = value
+        return self.resolvePairs(self.entryPairs(key))
+
+    def deletePair(self, key):
+        if key not in self.kerning:
+            return set()
+        del self.kerning[key]
+        return self.resolvePairs(self.entryPairs(key))
+
+    def setGroup(self, name, glyphs):
+        '''
+        Set (or delete, if glyphs is None) a group, and re-flatten the kerning
+        entries which refer to it.
+        Returns the set of flat pairs which were resolved again.
+        '''
+        keys = [key for key in self.kerning if name in key]
+        affectedPairs = set()
+        for key in keys:
+            affectedPairs.update(self.entryPairs(key))
+
+        for glyph in self.groups.get(name, []):
+            self.memberships.get(glyph, set()).discard(name)
+        if glyphs is None:
+            self.groups.pop(name, None)
         else:
-            return kerningPairs
+            self.groups[name] = list(glyphs)
+            for glyph in self.groups[name]:
+                self.memberships.setdefault(glyph, set()).add(name)
+
+        for key in keys:
+            affectedPairs.update(self.entryPairs(key))
+        return self.resolvePairs(affectedPairs)
+
+    def deleteGroup(self, name):
+        return self.setGroup(name, None)
+
+    def updateGroups(self, groups):
+        '''
+        Replace the groups, and re-flatten only the entries which refer to
+        groups which changed.
+        Returns the set of flat pairs which were resolved again.
+        '''
+        groups = dict(groups)
+        resolvedPairs = set()
+        for name in [name for name in self.groups if name not in groups]:
+            resolvedPairs.update(self.deleteGroup(name))
+        for name, glyphs in groups.items():
+            if list(glyphs) != self.groups.get(name):
+                resolvedPairs.update(self.setGroup(name, glyphs))
+        return resolvedPairs
+
+
+class KerningStatistics(IncrementalKerning):
+    '''
+    The number of (non-zero) flat kerning pairs, and the absolute amount of
+    kerning, kept up to date while kerning and groups change. Only the flat
+    pairs touched by a change are resolved again.
+
+    The statistics follow a defcon font when observe() is called; the
+    callback passed in is called after every change.
+    '''
+
+    kerningNotifications = [
+        'Kerning.PairSet', 'Kerning.PairDeleted', 'Kerning.Cleared',
+        'Kerning.Updated']
+    groupsNotifications = [
+        'Groups.GroupSet', 'Groups.GroupDeleted', 'Groups.Cleared',
+        'Groups.Updated']
+
+    def __init__(self, groups, kerning, group_indicator='public.'):
+        super(KerningStatistics, self).__init__(
+            groups, kerning, group_indicator)
+        nonZero = [value for value in self.allKerningPairs.values() if value]
+        self.amountOfPairs = len(nonZero)
+        self.absoluteKerning = sum(abs(value) for value in nonZero)
+        self.font = None
+        self.callback = None
+
+    @classmethod
+    def fromFont(cls, font):
+        return cls(font.groups, font.kerning, GROUP_INDICATOR)
+
+    @property
+    def output(self):
+        return sorted(
+            '%s %s %s' % (left, right, value) for
+            (left, right), value in self.allKerningPairs.items() if value)
+
+    def setFlatPair(self, pair, value):
+        oldValue = self.allKerningPairs.get(pair)
+        if oldValue:
+            self.amountOfPairs -= 1
+            self.absoluteKerning -= abs(oldValue)
+        if value:
+            self.amountOfPairs += 1
+            self.absoluteKerning += abs(value)
+        super(KerningStatistics, self).setFlatPair(pair, value)
+
+    def observe(self, font, callback=None):
+        '''
+        Follow the kerning and groups of a defcon font.
+        '''
+        self.font = font
+        self.callback = callback
+        for notification in self.kerningNotifications:
+            font.kerning.addObserver(self, 'kerningChanged', notification)
+        for notification in self.groupsNotifications:
+            font.groups.addObserver(self, 'groupsChanged', notification)
+
+    def stopObserving(self):
+        if self.font is None:
+            return
+        for notification in self.kerningNotifications:
+            self.font.kerning.removeObserver(self, notification)
+        for notification in self.groupsNotifications:
+            self.font.groups.removeObserver(self, notification)
+        self.font = None
+        self.callback = None
+
+    def kerningChanged(self, notification):
+        data = notification.data
+        if notification.name == 'Kerning.PairSet':
+            self.setPair(data['key'], data['newValue'])
+        elif notification.name == 'Kerning.PairDeleted':
+            self.deletePair(data['key'])
+        elif notification.name == 'Kerning.Cleared':
+            self.updateKerning({})
+        elif notification.name == 'Kerning.Updated':
+            # the payload may be an iterator defcon has consumed already,
+            # so the kerning is read again from the font
+            self.updateKerning(self.font.kerning)
+        self.changed()
+
+    def groupsChanged(self, notification):
+        data = notification.data
+        if notification.name == 'Groups.GroupSet':
+            self.setGroup(data['key'], data['newValue'])
+        elif notification.name == 'Groups.GroupDeleted':
+            self.deleteGroup(data['key'])
+        elif notification.name == 'Groups.Cleared':
+            for name in list(self.groups):
+                self.deleteGroup(name)
+        elif notification.name == 'Groups.Updated':
+            self.updateGroups(self.font.groups)
+        self.changed()
+
+    def changed(self):
+        if self.callback is not None:
+            self.callback(self)
 
 
 def get_args(args=None):
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+'''
+Extract a list of all (flat) kerning pairs from a FontLab 7+ JSON source
+(.vfj), per master, and report the absolute number of pairs.
+
+The JSON is scanned rather than loaded: only the glyph names and code
+points, and the kerning classes and kerning pairs of each master are read.
+Everything else (most of all the glyph layers and their element data) is
+skipped without being decoded, and the file is memory-mapped, so large
+sources are read quickly and with little memory.
+
+Relevant parts of the format:
+{
+    "font": {
+        "glyphs": [{"name": "A", "unicode": "0041", "layers": [...]}, ...],
+        "masters": [{"fontMaster": {
+            "name": "Regular",
+            "kerning": {
+                "kerningClasses": [
+                    {"name": "A", "names": ["A", "Aacute"], "1st": true},
+                    ...
+                ],
+                "pairs": {"@A": {"V": -50, ...}, ...}
+            }
+        }}, ...]
+    }
+}
+
+usage:
+python getKerningPairsFromVFJ.py font.vfj
+
+'''
+
+import argparse
+import json
+import re
+from pathlib import Path
+
+import mmapScanner
+from kernFlattening import KerningFlattener
+
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+SCALAR = re.compile(rb'[^\s,:\[\]{}"]+')
+
+LEFT_PREFIX = 'public.kern1.'
+RIGHT_PREFIX = 'public.kern2.'
+
+
+class JSONScanner(mmapScanner.MappedScanner):
+    '''
+    Reads JSON front to back. Objects and arrays are iterated over, and
+    every value is either read (readValue) or skipped (skipValue) by the
+    caller.
+    '''
+
+    BRACKETS = b'[]{}'
+    WHITESPACE = re.compile(rb'[ \t\n\r]*')
+
+    def iterObject(self):
+        '''
+        Yield the keys of an object. The value of each key needs to be read
+        or skipped before the next key is asked for.
+        '''
+        self.expect(b'{')
+        if self.peek() == b'}':
+            self.pos += 1
+            return
+        while True:
+            key = self.readValue()
+            self.expect(b':')
+            yield key
+            if self.peek() != b',':
+                break
+            self.pos += 1
+        self.expect(b'}')
+
+    def iterArray(self):
+        '''
+        Yield the index of each element of an array. The element needs to be
+        read or skipped before the next one is asked for.
+        '''
+        self.expect(b'[')
+        if self.peek() == b']':
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.peek() != b',':
+                break
+            self.pos += 1
+        self.expect(b']')
+
+    def readValue(self):
+        '''
+        Decode the next value. Only meant for small values: the value is
+        skipped first, and then decoded in one piece.
+        '''
+        self.skipWhitespace()
+        start = self.pos
+        self.skipValue()
+        return json.loads(self.data[start:self.pos].decode('utf-8'))
+
+    def skipValue(self):
+        char = self.peek()
+        if char == b'"':
+            self.pos = STRING.match(self.data, self.pos).end()
+            return
+        if char not in (b'[', b'{'):
+            match = SCALAR.match(self.data, self.pos)
+            if match is None:
+                raise ValueError('no value at position %d' % self.pos)
+            self.pos = match.end()
+            return
+        self.skipBrackets()
+
+
+def openScanner(path):
+    return mmapScanner.openScanner(path, JSONScanner)
+
+
+def kerningKey(name, prefix):
+    '''
+    Kerning classes are referred to as @name in kerning pairs.
+    '''
+    if name.startswith('@'):
+        return prefix + name[1:]
+    return name
+
+
+class VFJkernReader(object):
+    '''
+    Masters, kerning classes and kerning of a FontLab JSON source. Flat
+    kerning is made per master (when it is first accessed); the kerning of
+    the first master is available as kerningPairs.
+
+    Kerning classes become UFO-style kerning groups: public.kern1.name for
+    classes on the first side of pairs, public.kern2.name for classes on the
+    second side. Classes flagged for neither side are used on both.
+    '''
+
+    def __init__(self, path, glyphSubset=None):
+        self.path = Path(path)
+        self.glyphSubset = glyphSubset
+        self.masterIDs = []
+        self.masterNames = {}
+        self.glyphOrder = []
+        self.unicodes = {}
+        self.masterGroups = {}
+        self.masterPairs = {}
+        self._flatKerning = {}
+
+        scanner = openScanner(self.path)
+        for key in scanner.iterObject():
+            if key == 'font':
+                self.readFont(scanner)
+            else:
+                scanner.skipValue()
+
+    def readFont(self, scanner):
+        for key in scanner.iterObject():
+            if key == 'glyphs':
+                for _ in scanner.iterArray():
+                    self.readGlyph(scanner)
+            elif key == 'masters':
+                for _ in scanner.iterArray():
+                    master = {}
+                    self.readMaster(scanner, master)
+                    self.addMaster(master)
+            else:
+                scanner.skipValue()
+
+    def readGlyph(self, scanner):
+        glyph = {}
+        for key in scanner.iterObject():
+            if key in ['name', 'unicode', 'unicodes']:
+                glyph[key] = scanner.readValue()
+            else:
+                # layers, and everything else
+                scanner.skipValue()
+
+        gName = glyph.get('name')
+        if gName is None:
+            return
+        self.glyphOrder.append(gName)
+        self.unicodes[gName] = self.parseUnicodes(
+            glyph.get('unicodes', glyph.get('unicode')))
+
+    def parseUnicodes(self, value):
+        '''
+        Code points are hex strings ("0041", or "0041,0061"), or lists.
+        '''
+        if value is None:
+            return []
+        if isinstance(value, int):
+            return [value]
+        if isinstance(value, str):
+            value = re.split(r'[,\s]+', value)
+        return [
+            uv if isinstance(uv, int) else int(uv, 16) for uv in value if
+            uv != '']
+
+    def readMaster(self, scanner, master):
+        '''
+        Master data, which may be wrapped in a fontMaster object.
+        '''
+        for key in scanner.iterObject():
+            if key == 'fontMaster':
+                self.readMaster(scanner, master)
+            elif key == 'name':
+                master['name'] = scanner.readValue()
+            elif key == 'kerning':
+                self.readKerning(scanner, master)
+            else:
+                scanner.skipValue()
+
+    def readKerning(self, scanner, master):
+        groups = master.setdefault('groups', {})
+        pairs = master.setdefault('pairs', {})
+        for key in scanner.iterObject():
+            # both are decoded in one piece, all of their data is needed
+            if key == 'kerningClasses':
+                for kerningClass in scanner.readValue():
+                    name = kerningClass.get('name', '').lstrip('@')
+                    glyphs = kerningClass.get('names', [])
+                    first = kerningClass.get('1st', False)
+                    second = kerningClass.get('2nd', False)
+                    if first or not second:
+                        groups[LEFT_PREFIX + name] = glyphs
+                    if second or not first:
+                        groups[RIGHT_PREFIX + name] = glyphs
+            elif key == 'pairs':
+                for left, row in scanner.readValue().items():
+                    left = kerningKey(left, LEFT_PREFIX)
+                    for right, value in row.items():
+                        pairs[(left, kerningKey(right, RIGHT_PREFIX))] = value
+            else:
+                scanner.skipValue()
+
+    def addMaster(self, master):
+        masterID = master.get('name')
+        if masterID is None or masterID in self.masterNames:
+            masterID = str(len(self.masterIDs) + 1)
+        self.masterIDs.append(masterID)
+        self.masterNames[masterID] = master.get('name', masterID)
+        self.masterGroups[masterID] = master.get('groups', {})
+        self.masterPairs[masterID] = master.get('pairs', {})
+
+    def masterKerning(self, masterID):
+        '''
+        Flat kerning of one master (including zero values).
+        '''
+        if masterID not in self._flatKerning:
+            flattener = KerningFlattener(
+                self.masterGroups[masterID], self.masterPairs[masterID],
+                'public.kern', self.glyphSubset)
+            self._flatKerning[masterID] = flattener.flatten(includeZero=True)
+        return self._flatKerning[masterID]
+
+    @property
+    def kerningPairs(self):
+        if not self.masterIDs:
+            return {}
+        return self.masterKerning(self.masterIDs[0])
+
+    @property
+    def cmap(self):
+        return {
+            uv: gName for gName, uvs in self.unicodes.items() for uv in uvs}
+
+
+def get_args(args=None):
+
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        'vfj_file',
+        metavar='VFJ',
+        help='FontLab JSON source (.vfj)',
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    vkr = VFJkernReader(args.vfj_file)
+    for masterID in vkr.masterIDs:
+        kerning = vkr.masterKerning(masterID)
+        print('%s: %d kerning pairs' % (vkr.masterNames[masterID], len(
+            [value for value in kerning.values() if value])))
+
+
+if __name__ == '__main__':
+    main()
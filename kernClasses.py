@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+'''
+Registry of the kerning classes found in a font, shared by
+`dumpKernFeatureFromOTF.py` and `convertKernedOTFtoKernedUFO.py`.
+
+Identical classes (for example, the same class repeated in several
+subtables) are stored once, and every class gets a unique name. The sorted
+member list of each class is computed only once.
+
+'''
+
+from functools import lru_cache
+
+LEFT = 'left'
+RIGHT = 'right'
+
+
+def sortGlyphs(glyphlist):
+    '''
+    Sort glyphs in a way that glyphs from the exceptionList, or glyphs
+    starting with 'uni' names do not get to be key (first) glyphs.
+    An infinite loop is avoided, in case there are only glyphs matching
+    above mentioned properties.
+    '''
+    return list(_sortGlyphs(frozenset(glyphlist)))
+
+
+@lru_cache(maxsize=0x10000)
+def _sortGlyphs(glyphset):
+    exceptionList = 'dotlessi dotlessj kgreenlandic ae oe AE OE uhorn'.split()
+
+    glyphs = sorted(glyphset)
+    for i in range(len(glyphs)):
+        if glyphs[0] in exceptionList or glyphs[0].startswith('uni'):
+            glyphs.insert(len(glyphs), glyphs.pop(0))
+        else:
+            continue
+
+    return tuple(glyphs)
+
+
+class ClassRegistry(object):
+    '''
+    Kerning classes interned by side and glyph set.
+
+    Names are made by the nameClass function passed in, which is called with
+    the sorted glyphs and the flag of the side. Names claimed by more than one
+    class are told apart with a numeric suffix; which class keeps the plain
+    name only depends on the glyph sets (not on the order they were added
+    in), so the output is stable.
+    '''
+
+    def __init__(self, nameClass, leftFlag, rightFlag):
+        self.nameClass = nameClass
+        self.flags = {LEFT: leftFlag, RIGHT: rightFlag}
+        # (side, frozenset of glyphs) for every class
+        self.keys = []
+        self._keySet = set()
+        # font-internal class name -> (side, frozenset of glyphs)
+        self.aliases = {}
+        self._names = None
+
+    @classmethod
+    def fromKernReader(cls, okr, nameClass, leftFlag, rightFlag):
+        '''
+        Registry of all the classes of an OTFKernReader.
+        '''
+        registry = cls(nameClass, leftFlag, rightFlag)
+        for className, glyphs in okr.allLeftClasses.items():
+            registry.add(glyphs, LEFT, className)
+        for className, glyphs in okr.allRightClasses.items():
+            registry.add(glyphs, RIGHT, className)
+        return registry
+
+    def add(self, glyphs, side, alias=None):
+        '''
+        Register a class (unless an identical class exists already), and
+        return its key. Empty classes are not registered.
+        '''
+        glyphset = frozenset(glyphs)
+        if not glyphset:
+            return None
+        key = side, glyphset
+        if alias is not None:
+            self.aliases[(side, alias)] = key
+        if key not in self._keySet:
+            self.keys.append(key)
+            self._keySet.add(key)
+            self._names = None
+        return key
+
+    def glyphs(self, key):
+        '''
+        Sorted member list of a class.
+        '''
+        side, glyphset = key
+        return list(_sortGlyphs(glyphset))
+
+    @property
+    def names(self):
+        '''
+        Dictionary {key: unique class name}.
+        '''
+        if self._names is None:
+            self._names = self.makeNames()
+        return self._names
+
+    def makeNames(self):
+        candidates = {}
+        for key in self.keys:
+            side, glyphset = key
+            glyphs = _sortGlyphs(glyphset)
+            baseName = self.nameClass(glyphs, self.flags[side])
+            candidates.setdefault(baseName, []).append((glyphs, key))
+
+        names = {}
+        usedNames = set(candidates)
+        for baseName in sorted(candidates):
+            claimants = sorted(candidates[baseName])
+            (_, key), others = claimants[0], claimants[1:]
+            names[key] = baseName
+            suffix = 2
+            for _, key in others:
+                while f'{baseName}_{suffix}' in usedNames:
+                    suffix += 1
+                name = f'{baseName}_{suffix}'
+                usedNames.add(name)
+                names[key] = name
+        return names
+
+    def name(self, side, alias):
+        '''
+        Unique name of a class, found by its font-internal name. Returns None
+        for empty classes.
+        '''
+        key = self.aliases.get((side, alias))
+        if key is None:
+            return None
+        return self.names[key]
+
+    @property
+    def classes(self):
+        '''
+        Dictionary {class name: sorted glyphs}, sorted by class name.
+        '''
+        return {
+            name: self.glyphs(key) for key, name in
+            sorted(self.names.items(), key=lambda item: item[1])}
+
+    def classPairs(self, classPairs):
+        '''
+        Rename the class pairs of an OTFKernReader. Pairs which turn into the
+        same pair of (deduplicated) classes are only kept once; the first one
+        wins, like it does when the font is shaped.
+        '''
+        renamed = {}
+        for (left, right), value in classPairs.items():
+            leftName = self.name(LEFT, left)
+            rightName = self.name(RIGHT, right)
+            if leftName is None or rightName is None:
+                continue
+            renamed.setdefault((leftName, rightName), value)
+        return renamed
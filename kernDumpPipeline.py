@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+'''
+Dump the kerning of many sources, overlapping reading and writing with
+flattening (`dumpkerning.py -j`). Meant for sources on slow (e.g. network
+mounted) volumes, where reading, flattening and writing one source after
+the other leaves the CPU waiting for most of the time.
+
+The pipeline has three stages, connected by bounded queues:
+
+- a number of asyncio tasks read the bytes of each source through a file
+  system object: the text of a feature file, the plist files of a UFO
+  which hold kerning, or a font file;
+- a process pool makes flat kerning from these bytes, and formats the dumps;
+- the dumps are written through the same file system object.
+
+When flattening falls behind, the reading tasks wait for room in the queue,
+so only a few sources are held in memory at any time. Sources with kerning
+per master (Glyphs and FontLab JSON) are read by the flattening processes
+themselves, since their readers map the files into memory.
+
+Any object with `read(path)` and `write(path, data)` coroutines can be used
+as file system; ThrottledFileSystem simulates a slow volume.
+
+'''
+
+import asyncio
+import collections
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from dumpkerning import (
+    MASTER_SOURCES, formatKerning, iterMasterKerning, makeOutputPath)
+
+# the glyph names in contents.plist are needed to up-convert UFO 2 groups
+UFO_FILES = [
+    'metainfo.plist', 'groups.plist', 'kerning.plist', 'glyphs/contents.plist']
+# files which a UFO does not need to have
+OPTIONAL_FILES = {'groups.plist', 'kerning.plist', 'glyphs/contents.plist'}
+
+
+class LocalFileSystem(object):
+    '''
+    Files on a local (or mounted) volume. Reads and writes run in threads,
+    so they do not block the event loop.
+    '''
+
+    async def read(self, path):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, Path(path).read_bytes)
+
+    async def write(self, path, data):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.writeBytes, Path(path), data)
+
+    def writeBytes(self, path, data):
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(data)
+
+
+class ThrottledFileSystem(object):
+    '''
+    Wraps a file system, and delays every read and write by a latency
+    (during which other requests may proceed) plus the transfer time of the
+    data at a given bandwidth (which all requests share).
+
+    The number of reads and writes waiting at the same time is counted
+    (pending, and its maximum maxPending), which shows how far requests
+    overlap.
+    '''
+
+    def __init__(self, fileSystem=None, latency=0.05, bytesPerSecond=None):
+        self.fileSystem = fileSystem or LocalFileSystem()
+        self.latency = latency
+        self.bytesPerSecond = bytesPerSecond
+        self.channelFree = 0
+        self.bytesRead = 0
+        self.bytesWritten = 0
+        self.pending = {'read': 0, 'write': 0}
+        self.maxPending = {'read': 0, 'write': 0}
+
+    async def throttle(self, kind, size):
+        now = time.monotonic()
+        start = max(now + self.latency, self.channelFree)
+        if self.bytesPerSecond:
+            self.channelFree = start + size / self.bytesPerSecond
+        else:
+            self.channelFree = start
+        self.pending[kind] += 1
+        self.maxPending[kind] = max(self.maxPending[kind], self.pending[kind])
+        try:
+            await asyncio.sleep(self.channelFree - now)
+        finally:
+            self.pending[kind] -= 1
+
+    async def read(self, path):
+        data = await self.fileSystem.read(path)
+        await self.throttle('read', len(data))
+        self.bytesRead += len(data)
+        return data
+
+    async def write(self, path, data):
+        await self.throttle('write', len(data))
+        await self.fileSystem.write(path, data)
+        self.bytesWritten += len(data)
+
+
+def sourcePaths(input_file):
+    '''
+    The files to read ahead for a source, by name; None for sources which
+    are read by the flattening process.
+    '''
+    if input_file.suffix == '.ufo':
+        return {name: input_file / name for name in UFO_FILES}
+    if input_file.suffix in MASTER_SOURCES:
+        return None
+    return {input_file.name: input_file}
+
+
+def kerningFromBytes(input_file, files, glyphSubset=None):
+    '''
+    Flat kerning of a source (the same as extractKerning), made from the
+    bytes of its files. Missing (optional) files are None.
+    '''
+    if input_file.suffix == '.ufo':
+        import plistlib
+        from getKerningPairsFromUFO import ufoFlattener, upConvertKerning
+        plists = {
+            name: plistlib.loads(data) if data is not None else {} for
+            name, data in files.items()}
+        groups, kerning = upConvertKerning(
+            plists['groups.plist'], plists['kerning.plist'],
+            plists['metainfo.plist'].get('formatVersion', 3),
+            plists['glyphs/contents.plist'])
+        flattener = ufoFlattener(groups, kerning, glyphSubset)
+        return flattener.flatten(includeZero=True)
+
+    data = files[input_file.name]
+    if input_file.suffix in ['.ttf', '.otf']:
+        from fontTools.ttLib import TTFont
+        from getKerningPairsFromOTF import OTFKernReader
+        font = TTFont(io.BytesIO(data))
+        return OTFKernReader(font, glyphSubset=glyphSubset).kerningPairs
+    # assume .fea
+    from getKerningPairsFromFEA import FEAKernReader
+    feaKern = FEAKernReader(
+        input_file, glyphSubset=glyphSubset, fea_text=data.decode('utf-8'))
+    return feaKern.flatKerningPairs
+
+
+def flattenSource(input_file, files, glyphSubset=None):
+    '''
+    Runs in the flattening processes. Returns the dumps of a source, as
+    (label, dump text) tuples (see makeOutputPath for the label).
+    '''
+    if files is None:
+        return [
+            (label, formatKerning(kerning)) for label, kerning in
+            iterMasterKerning(input_file, glyphSubset)]
+    kerning = kerningFromBytes(input_file, files, glyphSubset)
+    return [(None, formatKerning(kerning))]
+
+
+class DumpPipeline(object):
+    '''
+    Read, flatten and dump a list of sources; see the module docstring.
+
+    Up to `readers` sources are read at the same time, up to `queueSize`
+    sources wait for flattening, and the dumps of up to `writers` sources
+    are written at the same time. Glyph subsets (if any) are given per
+    source.
+    '''
+
+    def __init__(
+        self, sources, outputDir=None, glyphSubsets=None, fileSystem=None,
+        jobs=None, readers=4, writers=4, queueSize=None
+    ):
+        self.sources = [Path(source) for source in sources]
+        self.outputDir = outputDir
+        self.glyphSubsets = {
+            Path(source): glyphSubset for source, glyphSubset in
+            (glyphSubsets or {}).items()}
+        self.fileSystem = fileSystem or LocalFileSystem()
+        self.jobs = jobs or os.cpu_count() or 1
+        self.readers = readers
+        self.writers = writers
+        self.queueSize = queueSize or self.jobs
+        self.written = []
+        # sources which have been read, but not written yet
+        self.inFlight = 0
+        self.maxInFlight = 0
+
+    async def readFile(self, input_file, name, path):
+        try:
+            return await self.fileSystem.read(path)
+        except FileNotFoundError:
+            if not (input_file.suffix == '.ufo' and name in OPTIONAL_FILES):
+                raise
+            return None
+
+    async def readSources(self, pending, fetched):
+        while pending:
+            input_file = pending.popleft()
+            paths = sourcePaths(input_file)
+            files = None
+            if paths is not None:
+                data = await asyncio.gather(*(
+                    self.readFile(input_file, name, path) for
+                    name, path in paths.items()))
+                files = dict(zip(paths, data))
+            self.inFlight += 1
+            self.maxInFlight = max(self.maxInFlight, self.inFlight)
+            await fetched.put((input_file, files))
+
+    async def flattenSources(self, executor, fetched, flattened):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await fetched.get()
+            if item is None:
+                return
+            input_file, files = item
+            dumps = await loop.run_in_executor(
+                executor, flattenSource, input_file, files,
+                self.glyphSubsets.get(input_file))
+            await flattened.put((input_file, dumps))
+
+    async def writeDumps(self, flattened):
+        while True:
+            item = await flattened.get()
+            if item is None:
+                return
+            input_file, dumps = item
+            for label, text in dumps:
+                output_file = makeOutputPath(
+                    input_file, self.outputDir, label, mkdir=False)
+                await self.fileSystem.write(output_file, text.encode('utf-8'))
+                self.written.append(output_file)
+            self.inFlight -= 1
+
+    async def readStage(self, fetched):
+        pending = collections.deque(self.sources)
+        await asyncio.gather(*(
+            self.readSources(pending, fetched) for _ in range(self.readers)))
+        for _ in range(self.jobs):
+            await fetched.put(None)
+
+    async def flattenStage(self, executor, fetched, flattened):
+        await asyncio.gather(*(
+            self.flattenSources(executor, fetched, flattened) for
+            _ in range(self.jobs)))
+        for _ in range(self.writers):
+            await flattened.put(None)
+
+    async def writeStage(self, flattened):
+        await asyncio.gather(*(
+            self.writeDumps(flattened) for _ in range(self.writers)))
+
+    async def run(self):
+        '''
+        Returns the dump files written, in the order they were written.
+        '''
+        fetched = asyncio.Queue(self.queueSize)
+        flattened = asyncio.Queue(self.jobs)
+        with ProcessPoolExecutor(self.jobs) as executor:
+            stages = [
+                asyncio.ensure_future(self.readStage(fetched)),
+                asyncio.ensure_future(
+                    self.flattenStage(executor, fetched, flattened)),
+                asyncio.ensure_future(self.writeStage(flattened)),
+            ]
+            try:
+                await asyncio.gather(*stages)
+            except BaseException:
+                for stage in stages:
+                    stage.cancel()
+                raise
+        return self.written
+
+
+def dumpSources(
+    sources, outputDir=None, glyphSubsets=None, fileSystem=None, jobs=None,
+    **kwargs
+):
+    pipeline = DumpPipeline(
+        sources, outputDir, glyphSubsets, fileSystem, jobs, **kwargs)
+    return asyncio.run(pipeline.run())
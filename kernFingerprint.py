@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+'''
+Order-independent fingerprints of flat kerning, for quick equality checks
+across formats (e.g. a UFO and the font compiled from it).
+
+Each flat pair is hashed (a 64-bit BLAKE2b digest of "left right value"),
+and the pair hashes are added up modulo 2 ** 64. Since addition is
+commutative, the order of the pairs does not matter, and pairs can be added
+as they are made, without collecting them. The sums are also kept per left
+glyph (rows), so the rows which differ between two fingerprints can be found
+without a full diff of the kerning.
+
+usage:
+python kernFingerprint.py font.ufo font.otf [more fonts ...]
+
+'''
+
+import argparse
+import hashlib
+import sys
+from pathlib import Path
+
+MASK = 2 ** 64 - 1
+
+
+def normalizeValue(value):
+    '''
+    Kerning values may be read as integers or (integral) floats, depending
+    on the format; both are hashed the same.
+    '''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def pairHash(left, right, value):
+    data = f'{left} {right} {normalizeValue(value)}'.encode('utf-8')
+    digest = hashlib.blake2b(data, digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class KerningFingerprint(object):
+    '''
+    Sum of the hashes of all flat pairs added, the number of pairs, and
+    (unless rows is False) the sum per left glyph. Without rows, memory use
+    is constant.
+    '''
+
+    def __init__(self, rows=True):
+        self.digest = 0
+        self.count = 0
+        self.rows = {} if rows else None
+
+    def addRow(self, left, row):
+        '''
+        Add the pairs of one left glyph, given as {right glyph: value}.
+        '''
+        # same as pairHash; the hash state after the left glyph is reused
+        prefix = hashlib.blake2b(f'{left} '.encode('utf-8'), digest_size=8)
+        fromBytes = int.from_bytes
+        rowHash = 0
+        for right, value in row.items():
+            pairState = prefix.copy()
+            pairState.update(
+                f'{right} {normalizeValue(value)}'.encode('utf-8'))
+            rowHash += fromBytes(pairState.digest(), 'little')
+        rowHash &= MASK
+        self.digest = (self.digest + rowHash) & MASK
+        self.count += len(row)
+        if self.rows is not None:
+            self.rows[left] = (self.rows.get(left, 0) + rowHash) & MASK
+
+    def add(self, left, right, value):
+        self.addRow(left, {right: value})
+
+    def update(self, pairs):
+        '''
+        Add ((left, right), value) tuples, such as the items of a flat
+        kerning dictionary.
+        '''
+        for (left, right), value in pairs:
+            self.add(left, right, value)
+
+    def hexdigest(self):
+        return f'{self.digest:016x}'
+
+    def __eq__(self, other):
+        if not isinstance(other, KerningFingerprint):
+            return NotImplemented
+        return (self.digest, self.count) == (other.digest, other.count)
+
+    def __repr__(self):
+        return f'<KerningFingerprint {self.hexdigest()} ({self.count} pairs)>'
+
+    def diffRows(self, other):
+        '''
+        Sorted list of the left glyphs whose rows differ between two
+        fingerprints (including rows only found in one of them).
+        '''
+        if self.rows is None or other.rows is None:
+            raise ValueError('fingerprints made without rows cannot be diffed')
+        leftGlyphs = set(self.rows) | set(other.rows)
+        return sorted(
+            left for left in leftGlyphs if
+            self.rows.get(left) != other.rows.get(left))
+
+
+def fingerprintKerning(kerning, rows=True, includeZero=True):
+    '''
+    Fingerprint of a flat kerning dictionary.
+    '''
+    fingerprint = KerningFingerprint(rows)
+    fingerprint.update(
+        (pair, value) for pair, value in kerning.items() if
+        value or includeZero)
+    return fingerprint
+
+
+def fingerprintUFO(input_file, rows=True, includeZero=True, glyphSubset=None):
+    '''
+    The flat kerning of a UFO is fingerprinted one row at a time, as it is
+    made; only the groups and kerning of the UFO are held in memory.
+    '''
+    from fontTools.ufoLib import UFOReader
+    from getKerningPairsFromUFO import ufoFlattener
+    reader = UFOReader(input_file, validate=False)
+    flattener = ufoFlattener(
+        reader.readGroups(), reader.readKerning(), glyphSubset)
+    fingerprint = KerningFingerprint(rows)
+    for left, row in flattener.iterRows(includeZero):
+        fingerprint.addRow(left, row)
+    return fingerprint
+
+
+def fingerprintSource(
+    input_file, rows=True, includeZero=True, glyphSubset=None
+):
+    '''
+    Fingerprint of the flat kerning of any source dumpkerning can read (for
+    sources with masters, the first master). Zero values are included by
+    default, like in kerning dumps.
+    '''
+    input_file = Path(input_file)
+    if glyphSubset is not None:
+        glyphSubset = set(glyphSubset)
+    if input_file.suffix == '.ufo':
+        return fingerprintUFO(input_file, rows, includeZero, glyphSubset)
+    from dumpkerning import extractKerning
+    return fingerprintKerning(
+        extractKerning(input_file, glyphSubset), rows, includeZero)
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        'sourceFiles',
+        nargs='+',
+        metavar='SOURCE',
+        help='source file(s) to fingerprint (ufo, glyphs, vfj, ttf, otf, fea)'
+    )
+    parser.add_argument(
+        '-z', '--skip_zero',
+        action='store_true',
+        help='leave out pairs with a value of zero'
+    )
+    parser.add_argument(
+        '-r', '--max_rows',
+        type=int,
+        default=20,
+        help='maximum number of differing rows to list per source'
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    '''
+    Print the fingerprint of each source. All sources are compared with the
+    first one; returns 1 if any of them differs.
+    '''
+    args = get_args(args)
+    fingerprints = []
+    for source in args.sourceFiles:
+        fingerprint = fingerprintSource(
+            source, includeZero=not args.skip_zero)
+        fingerprints.append(fingerprint)
+        print(f'{fingerprint.hexdigest()} {fingerprint.count:8d} {source}')
+
+    status = 0
+    first = fingerprints[0]
+    for source, fingerprint in zip(args.sourceFiles[1:], fingerprints[1:]):
+        if fingerprint == first:
+            continue
+        status = 1
+        rows = first.diffRows(fingerprint)
+        listed = ' '.join(rows[:args.max_rows])
+        more = f' (+{len(rows) - args.max_rows})' if (
+            len(rows) > args.max_rows) else ''
+        print(f'{source} differs in {len(rows)} rows: {listed}{more}')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+'''
+Flattening of group kerning, shared by `getKerningPairsFromUFO.py` and
+`getKerningPairsFromVFB.py`. No font editor is needed to import this module.
+
+Kerning keys are classified once (by a set of the group names found in the
+kerning), and all flat pairs are written into one dictionary, from the most
+general kind of pair to the most specific one: group-to-group, group-to-glyph,
+glyph-to-group, glyph-to-glyph. Exceptions therefore overwrite the class
+values they are exceptions to; within the same kind of pair, the later
+kerning entry wins.
+
+'''
+
+import itertools
+
+GROUP_GROUP, GROUP_GLYPH, GLYPH_GROUP, GLYPH_GLYPH = range(4)
+
+
+def findGroupNames(names, group_indicator):
+    '''
+    Set of the names (found in kerning keys) which refer to groups.
+    '''
+    return {name for name in names if group_indicator in name}
+
+
+def rankEntry(left, right, groupNames):
+    '''
+    Kind of pair of a kerning entry (GROUP_GROUP, GROUP_GLYPH, etc.).
+    '''
+    return 2 * (left not in groupNames) + (right not in groupNames)
+
+
+def classifyKerning(kerning, groupNames):
+    '''
+    Sort kerning entries into lists of (left, right, value) tuples, one per
+    kind of pair (index with GROUP_GROUP, GROUP_GLYPH, etc.).
+    '''
+    ranked = ([], [], [], [])
+    for (left, right), value in kerning.items():
+        ranked[rankEntry(left, right, groupNames)].append((left, right, value))
+    return ranked
+
+
+def filterGroups(groups, names, glyphSubset=None):
+    '''
+    The groups referenced in the kerning, with members outside of the glyph
+    subset (if there is one) dropped.
+    '''
+    if glyphSubset is None:
+        return {name: groups[name] for name in names if name in groups}
+    return {
+        name: [gName for gName in groups[name] if gName in glyphSubset]
+        for name in names if name in groups}
+
+
+def makeExpander(groups, glyphSubset=None):
+    '''
+    Function returning the glyphs a kerning key side expands to.
+    '''
+    def expand(name):
+        glyphs = groups.get(name)
+        if glyphs is not None:
+            return glyphs
+        if glyphSubset is not None and name not in glyphSubset:
+            return ()
+        return (name,)
+    return expand
+
+
+def writePairs(flatPairs, entries, expand):
+    '''
+    Expand kerning entries into flat pairs, overwriting existing values.
+    '''
+    for left, right, value in entries:
+        flatPairs.update(zip(
+            itertools.product(expand(left), expand(right)),
+            itertools.repeat(value)))
+
+
+def writeSinglePairs(flatPairs, entries, glyphSubset=None):
+    for left, right, value in entries:
+        if glyphSubset is not None and not (
+            left in glyphSubset and right in glyphSubset
+        ):
+            continue
+        flatPairs[(left, right)] = value
+
+
+def expandEntry(left, right, rank, expand, glyphSubset=None):
+    '''
+    The flat pairs a single kerning entry applies to, as written by
+    writePairs (or writeSinglePairs, for glyph-to-glyph entries).
+    '''
+    if rank != GLYPH_GLYPH:
+        return itertools.product(expand(left), expand(right))
+    if glyphSubset is not None and not (
+        left in glyphSubset and right in glyphSubset
+    ):
+        return ()
+    return ((left, right),)
+
+
+def dropZeros(flatPairs):
+    '''
+    Delete pairs with a value of zero, in place. This cannot be done while
+    flattening, since exceptions might set a class pair to 0.
+    '''
+    zeroPairs = [pair for pair, value in flatPairs.items() if value == 0]
+    for pair in zeroPairs:
+        del flatPairs[pair]
+    return flatPairs
+
+
+class KerningFlattener(object):
+    '''
+    Groups and kerning, classified once; flat pairs of each kind of pair,
+    or of all kinds together.
+    '''
+
+    def __init__(self, groups, kerning, group_indicator, glyphSubset=None):
+        self.glyphSubset = glyphSubset
+        names = set(itertools.chain.from_iterable(kerning))
+        self.groupNames = findGroupNames(names, group_indicator)
+        self.groups = filterGroups(groups, names, glyphSubset)
+        self.ranked = classifyKerning(kerning, self.groupNames)
+        self.expand = makeExpander(self.groups, glyphSubset)
+
+    def pairs(self, rank):
+        '''
+        Flat pairs of one kind of kerning entry.
+        '''
+        flatPairs = {}
+        if rank == GLYPH_GLYPH:
+            writeSinglePairs(flatPairs, self.ranked[rank], self.glyphSubset)
+        else:
+            writePairs(flatPairs, self.ranked[rank], self.expand)
+        return flatPairs
+
+    def flatten(self, includeZero=False):
+        '''
+        All flat pairs, with exceptions taking precedence.
+        '''
+        flatPairs = {}
+        for rank in (GROUP_GROUP, GROUP_GLYPH, GLYPH_GROUP):
+            writePairs(flatPairs, self.ranked[rank], self.expand)
+        writeSinglePairs(flatPairs, self.ranked[GLYPH_GLYPH], self.glyphSubset)
+        if not includeZero:
+            dropZeros(flatPairs)
+        return flatPairs
+
+    def iterRows(self, includeZero=False):
+        '''
+        The same flat pairs as flatten(), one left glyph at a time: yields
+        (left glyph, {right glyph: value}). The kerning entries covering a
+        left glyph are applied in the order of flatten(), so the values are
+        the same; only one row is kept in memory at a time.
+        '''
+        # kerning entries by left key, with their position in flatten()
+        entriesByLeft = {}
+        for rank, entries in enumerate(self.ranked):
+            for index, (left, right, value) in enumerate(entries):
+                entriesByLeft.setdefault(left, []).append(
+                    ((rank, index), right, value))
+
+        # left keys covering each left glyph; glyph-to-glyph entries cover
+        # their left glyph only, the other entries the glyphs it expands to
+        leftKeys = {}
+        for left, entries in entriesByLeft.items():
+            for isSingle in (False, True):
+                if not any(
+                    (position[0] == GLYPH_GLYPH) == isSingle for
+                    position, _, _ in entries
+                ):
+                    continue
+                if not isSingle:
+                    glyphs = self.expand(left)
+                elif self.glyphSubset is None or left in self.glyphSubset:
+                    glyphs = (left,)
+                else:
+                    glyphs = ()
+                for gName in glyphs:
+                    leftKeys.setdefault(gName, {})[(left, isSingle)] = None
+
+        for gName, keys in leftKeys.items():
+            entries = sorted(
+                entry for left, isSingle in keys for
+                entry in entriesByLeft[left] if
+                (entry[0][0] == GLYPH_GLYPH) == isSingle)
+            row = {}
+            for position, right, value in entries:
+                if position[0] != GLYPH_GLYPH:
+                    row.update(zip(
+                        self.expand(right), itertools.repeat(value)))
+                elif self.glyphSubset is None or right in self.glyphSubset:
+                    row[right] = value
+            if not includeZero:
+                row = {right: value for right, value in row.items() if value}
+            if row:
+                yield gName, row
+
+    def iterPairs(self, includeZero=False):
+        '''
+        The same flat pairs as flatten(), as ((left, right), value) tuples,
+        without collecting all of them in a dictionary.
+        '''
+        for left, row in self.iterRows(includeZero):
+            for right, value in row.items():
+                yield (left, right), value
+
+
+def flattenKerning(
+    groups, kerning, group_indicator='public.', includeZero=False,
+    glyphSubset=None
+):
+    return KerningFlattener(
+        groups, kerning, group_indicator, glyphSubset).flatten(includeZero)
@@ -8,9 +8,9 @@ class KernInfoWindow(object):
 
     def __init__(self):
         self.f = CurrentFont()
-        self.u = getKerningPairsFromUFO.UFOkernReader(self.f)
-        self.absKerning = int(self.u.absoluteKerning)
-        self.amountOfPairs = len(self.u.allKerningPairs)
+        # kept up to date while the kerning and groups are edited
+        self.stats = getKerningPairsFromUFO.KerningStatistics.fromFont(
+            self.f.naked())
 
         self.textString = (
             'The font has %s flat kerning pairs.\n'
@@ -60,8 +60,24 @@ class KernInfoWindow(object):
             "Copy kerning pairs to clipboard",
             callback=self.button)
 
+        self.w.bind('close', self.windowClosed)
+        self.stats.observe(self.f.naked(), callback=self.kerningChanged)
         self.w.open()
 
+    @property
+    def absKerning(self):
+        return int(self.stats.absoluteKerning)
+
+    @property
+    def amountOfPairs(self):
+        return self.stats.amountOfPairs
+
+    def kerningChanged(self, stats):
+        self.parametersChanged()
+
+    def windowClosed(self, sender):
+        self.stats.stopObserving()
+
     def convertToImperial(self, number):
         remainderList = []
 
@@ -204,7 +220,7 @@ class KernInfoWindow(object):
 
     def button(self, sender=None):
 
-        output = '\n'.join(self.u.output)
+        output = '\n'.join(self.stats.output)
         scrap = os.popen('pbcopy', 'w')
         scrap.write(output)
         scrap.close()
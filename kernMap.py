@@ -3,7 +3,7 @@ Simple map to illustrate kerning topography.
 
 By default, the output is an interactive html `canvas`, for exploration of the
 kerning map. Use `pixel` or `svg` formats to obtain a fingerprint of the
-kerning data.
+kerning data, or `overview` for a map of the kerning between blocks of glyphs.
 
 An optional glyph list can be supplied (one glyph name per line), which will
 influence the size of the kerning map, and override the built-in glyph order.
@@ -12,15 +12,21 @@ influence the size of the kerning map, and override the built-in glyph order.
 
 
 import argparse
+import base64
 import colorsys
+import json
+import math
+import os
 
-from defcon import Font
-from fontTools.ttLib import TTFont
+import numpy as np
 from pathlib import Path
 from string import Template
-from PIL import Image, ImageDraw
 
-from dumpkerning import extractKerning
+from dumpkerning import (
+    MASTER_SOURCES, extractKerning, glyphsForUnicodes, parseUnicodes,
+    readMasterSource)
+
+TEMPLATE_DIR = Path(__file__).parent / 'kernMap templates'
 
 
 def get_args():
@@ -36,7 +42,7 @@ def get_args():
     parser.add_argument(
         '-f', '--format',
         help='output format',
-        choices=['canvas', 'pixel', 'svg'],
+        choices=['canvas', 'pixel', 'svg', 'tiles', 'overview'],
         default='canvas',
         action='store',
     )
@@ -53,6 +59,42 @@ def get_args():
         default=False,
         action='store',
     )
+    parser.add_argument(
+        '-s', '--color_steps',
+        help='number of color steps per kerning sign in svg output '
+             '(0 for exact colors)',
+        default=16,
+        action='store',
+        type=int,
+    )
+    parser.add_argument(
+        '-a', '--aggregate',
+        help='aggregation of kerning values in zoomed-out tiles, '
+             'or overview blocks',
+        choices=['max', 'mean', 'count'],
+        default='max',
+        action='store',
+    )
+    parser.add_argument(
+        '-b', '--blocks',
+        help='blocks of the overview: number of glyphs per block, '
+             '"unicode" (Unicode blocks), or "sections" (sections of the '
+             'glyph list, started by # comment lines)',
+        default='unicode',
+        action='store',
+    )
+    parser.add_argument(
+        '-d', '--diff',
+        help='compare to the kerning of another file, and map the changes',
+        default=None,
+        action='store',
+    )
+    parser.add_argument(
+        '-u', '--unicodes',
+        help='only map glyphs for these code points (e.g. 0020-007E,00C4)',
+        default=None,
+        action='store',
+    )
     return parser.parse_args()
 
 
@@ -102,11 +144,15 @@ def get_glyph_order(input_path):
 
     '''
     if input_path.suffix == '.ufo':
+        from defcon import Font
         f = Font(input_path)
         return f.glyphOrder
     elif input_path.suffix in ['.otf', '.ttf']:
+        from fontTools.ttLib import TTFont
         f = TTFont(input_path)
         return f.getGlyphOrder()
+    elif input_path.suffix in MASTER_SOURCES:
+        return readMasterSource(input_path).glyphOrder
     else:
         # fea files don’t imply a glyph order, so this is just sorting all the
         # used glyphs alphabetically
@@ -117,25 +163,806 @@ def get_glyph_order(input_path):
         return sorted(all_glyphs)
 
 
-def read_glyph_list(glyph_list_file):
+def glyph_indexes(glyph_order):
+    '''
+    map each glyph name to its position(s) on the map
+    '''
+    indexes = {}
+    for index, g_name in enumerate(glyph_order):
+        indexes.setdefault(g_name, []).append(index)
+    return indexes
+
+
+def make_value_codes(glyph_order, all_kerned_pairs):
+    '''
+    Positions of all kerned pairs on the map, sorted by right glyph.
+    Returns the sorted unique kerning values, and arrays of left index,
+    right index, and value code (index into the unique values).
+    '''
+    indexes = glyph_indexes(glyph_order)
+    if len(indexes) == len(glyph_order):
+        # every glyph is on the map once: look up all pairs in bulk
+        index = {g_name: i for i, g_name in enumerate(glyph_order)}.get
+        num_pairs = len(all_kerned_pairs)
+        lefts = np.fromiter(
+            (index(left, -1) for left, _ in all_kerned_pairs),
+            dtype=np.int64, count=num_pairs)
+        rights = np.fromiter(
+            (index(right, -1) for _, right in all_kerned_pairs),
+            dtype=np.int64, count=num_pairs)
+        on_map = (lefts >= 0) & (rights >= 0)
+        lefts, rights = lefts[on_map], rights[on_map]
+        values = np.array(list(all_kerned_pairs.values()))[on_map]
+    else:
+        lefts, rights, values = [], [], []
+        for (left, right), value in all_kerned_pairs.items():
+            for left_index in indexes.get(left, ()):
+                for right_index in indexes.get(right, ()):
+                    lefts.append(left_index)
+                    rights.append(right_index)
+                    values.append(value)
+        lefts = np.array(lefts, dtype=np.int64)
+        rights = np.array(rights, dtype=np.int64)
+        values = np.array(values)
+
+    unique_values, value_codes = np.unique(values, return_inverse=True)
+    dtype = np.int16 if len(unique_values) < 2 ** 15 else np.int32
+    order = np.argsort(rights, kind='stable')
+    return (
+        unique_values, lefts[order], rights[order],
+        value_codes.reshape(-1).astype(dtype)[order])
+
+
+def make_palette(unique_values, k_min, k_max):
+    '''
+    RGB colors for all unique kerning values, plus white (as the last
+    entry) for pairs which are not kerned.
+    '''
+    palette = np.full((len(unique_values) + 1, 3), 255, dtype=np.uint8)
+    for code, value in enumerate(unique_values.tolist()):
+        hex_color = kern_color(value, k_min, k_max, hex_values=True)
+        palette[code] = [int(hex_color[i:i + 2], 16) for i in (1, 3, 5)]
+    return palette
+
+
+def first_kerned(*grids):
+    '''
+    element-wise, the first code which is not -1
+    '''
+    result = grids[0]
+    for grid in grids[1:]:
+        result = np.where(result < 0, grid, result)
+    return result
+
+
+def make_pixel_map(
+    glyph_order, all_kerned_pairs, cell_size, k_min, k_max, band_height=1024
+):
+    '''
+    Render the kerning map as an image, with the left glyph on the x axis.
+
+    Every kerned pair is a (cell_size + 1)-pixel square -- the edges overlap
+    the next cells -- where cells drawn later cover earlier ones, in the order
+    of the glyph list. Therefore, the first pixel column of a cell shows the
+    cell to its left if the cell itself is not kerned, the first pixel row
+    shows the cell above, and the corner pixel the first kerned of the cell,
+    the cell above, the cell to the left, and the cell above left.
+
+    The image is built in horizontal bands, so only a band of the grid of
+    value codes (and of the pixels) needs to be in memory at a time.
+    '''
+    unique_values, lefts, rights, codes = make_value_codes(
+        glyph_order, all_kerned_pairs)
+    palette = make_palette(unique_values, k_min, k_max)
+    return render_pixel_map(
+        len(glyph_order), lefts, rights, codes, palette, cell_size,
+        band_height)
+
+
+def render_pixel_map(
+    num_glyphs, lefts, rights, codes, palette, cell_size, band_height=1024
+):
+    '''
+    Draw the cells of a pixel map (see make_pixel_map) band by band. The
+    cells are given as arrays of left index, right index (sorted), and code
+    (index into the palette, whose last entry is used for empty cells).
+    '''
+    size_in_px = num_glyphs * cell_size
+    band_cells = max(1, band_height // cell_size)
+    from PIL import Image
+    img = Image.new('RGB', (size_in_px, size_in_px))
+
+    for first in range(0, num_glyphs, band_cells):
+        last = min(first + band_cells, num_glyphs)
+        # rows are right glyphs (first - 1 ... last - 1), columns left glyphs
+        grid = np.full((last - first + 1, num_glyphs), -1, dtype=codes.dtype)
+        start, stop = np.searchsorted(rights, [first - 1, last])
+        grid[rights[start:stop] - first + 1, lefts[start:stop]] = (
+            codes[start:stop])
+
+        here = grid[1:]
+        above = grid[:-1]
+        left = np.full_like(here, -1)
+        left[:, 1:] = here[:, :-1]
+        above_left = np.full_like(here, -1)
+        above_left[:, 1:] = above[:, :-1]
+
+        inner_rows = np.repeat(here, cell_size, axis=1)
+        inner_rows[:, ::cell_size] = first_kerned(here, left)
+        edge_rows = np.repeat(first_kerned(here, above), cell_size, axis=1)
+        edge_rows[:, ::cell_size] = first_kerned(
+            here, above, left, above_left)
+
+        band = np.empty(
+            (last - first, cell_size, size_in_px), dtype=codes.dtype)
+        band[:, 0] = edge_rows
+        band[:, 1:] = inner_rows[:, np.newaxis]
+        pixels = palette[band.reshape(-1, size_in_px)]
+        img.paste(Image.fromarray(pixels, 'RGB'), (0, first * cell_size))
+
+    return img
+
+
+def encode_array(values, dtype):
+    '''
+    base64-encoded little-endian binary data, for JavaScript typed arrays
+    '''
+    data = np.asarray(values).astype(np.dtype(dtype).newbyteorder('<'))
+    return base64.b64encode(data.tobytes()).decode('ascii')
+
+
+def make_canvas_html(basename, glyph_order, all_kerned_pairs, cell_size):
+    '''
+    The kerning is embedded as three typed arrays (left glyph index, right
+    glyph index, value), which are drawn in a single pass client-side.
+    '''
+    unique_values, lefts, rights, codes = make_value_codes(
+        glyph_order, all_kerned_pairs)
+    values = unique_values[codes] if len(codes) else np.zeros(0)
+    if np.any(values != np.round(values)):
+        value_type, value_dtype = 'Float32Array', np.float32
+    elif len(values) and np.abs(values).max() >= 2 ** 15:
+        value_type, value_dtype = 'Int32Array', np.int32
+    else:
+        value_type, value_dtype = 'Int16Array', np.int16
+
+    with open(TEMPLATE_DIR / 'canvas_prologue.html', 'r') as html_pro:
+        canvas_prologue = Template(html_pro.read())
+    with open(TEMPLATE_DIR / 'canvas_epilogue.html', 'r') as html_epi:
+        canvas_epilogue = html_epi.read()
+
+    header_content = {
+        'base_name': basename,
+        'glyph_order': ' '.join(glyph_order),
+        'cell_size': cell_size,
+        'lefts': encode_array(lefts, np.int32),
+        'rights': encode_array(rights, np.int32),
+        'values': encode_array(values, value_dtype),
+        'value_type': value_type,
+    }
+    return canvas_prologue.safe_substitute(header_content) + canvas_epilogue
+
+
+def quantize_colors(unique_values, k_min, k_max, steps):
+    '''
+    Hex colors for all unique kerning values. With steps, the kerning
+    intensity is rounded to that many steps (on either side of zero) first,
+    so similar values share a color.
+    '''
+    colors = []
+    for value in unique_values.tolist():
+        if steps and value < 0:
+            value = round(value / k_min * steps) / steps * k_min
+        elif steps and value > 0:
+            value = round(value / k_max * steps) / steps * k_max
+        colors.append(kern_color(value, k_min, k_max, hex_values=True))
+    return colors
+
+
+def write_svg_map(
+    output_path, glyph_order, all_kerned_pairs, cell_size, k_min, k_max,
+    color_steps=16, chunk_size=10000
+):
+    '''
+    Write the kerning map as SVG, with one path element per color. Horizontal
+    runs of neighboring cells of the same color are merged into a single
+    rectangle. The file is written in chunks, rather than assembled in
+    memory. Returns the number of path elements, and the file size.
+    '''
+    unique_values, lefts, rights, codes = make_value_codes(
+        glyph_order, all_kerned_pairs)
+    colors = quantize_colors(unique_values, k_min, k_max, color_steps)
+    color_names = sorted(set(colors))
+    buckets = np.array(
+        [color_names.index(color) for color in colors], dtype=np.int32)
+    cell_buckets = buckets[codes]
+
+    # cells sorted by color, then row (right glyph), then column (left glyph)
+    order = np.lexsort((lefts, rights, cell_buckets))
+    lefts, rights, cell_buckets = (
+        lefts[order], rights[order], cell_buckets[order])
+    run_starts = np.ones(len(lefts), dtype=bool)
+    run_starts[1:] = (
+        (cell_buckets[1:] != cell_buckets[:-1]) |
+        (rights[1:] != rights[:-1]) |
+        (lefts[1:] != lefts[:-1] + 1))
+    starts = np.flatnonzero(run_starts)
+    lengths = np.diff(np.append(starts, len(lefts)))
+    run_xs = (lefts[starts] * cell_size).tolist()
+    run_ys = (rights[starts] * cell_size).tolist()
+    run_widths = (lengths * cell_size).tolist()
+    run_buckets = cell_buckets[starts]
+    bucket_bounds = np.searchsorted(
+        run_buckets, np.arange(len(color_names) + 1))
+
+    size_in_px = len(glyph_order) * cell_size
+    element_count = 0
+    with open(output_path, 'w') as svg:
+        svg.write(
+            f'<svg version="1.1" width="{size_in_px}" '
+            f'height="{size_in_px}" xmlns="http://www.w3.org/2000/svg">\n')
+        for bucket, color in enumerate(color_names):
+            first, last = bucket_bounds[bucket], bucket_bounds[bucket + 1]
+            if first == last:
+                continue
+            svg.write(f'<path fill="{color}" d="')
+            for chunk in range(first, last, chunk_size):
+                svg.write(''.join(
+                    f'M{x} {y}h{w}v{cell_size}h-{w}z' for x, y, w in zip(
+                        run_xs[chunk:min(chunk + chunk_size, last)],
+                        run_ys[chunk:min(chunk + chunk_size, last)],
+                        run_widths[chunk:min(chunk + chunk_size, last)])))
+            svg.write('"/>\n')
+            element_count += 1
+        svg.write('</svg>\n')
+        file_size = svg.tell()
+    return element_count, file_size
+
+
+TILE_DTYPE = np.dtype([('left', '<i4'), ('right', '<i4'), ('value', '<f8')])
+
+# shared pair array and settings of a tile worker process
+tile_data = {}
+
+
+def init_tile_worker(shm_name, num_pairs, settings):
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    tile_data['shm'] = shm
+    tile_data['pairs'] = np.ndarray(
+        (num_pairs,), dtype=TILE_DTYPE, buffer=shm.buf)
+    tile_data.update(settings)
+
+
+def aggregate_blocks(flat_index, values, num_blocks, aggregate):
+    '''
+    Aggregate the values of all pairs in each block: the value with the
+    largest absolute value ('max'), the mean, or the number of pairs.
+    Returns the aggregates, and a mask of blocks which contain pairs.
+    '''
+    counts = np.bincount(flat_index, minlength=num_blocks)
+    if aggregate == 'count':
+        result = counts.astype(np.float64)
+    elif aggregate == 'mean':
+        sums = np.bincount(flat_index, weights=values, minlength=num_blocks)
+        result = sums / np.maximum(counts, 1)
+    else:
+        # sort by block, then absolute value; the last of each block wins
+        order = np.lexsort((np.abs(values), flat_index))
+        sorted_index = flat_index[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = sorted_index[1:] != sorted_index[:-1]
+        result = np.zeros(num_blocks)
+        result[sorted_index[last]] = values[order][last]
+    return result, counts > 0
+
+
+def tile_colors(aggregates, kerned, level):
+    '''
+    RGB pixels (one per block) for the aggregates of a tile
+    '''
+    pixels = np.full(aggregates.shape + (3,), 255, dtype=np.uint8)
+    if tile_data['aggregate'] == 'count':
+        max_count = 4 ** level
+        shade = np.log1p(aggregates[kerned]) / math.log1p(max_count)
+        pixels[kerned] = (255 - np.round(shade * 200)).astype(
+            np.uint8)[:, np.newaxis]
+    else:
+        # means are rounded, to keep the number of colors down
+        values = np.round(aggregates[kerned], 1)
+        unique_values, codes = np.unique(values, return_inverse=True)
+        palette = make_palette(
+            unique_values, tile_data['k_min'], tile_data['k_max'])
+        pixels[kerned] = palette[codes.reshape(-1)]
+    return pixels
+
+
+def render_tile_row(level, tile_y):
+    '''
+    Write all tiles of one row of a zoom level, skipping empty tiles.
+    Returns the number of tiles written.
+    '''
+    from PIL import Image
+    pairs = tile_data['pairs']
+    tile_cells = tile_data['tile_cells']
+    cell_size = tile_data['cell_size']
+    span = tile_cells << level
+    start, stop = np.searchsorted(
+        pairs['right'], [tile_y * span, (tile_y + 1) * span])
+    row = pairs[start:stop]
+    if not len(row):
+        return 0
+
+    block_x = row['left'] >> level
+    block_y = (row['right'] >> level) - tile_y * tile_cells
+    tile_x = block_x // tile_cells
+    block_x -= tile_x * tile_cells
+    order = np.argsort(tile_x, kind='stable')
+    tile_xs, starts = np.unique(tile_x[order], return_index=True)
+    bounds = np.append(starts, len(order))
+
+    level_dir = Path(tile_data['output_dir']) / str(level)
+    for i, x in enumerate(tile_xs.tolist()):
+        selection = order[bounds[i]:bounds[i + 1]]
+        flat_index = block_y[selection] * tile_cells + block_x[selection]
+        aggregates, kerned = aggregate_blocks(
+            flat_index, row['value'][selection], tile_cells ** 2,
+            tile_data['aggregate'])
+        pixels = tile_colors(aggregates, kerned, level).reshape(
+            tile_cells, tile_cells, 3)
+        pixels = np.repeat(np.repeat(pixels, cell_size, 0), cell_size, 1)
+        Image.fromarray(pixels, 'RGB').save(level_dir / f'{x}_{tile_y}.png')
+    return len(tile_xs)
+
+
+def write_tile_pyramid(
+    output_dir, glyph_order, all_kerned_pairs, cell_size, k_min, k_max,
+    aggregate='max', tile_size=256, workers=None
+):
+    '''
+    Write the kerning map as a pyramid of PNG tiles (tile_size pixels
+    square), with a static HTML viewer. At level 0, every block is one pair;
+    each level up, a block aggregates 2x2 blocks of the level below, until
+    the whole map fits into one tile.
+
+    The pairs are kept in one array in shared memory, from which rows of
+    tiles are rendered in a process pool. Returns the number of tiles.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    output_dir = Path(output_dir)
+    tile_cells = max(1, tile_size // cell_size)
+    num_glyphs = len(glyph_order)
+    levels = max(0, math.ceil(math.log2(max(num_glyphs / tile_cells, 1)))) + 1
+
+    unique_values, lefts, rights, codes = make_value_codes(
+        glyph_order, all_kerned_pairs)
+    num_pairs = len(codes)
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(1, num_pairs * TILE_DTYPE.itemsize))
+    try:
+        pairs = np.ndarray((num_pairs,), dtype=TILE_DTYPE, buffer=shm.buf)
+        pairs['left'] = lefts
+        pairs['right'] = rights
+        pairs['value'] = unique_values[codes] if num_pairs else []
+        # sorted by right glyph, then left glyph
+        pairs[:] = pairs[np.lexsort((lefts, rights))]
+        del pairs
+
+        for level in range(levels):
+            (output_dir / str(level)).mkdir(parents=True, exist_ok=True)
+        settings = {
+            'output_dir': str(output_dir), 'tile_cells': tile_cells,
+            'cell_size': cell_size, 'aggregate': aggregate,
+            'k_min': k_min, 'k_max': k_max}
+        jobs = [
+            (level, tile_y) for level in range(levels) for
+            tile_y in range(math.ceil(num_glyphs / (tile_cells << level)))]
+
+        if workers == 1:
+            init_tile_worker(shm.name, num_pairs, settings)
+            tile_count = sum(render_tile_row(*job) for job in jobs)
+            tile_data.clear()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                initializer=init_tile_worker,
+                initargs=(shm.name, num_pairs, settings)
+            ) as executor:
+                tile_count = sum(executor.map(
+                    render_tile_row, *zip(*jobs), chunksize=8))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    with open(TEMPLATE_DIR / 'tiles_viewer.html', 'r') as html_template:
+        viewer = Template(html_template.read())
+    metadata = {
+        'glyphs': glyph_order, 'levels': levels, 'tileSize': tile_size,
+        'tileCells': tile_cells, 'cellSize': cell_size,
+        'aggregate': aggregate}
+    with open(output_dir / 'index.html', 'w') as html:
+        html.write(viewer.safe_substitute(
+            base_name=output_dir.name, metadata=json.dumps(metadata)))
+    return tile_count
+
+
+def fixed_blocks(glyph_order, block_size):
+    '''
+    Consecutive blocks of block_size glyphs.
+    Returns the block index of each glyph, and the block labels.
+    '''
+    num_blocks = max(1, math.ceil(len(glyph_order) / block_size))
+    block_of_glyph = np.arange(len(glyph_order)) // block_size
+    labels = [
+        f'{glyph_order[i * block_size]}\u2026' for i in range(num_blocks) if
+        i * block_size < len(glyph_order)]
+    return block_of_glyph, labels
+
+
+def labeled_blocks(glyph_labels):
+    '''
+    Blocks from a label per glyph, in order of first appearance.
+    Returns the block index of each glyph, and the block labels.
+    '''
+    labels = list(dict.fromkeys(glyph_labels))
+    label_index = {label: i for i, label in enumerate(labels)}
+    block_of_glyph = np.array(
+        [label_index[label] for label in glyph_labels], dtype=np.int64)
+    return block_of_glyph, labels
+
+
+def glyph_code_points(input_path, glyph_order):
+    '''
+    Code point of each glyph (or None). Unencoded glyphs with a suffix
+    (A.sc, f_f) take the code point of the glyph name before the suffix.
+    '''
+    if input_path.suffix in ['.otf', '.ttf']:
+        from fontTools.ttLib import TTFont
+        cmap = TTFont(input_path).getBestCmap()
+    elif input_path.suffix == '.ufo':
+        from fontTools.ufoLib import UFOReader
+        cmap = {
+            uv: g_names[0] for uv, g_names in
+            UFOReader(input_path, validate=False).getCharacterMapping().items()
+        }
+    elif input_path.suffix in MASTER_SOURCES:
+        cmap = readMasterSource(input_path).cmap
+    else:
+        cmap = {}
+
+    from fontTools.agl import toUnicode
+    code_points = {}
+    for uv, g_name in sorted(cmap.items(), reverse=True):
+        code_points[g_name] = uv
+
+    def code_point(g_name):
+        if g_name in code_points:
+            return code_points[g_name]
+        base_name = g_name.split('.')[0].split('_')[0]
+        if base_name in code_points:
+            return code_points[base_name]
+        if not cmap:
+            uni_string = toUnicode(base_name)
+            if len(uni_string) == 1:
+                return ord(uni_string)
+        return None
+
+    return [code_point(g_name) for g_name in glyph_order]
+
+
+def unicode_blocks(input_path, glyph_order):
+    '''
+    Blocks by the Unicode block of each glyph.
+    Returns the block index of each glyph, and the block labels.
+    '''
+    from fontTools.unicodedata import block
+    glyph_labels = [
+        'unencoded' if uv is None else block(chr(uv)) for
+        uv in glyph_code_points(input_path, glyph_order)]
+    return labeled_blocks(glyph_labels)
+
+
+def section_blocks(glyph_list_file, glyph_order):
+    '''
+    Blocks by the sections of a glyph list, which start with a comment line
+    (# section name). Glyphs before the first section are in a block called
+    "other", just like glyphs which are not in the list.
+    '''
+    section = 'other'
+    glyph_sections = {}
     with open(glyph_list_file, 'r') as blob:
-        glyph_list = blob.read().splitlines()
-    return glyph_list
+        for line in blob.read().splitlines():
+            line = line.strip()
+            if line.startswith('#'):
+                section = line.lstrip('#').strip() or section
+            elif line:
+                glyph_sections.setdefault(line, section)
+    glyph_labels = [
+        glyph_sections.get(g_name, 'other') for g_name in glyph_order]
+    return labeled_blocks(glyph_labels)
 
 
-def make_kern_map(input_file, cell_size=5, glyph_list=None, format=None):
+def block_statistics(glyph_order, all_kerned_pairs, block_of_glyph, num_blocks):
+    '''
+    Pair count, smallest and largest value, and mean absolute value for
+    every pair of blocks (left block on the x axis). All arrays are of
+    shape (num_blocks, num_blocks); min, max and mean are NaN for blocks
+    without kerning.
+    '''
+    unique_values, lefts, rights, codes = make_value_codes(
+        glyph_order, all_kerned_pairs)
+    values = unique_values[codes].astype(np.float64) if len(codes) else (
+        np.zeros(0))
+    block_of_glyph = np.asarray(block_of_glyph, dtype=np.int64)
+    flat_index = block_of_glyph[rights] * num_blocks + block_of_glyph[lefts]
+    cells = num_blocks * num_blocks
 
-    input_path = Path(input_file)
-    kerning = extractKerning(input_path)
+    count = np.bincount(flat_index, minlength=cells)
+    abs_sum = np.bincount(flat_index, weights=np.abs(values), minlength=cells)
+    k_min = np.full(cells, np.inf)
+    k_max = np.full(cells, -np.inf)
+    np.minimum.at(k_min, flat_index, values)
+    np.maximum.at(k_max, flat_index, values)
+
+    kerned = count > 0
+    mean_abs = np.full(cells, np.nan)
+    mean_abs[kerned] = abs_sum[kerned] / count[kerned]
+    k_min[~kerned] = np.nan
+    k_max[~kerned] = np.nan
+    shape = num_blocks, num_blocks
+    return {
+        'count': count.reshape(shape),
+        'min': k_min.reshape(shape),
+        'max': k_max.reshape(shape),
+        'mean': mean_abs.reshape(shape),
+    }
+
+
+def overview_colors(stats, aggregate='count'):
+    '''
+    RGB pixels for the block statistics. Counts (log scale) and mean
+    absolute values are shown in shades of one color; the largest absolute
+    value keeps the kerning colors of the other maps.
+    '''
+    kerned = stats['count'] > 0
+    pixels = np.full(kerned.shape + (3,), 255, dtype=np.uint8)
+    if not kerned.any():
+        return pixels
+
+    if aggregate == 'max':
+        k_min = np.where(kerned, stats['min'], 0)
+        k_max = np.where(kerned, stats['max'], 0)
+        extreme = np.where(-k_min > k_max, k_min, k_max)
+        low, high = min(extreme.min(), -1), max(extreme.max(), 1)
+        unique_values, codes = np.unique(extreme, return_inverse=True)
+        palette = make_palette(unique_values, low, high)
+        pixels[kerned] = palette[codes.reshape(kerned.shape)][kerned]
+        return pixels
+
+    if aggregate == 'mean':
+        intensity = np.where(kerned, stats['mean'], 0)
+    else:
+        intensity = np.log1p(stats['count'])
+    intensity = intensity / max(intensity.max(), 1e-9)
+    # from a light to a dark blue
+    light = np.array([210, 225, 255])
+    dark = np.array([0, 40, 150])
+    shades = light + (dark - light) * intensity[..., np.newaxis]
+    pixels[kerned] = shades[kerned].round().astype(np.uint8)
+    return pixels
+
+
+def make_overview_map(stats, labels, cell_size=12, aggregate='count'):
+    '''
+    Heatmap of the block statistics, with block labels along the top (left
+    glyphs) and the left edge (right glyphs).
+    '''
+    from PIL import Image, ImageDraw, ImageFont
+
+    font = ImageFont.load_default()
+    measure = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    margin = 4 + math.ceil(max(
+        [measure.textlength(label, font=font) for label in labels] + [0]))
+    line_height = max(cell_size, 12)
+
+    pixels = overview_colors(stats, aggregate)
+    pixels = np.repeat(np.repeat(pixels, cell_size, 0), cell_size, 1)
+    map_size = len(labels) * cell_size
+
+    img = Image.new('RGB', (margin + map_size, margin + map_size), '#fff')
+    img.paste(Image.fromarray(pixels, 'RGB'), (margin, margin))
+
+    draw = ImageDraw.Draw(img)
+    # vertical labels are drawn horizontally, and rotated into place
+    top_labels = Image.new('RGB', (margin, map_size), '#fff')
+    draw_top = ImageDraw.Draw(top_labels)
+    for i, label in enumerate(labels):
+        y = margin + i * cell_size + cell_size / 2
+        # labels do not fit into cells smaller than the line height
+        if cell_size < line_height and i % math.ceil(
+            line_height / cell_size
+        ):
+            continue
+        draw.text((margin - 2, y), label, fill='#000', font=font, anchor='rm')
+        draw_top.text(
+            (2, y - margin), label, fill='#000', font=font, anchor='lm')
+    img.paste(top_labels.rotate(90, expand=True), (margin, 0))
+    return img
+
+
+def make_overview(
+    input_path, glyph_order, all_kerned_pairs, blocks='unicode',
+    glyph_list=None, cell_size=12, aggregate='count'
+):
+    '''
+    Bin the glyph order into blocks, and map the kerning between blocks.
+    Blocks are either a fixed number of glyphs (an integer), Unicode blocks
+    ("unicode"), or sections of the glyph list ("sections").
+    Returns the image, the block statistics and the block labels.
+    '''
+    if str(blocks).isdigit():
+        block_of_glyph, labels = fixed_blocks(glyph_order, int(blocks))
+    elif blocks == 'sections':
+        if not glyph_list:
+            raise ValueError('blocks by sections need a glyph list (-g)')
+        block_of_glyph, labels = section_blocks(glyph_list, glyph_order)
+    elif blocks == 'unicode':
+        block_of_glyph, labels = unicode_blocks(input_path, glyph_order)
+    else:
+        raise ValueError(f'unknown kind of blocks: {blocks}')
+
+    stats = block_statistics(
+        glyph_order, all_kerned_pairs, block_of_glyph, len(labels))
+    img = make_overview_map(stats, labels, cell_size, aggregate)
+    return img, stats, labels
 
+
+# added, removed, increased, decreased, unchanged
+DIFF_CATEGORIES = ['added', 'removed', 'increased', 'decreased', 'unchanged']
+DIFF_COLORS = ['#00b000', '#e00000', '#0060ff', '#ff9000', '#e8e8e8']
+
+
+def pair_keys(glyph_order, all_kerned_pairs):
+    '''
+    sorted flat cell indexes (left * number of glyphs + right) and values
+    of all pairs on the map
+    '''
+    unique_values, lefts, rights, codes = make_value_codes(
+        glyph_order, all_kerned_pairs)
+    keys = lefts * len(glyph_order) + rights
+    order = np.argsort(keys)
+    values = unique_values[codes[order]] if len(codes) else np.zeros(0)
+    return keys[order], values
+
+
+def diff_cells(glyph_order, kerning_a, kerning_b):
+    '''
+    Compare two kerning dictionaries on the same glyph order.
+    Returns flat cell indexes, and the category (index into
+    DIFF_CATEGORIES) of each cell.
+    '''
+    keys_a, values_a = pair_keys(glyph_order, kerning_a)
+    keys_b, values_b = pair_keys(glyph_order, kerning_b)
+    common, index_a, index_b = np.intersect1d(
+        keys_a, keys_b, assume_unique=True, return_indices=True)
+    removed = np.setdiff1d(keys_a, common, assume_unique=True)
+    added = np.setdiff1d(keys_b, common, assume_unique=True)
+
+    delta = values_b[index_b] - values_a[index_a]
+    common_categories = np.select(
+        [delta > 0, delta < 0], [2, 3], default=4)
+
+    cells = np.concatenate([added, removed, common])
+    categories = np.concatenate([
+        np.zeros(len(added), dtype=np.uint8),
+        np.ones(len(removed), dtype=np.uint8),
+        common_categories.astype(np.uint8)])
+    return cells, categories
+
+
+def make_diff_map(
+    glyph_order, kerning_a, kerning_b, cell_size, band_height=1024
+):
+    '''
+    Render the difference of two kerning dictionaries as an image (left
+    glyph on the x axis), with one color per category of change. Cells are
+    drawn like those of the pixel map, in bands.
+    Returns the image, and a dictionary of counts per category.
+    '''
+    num_glyphs = len(glyph_order)
+    cells, categories = diff_cells(glyph_order, kerning_a, kerning_b)
+
+    # flat cell indexes are (left, right); bands are rows of right glyphs
+    lefts, rights = np.divmod(cells, num_glyphs)
+    order = np.argsort(rights, kind='stable')
+    # white (the last palette entry) for unkerned cells
+    palette = np.array(
+        [[int(hex_color[i:i + 2], 16) for i in (1, 3, 5)] for
+         hex_color in DIFF_COLORS + ['#ffffff']], dtype=np.uint8)
+    img = render_pixel_map(
+        num_glyphs, lefts[order], rights[order],
+        categories.astype(np.int8)[order], palette, cell_size, band_height)
+
+    counts = np.bincount(categories, minlength=len(DIFF_CATEGORIES))
+    return img, dict(zip(DIFF_CATEGORIES, counts.tolist()))
+
+
+def read_glyph_list(glyph_list_file):
+    '''
+    glyph names, one per line; empty lines and comments (section names)
+    are skipped
+    '''
+    with open(glyph_list_file, 'r') as blob:
+        glyph_list = [
+            line.strip() for line in blob.read().splitlines() if
+            line.strip() and not line.strip().startswith('#')]
+    return glyph_list
+
+
+def map_glyph_order(input_path, glyph_list=None, unicodes=None):
     if glyph_list:
         glyph_order = read_glyph_list(glyph_list)
-        all_kerned_pairs = {
-            pair: value for pair, value in kerning.items() if
-            set(pair) < set(glyph_order)}
     else:
         glyph_order = get_glyph_order(input_path)
-        all_kerned_pairs = kerning
+
+    if unicodes:
+        mapped_glyphs = glyphsForUnicodes(input_path, parseUnicodes(unicodes))
+        glyph_order = [
+            g_name for g_name in glyph_order if g_name in mapped_glyphs]
+    return glyph_order
+
+
+def map_kerning(input_path, glyph_order, subset=False):
+    if subset:
+        # only the glyphs on the map are expanded from kerning classes
+        return extractKerning(input_path, glyphSubset=glyph_order)
+    return extractKerning(input_path)
+
+
+def make_diff(
+    input_file, other_file, cell_size=5, glyph_list=None, unicodes=None
+):
+    '''
+    Kerning map of the changes from input_file to other_file. Without a
+    glyph list, glyphs only found in the other file are added to the end of
+    the glyph order of the input file.
+    '''
+    input_path = Path(input_file)
+    other_path = Path(other_file)
+    glyph_order = map_glyph_order(input_path, glyph_list, unicodes)
+    if not glyph_list:
+        known_glyphs = set(glyph_order)
+        glyph_order = glyph_order + [
+            g_name for g_name in
+            map_glyph_order(other_path, None, unicodes) if
+            g_name not in known_glyphs]
+
+    subset = bool(glyph_list or unicodes)
+    kerning_a = map_kerning(input_path, glyph_order, subset)
+    kerning_b = map_kerning(other_path, glyph_order, subset)
+    img, counts = make_diff_map(glyph_order, kerning_a, kerning_b, cell_size)
+
+    output_path = Path(
+        f'~/Desktop/{input_path.stem}_vs_{other_path.stem}_kerndiff.png'
+    ).expanduser()
+    print(output_path)
+    img.save(output_path)
+    for category, hex_color in zip(DIFF_CATEGORIES, DIFF_COLORS):
+        print(f'{category:>10}: {counts[category]:8d}  ({hex_color})')
+    return counts
+
+
+def make_kern_map(
+    input_file, cell_size=5, glyph_list=None, format=None, unicodes=None,
+    color_steps=16, aggregate='max', blocks='unicode'
+):
+
+    input_path = Path(input_file)
+    glyph_order = map_glyph_order(input_path, glyph_list, unicodes)
+    all_kerned_pairs = map_kerning(
+        input_path, glyph_order, bool(glyph_list or unicodes))
 
     basename = input_path.stem
     kern_values = list(all_kerned_pairs.values())
@@ -144,19 +971,8 @@ def make_kern_map(input_file, cell_size=5, glyph_list=None, format=None):
 
     if format == 'pixel':
 
-        size_in_px = len(glyph_order) * cell_size
-        img = Image.new('RGB', (size_in_px, size_in_px), '#fff')
-
-        for row_index, g_name_a in enumerate(glyph_order):
-            for col_index, g_name_b in enumerate(glyph_order):
-                kv = all_kerned_pairs.get((g_name_a, g_name_b), None)
-                x = row_index * cell_size
-                y = col_index * cell_size
-                rect = [(x, y), (x + cell_size, y + cell_size)]
-                if kv is not None:
-                    kc = kern_color(kv, k_min, k_max, hex_values=True)
-                    img_dummy = ImageDraw.Draw(img)
-                    img_dummy.rectangle(rect, fill=kc)
+        img = make_pixel_map(
+            glyph_order, all_kerned_pairs, cell_size, k_min, k_max)
 
         output_path = Path(f'~/Desktop/{basename}_kernmap.png').expanduser()
         print(output_path)
@@ -171,98 +987,56 @@ def make_kern_map(input_file, cell_size=5, glyph_list=None, format=None):
         if canvas_area > 128 ** 4:
             print(
                 'The canvas is too large and may not render.\n'
-                'Try decreasing the cell size (option -c).'
+                'Try decreasing the cell size (option -c), '
+                'or use tiles (-f tiles).'
             )
 
-        with open('kernMap templates/canvas_prologue.html', 'r') as html_pro:
-            canvas_prologue = Template(html_pro.read())
-        with open('kernMap templates/canvas_epilogue.html', 'r') as html_epi:
-            canvas_epilogue = html_epi.read()
-        canvas = []
-
-        sorted_pairs = sorted(
-            all_kerned_pairs.keys(),
-            key=lambda x: (glyph_order.index(x[0]), glyph_order.index(x[1])))
-        neg_kerned_pairs = [
-            p for p in sorted_pairs if all_kerned_pairs.get(p) <= 0]
-        pos_kerned_pairs = [
-            p for p in sorted_pairs if all_kerned_pairs.get(p) > 0]
-
-        canvas.append(
-            '                context.fillStyle = "#f00";')
-        for left, right in neg_kerned_pairs:
-            pair_index_l = glyph_order.index(left)
-            pair_index_r = glyph_order.index(right)
-            canvas.append(
-                '                context.fillRect('
-                f'{pair_index_l} * STEP, '
-                f'{pair_index_r} * STEP, STEP, STEP)')
-
-        canvas.append(
-            '                context.fillStyle = "#0f0";')
-        for left, right in pos_kerned_pairs:
-            pair_index_l = glyph_order.index(left)
-            pair_index_r = glyph_order.index(right)
-            canvas.append(
-                '                context.fillRect('
-                f'{pair_index_l} * STEP, '
-                f'{pair_index_r} * STEP, STEP, STEP)')
-
-        # XXX this is a bit janky (and writes a lot of data into the html) --
-        # but it works for now.
-        flat_kern_items = [
-            f'"{" ".join(p)}": {v},' for (p, v) in all_kerned_pairs.items()]
-
-        header_content = {
-            'base_name': basename,
-            'glyph_order': ' '.join(glyph_order),
-            'cell_size': cell_size,
-            'kerning_data': ' '.join(flat_kern_items),
-        }
-
-        full_html = (
-            canvas_prologue.safe_substitute(header_content) +
-            '\n'.join(canvas) +
-            canvas_epilogue
-        )
+        full_html = make_canvas_html(
+            basename, glyph_order, all_kerned_pairs, cell_size)
         output_path = Path(f'~/Desktop/{basename}_kernmap.html').expanduser()
         print(output_path)
         with open(output_path, 'w') as o:
             o.write(full_html)
+        print(f'{len(all_kerned_pairs)} pairs, {len(full_html)} bytes')
 
     elif format == 'svg':
-        rect_size = cell_size
-
-        svg_prologue = (
-            '<svg version="1.1" width="{0}" height="{0}" '
-            'xmlns="http://www.w3.org/2000/svg">\n'.format(
-                len(glyph_order) * rect_size)
-        )
-        svg_epilogue = (
-            '</svg>\n'
-        )
-        svg_path = (
-            '<path style="fill:{}" d="M{} {} H{} V{} H{} z"/>'
-        )
-
-        svg = []
-        for row_index, g_name_a in enumerate(glyph_order):
-            for col_index, g_name_b in enumerate(glyph_order):
-                x, y = row_index * rect_size, col_index * rect_size
-                # pair = f'{g_name_a} {g_name_b}'
-                kv = all_kerned_pairs.get((g_name_a, g_name_b), None)
-                if kv is not None:
-                    fill = kern_color(kv, k_min, k_max, hex_values=True)
-                    svg.append(svg_path.format(
-                        fill, x, y, x + rect_size, y + rect_size, x))
-
-        full_svg = svg_prologue + '\n'.join(svg) + svg_epilogue
         output_path = Path(f'~/Desktop/{basename}_kernmap.svg').expanduser()
         print(output_path)
-        with open(output_path, 'w') as o:
-            o.write(full_svg)
+        element_count, file_size = write_svg_map(
+            output_path, glyph_order, all_kerned_pairs, cell_size,
+            k_min, k_max, color_steps)
+        print(f'{element_count} path elements, {file_size} bytes')
+
+    elif format == 'tiles':
+        output_path = Path(f'~/Desktop/{basename}_kernmap_tiles').expanduser()
+        print(output_path)
+        tile_count = write_tile_pyramid(
+            output_path, glyph_order, all_kerned_pairs, cell_size,
+            k_min, k_max, aggregate)
+        print(f'{tile_count} tiles, viewer: {output_path / "index.html"}')
+
+    elif format == 'overview':
+        output_path = Path(
+            f'~/Desktop/{basename}_kernmap_overview.png').expanduser()
+        print(output_path)
+        # the cell size of the overview is the size of a block
+        img, stats, labels = make_overview(
+            input_path, glyph_order, all_kerned_pairs, blocks, glyph_list,
+            max(cell_size, 12), aggregate)
+        img.save(output_path)
+        kerned_blocks = int((stats['count'] > 0).sum())
+        print(
+            f'{len(labels)} blocks, {kerned_blocks} of {len(labels) ** 2} '
+            f'block pairs kerned')
 
 
 if __name__ == '__main__':
     args = get_args()
-    make_kern_map(args.input_file, args.cell_size, args.glyph_list, args.format)
+    if args.diff:
+        make_diff(
+            args.input_file, args.diff, args.cell_size, args.glyph_list,
+            args.unicodes)
+    else:
+        make_kern_map(
+            args.input_file, args.cell_size, args.glyph_list, args.format,
+            args.unicodes, args.color_steps, args.aggregate, args.blocks)
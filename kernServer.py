@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+'''
+Long-lived local service answering kerning queries, so tools looking up a
+handful of pairs do not pay for loading and flattening a font every time.
+
+Flat kerning of ufo, ttf, otf or fea sources is kept in memory in a LRU cache
+(bounded by an estimated memory ceiling). A source is reloaded when it has
+been modified since it was loaded.
+
+The service listens on localhost; queries are POSTed as JSON:
+
+/pairs   {"source": "font.otf", "pairs": [["T", "o"], ["V", "A"]]}
+         -> {"values": [-80, null]}
+/row     {"source": "font.otf", "glyph": "T"}
+         -> {"kerning": {"o": -80, ...}}  (T on the left)
+/column  {"source": "font.otf", "glyph": "o"}
+         -> {"kerning": {"T": -80, ...}}  (o on the right)
+/stats   {"source": "font.otf"}
+         -> {"pairs": 1234, "min": -120, "max": 40, ...}
+
+Glyphs and FontLab JSON sources are queried per master: with more than one
+master, the master name needs to be given ({"source": "font.glyphs",
+"master": "Bold", ...}). RTL kerning of Glyphs sources is queried with
+"rtl": true.
+
+usage:
+python kernServer.py --port 8765 --memory 2048
+
+'''
+
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from dumpkerning import (
+    MASTER_SOURCES, extractKerning, readMasterSource, sourceStamps)
+
+# rough estimate of the memory cost of one flat kerning pair (key tuple,
+# dict slot, and its share of the row and column indexes)
+BYTES_PER_PAIR = 400
+
+
+class MasterError(ValueError):
+    '''
+    The master asked for is not in the source, or a source with several
+    masters was asked for without naming one.
+    '''
+    pass
+
+
+class KerningEntry(object):
+    '''
+    Flat kerning of one source (or one master of a source), with row and
+    column indexes built on demand.
+    '''
+
+    def __init__(self, path, master=None, rtl=False):
+        self.path = path
+        self.master = master
+        self.rtl = rtl
+        self.stamps = sourceStamps(path)
+        self.kerning = self.load()
+        self.size = len(self.kerning) * BYTES_PER_PAIR
+        self._rows = None
+        self._columns = None
+
+    def load(self):
+        if self.path.suffix not in MASTER_SOURCES:
+            if self.master is not None or self.rtl:
+                raise MasterError(f'{self.path.name} has no masters')
+            return extractKerning(self.path)
+
+        reader = readMasterSource(self.path)
+        masterNames = [reader.masterNames[mID] for mID in reader.masterIDs]
+        if self.master is None and len(masterNames) == 1:
+            masterID = reader.masterIDs[0]
+        elif self.master in masterNames:
+            masterID = reader.masterIDs[masterNames.index(self.master)]
+        else:
+            raise MasterError(
+                f'{self.path.name} has no master {self.master!r}; '
+                f'masters: {", ".join(masterNames)}')
+        if not self.rtl:
+            return reader.masterKerning(masterID)
+        if not hasattr(reader, 'kerningRTL'):
+            raise MasterError(f'{self.path.name} has no RTL kerning')
+        return reader.masterKerning(masterID, rtl=True)
+
+    def isStale(self):
+        return sourceStamps(self.path) != self.stamps
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            rows = {}
+            for (left, right), value in self.kerning.items():
+                rows.setdefault(left, {})[right] = value
+            self._rows = rows
+        return self._rows
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            columns = {}
+            for (left, right), value in self.kerning.items():
+                columns.setdefault(right, {})[left] = value
+            self._columns = columns
+        return self._columns
+
+    def stats(self):
+        numbers = [
+            value for value in self.kerning.values() if
+            isinstance(value, (int, float))]
+        return {
+            'pairs': len(self.kerning),
+            'left_glyphs': len(self.rows),
+            'right_glyphs': len(self.columns),
+            'min': min(numbers, default=None),
+            'max': max(numbers, default=None),
+            'total': sum(numbers),
+            'absolute': sum(abs(value) for value in numbers),
+        }
+
+
+class KerningCache(object):
+    '''
+    LRU cache of KerningEntry objects, evicting the least recently used
+    entries once the estimated memory ceiling is exceeded. The most recently
+    used entry is always kept, even if it exceeds the ceiling on its own.
+
+    Sources are loaded outside of the cache lock, holding only a lock for
+    their key (path, master and direction): queries for other sources are
+    answered in the meantime, and concurrent queries for the same source
+    wait for a single load. The lock of a key is dropped with its entry.
+    '''
+
+    def __init__(self, max_bytes=1024 ** 3):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.pathLocks = {}
+        self.loads = 0
+
+    @property
+    def size(self):
+        return sum(entry.size for entry in self.entries.values())
+
+    def get(self, source, master=None, rtl=False):
+        path = Path(source).resolve()
+        key = path, master, rtl
+        with self.lock:
+            pathLock = self.pathLocks.setdefault(key, threading.Lock())
+
+        with pathLock:
+            # checked again once the lock is held, another thread may have
+            # (re)loaded the source in the meantime
+            with self.lock:
+                entry = self.entries.get(key)
+            if entry is None or entry.isStale():
+                try:
+                    entry = KerningEntry(path, master, rtl)
+                except Exception:
+                    with self.lock:
+                        if key not in self.entries:
+                            self.pathLocks.pop(key, None)
+                    raise
+                with self.lock:
+                    self.loads += 1
+                    self.entries[key] = entry
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                evicted, _ = self.entries.popitem(last=False)
+                self.pathLocks.pop(evicted, None)
+        return entry
+
+
+def query_pairs(entry, request):
+    kerning = entry.kerning
+    return {'values': [
+        kerning.get((left, right)) for left, right in request['pairs']]}
+
+
+def query_row(entry, request):
+    return {'kerning': entry.rows.get(request['glyph'], {})}
+
+
+def query_column(entry, request):
+    return {'kerning': entry.columns.get(request['glyph'], {})}
+
+
+def query_stats(entry, request):
+    return entry.stats()
+
+
+QUERIES = {
+    '/pairs': query_pairs,
+    '/row': query_row,
+    '/column': query_column,
+    '/stats': query_stats,
+}
+
+
+class KernRequestHandler(BaseHTTPRequestHandler):
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        query = QUERIES.get(self.path)
+        if query is None:
+            self.send_json(404, {'error': f'unknown query {self.path}'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            source = request['source']
+        except (KeyError, ValueError, TypeError) as error:
+            self.send_json(400, {'error': repr(error)})
+            return
+
+        try:
+            if not Path(source).exists():
+                self.send_json(404, {'error': f'no such source {source}'})
+                return
+            entry = self.server.cache.get(
+                source, request.get('master'), bool(request.get('rtl')))
+        except MasterError as error:
+            self.send_json(400, {'error': str(error)})
+            return
+        except Exception as error:
+            # any error of the readers (e.g. a malformed or half-saved file)
+            self.send_json(422, {
+                'error': f'could not read {source}: {error!r}'})
+            return
+
+        try:
+            self.send_json(200, query(entry, request))
+        except (KeyError, ValueError, TypeError) as error:
+            self.send_json(400, {'error': repr(error)})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(port=0, max_bytes=1024 ** 3, verbose=False):
+    '''
+    Create (but do not start) the service. With port 0, a free port is
+    picked; it can be found in server.server_address.
+    '''
+    server = ThreadingHTTPServer(('127.0.0.1', port), KernRequestHandler)
+    server.cache = KerningCache(max_bytes)
+    server.verbose = verbose
+    return server
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        '-p', '--port',
+        type=int,
+        default=8765,
+        help='port to listen on (localhost only)'
+    )
+    parser.add_argument(
+        '-m', '--memory',
+        type=int,
+        default=1024,
+        help='memory ceiling for cached kerning, in MB'
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='log every request'
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = get_args(args)
+    server = make_server(args.port, args.memory * 1024 ** 2, args.verbose)
+    host, port = server.server_address
+    print(f'serving kerning queries on http://{host}:{port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
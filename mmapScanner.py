@@ -0,0 +1,105 @@
+'''
+Base for scanners of bracketed text formats (OpenStep plists, JSON), which
+read a memory-mapped file front to back, and skip the values they do not
+need without building them.
+
+A scanner class names its bracket pairs (BRACKETS, such as b'(){}') and its
+string delimiter (QUOTE); the pattern for skipping bracketed values is made
+from these when the class is defined.
+
+'''
+
+import mmap
+import re
+import sys
+
+# where available, possessive quantifiers spare the regex engine the
+# bookkeeping for backtracking
+_REPEAT = rb'*+' if sys.version_info >= (3, 11) else rb'*'
+
+
+def skipPattern(brackets, quote=b'"'):
+    '''
+    Pattern matching text, strings, and brackets containing no more than two
+    levels of nested brackets (such as the nodes of paths), up to the next
+    bracket which is not matched. This skips most of a bracketed value in
+    one go.
+
+    The patterns are written as "unrolled loops" (text (special text)*),
+    which the regex engine matches without backtracking.
+    '''
+    opening = rb'[' + re.escape(brackets[0::2]) + rb']'
+    closing = rb'[' + re.escape(brackets[1::2]) + rb']'
+    quote = re.escape(quote)
+    text = rb'[^' + re.escape(brackets) + quote + rb']' + _REPEAT
+    plain = rb'[^' + quote + rb'\\]' + _REPEAT
+    string = quote + plain + rb'(?:\\.' + plain + rb')' + _REPEAT + quote
+    inner = (
+        opening + text + rb'(?:' + string + text + rb')' + _REPEAT + closing)
+    inner2 = (
+        opening + text + rb'(?:(?:' + string + rb'|' + inner + rb')' +
+        text + rb')' + _REPEAT + closing)
+    return re.compile(
+        text + rb'(?:(?:' + string + rb'|' + inner2 + rb')' + text + rb')' +
+        _REPEAT, re.DOTALL)
+
+
+class MappedScanner(object):
+    '''
+    Position in the data, and the helpers shared by all scanners. Subclasses
+    read scalars, and iterate over containers, in their own syntax.
+    '''
+
+    BRACKETS = b'[]{}'
+    QUOTE = b'"'
+    WHITESPACE = re.compile(rb'\s*')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.OPENING = cls.BRACKETS[0::2]
+        cls.SKIP = skipPattern(cls.BRACKETS, cls.QUOTE)
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def skipWhitespace(self):
+        self.pos = self.WHITESPACE.match(self.data, self.pos).end()
+
+    def peek(self):
+        self.skipWhitespace()
+        return self.data[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(
+                'expected %r at position %d, found %r' % (
+                    char, self.pos, self.data[self.pos:self.pos + 20]))
+        self.pos += 1
+
+    def skipBrackets(self):
+        '''
+        Skip a bracketed value; the position is at its opening bracket.
+        '''
+        data = self.data
+        skip = self.SKIP.match
+        opening = self.OPENING
+        self.pos += 1
+        depth = 1
+        while depth:
+            self.pos = skip(data, self.pos).end()
+            if data[self.pos] in opening:
+                depth += 1
+            else:
+                depth -= 1
+            self.pos += 1
+
+
+def openScanner(path, scannerClass):
+    with open(path, 'rb') as blob:
+        try:
+            data = mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            data = b''
+    return scannerClass(data)
@@ -16,17 +16,35 @@ setup(
     license="MIT License",
     platforms=["Any"],
     setup_requires=["setuptools_scm"],
-    python_requires=">=3.6",
+    python_requires=">=3.8",
     py_modules=[
         "getKerningPairsFromOTF",
         "getKerningPairsFromUFO",
         "getKerningPairsFromFEA",
+        "getKerningPairsFromGlyphs",
+        "getKerningPairsFromVFJ",
+        "mmapScanner",
+        "dumpKerningToSQLite",
+        "kernServer",
+        "compileKerningToGPOS",
+        "kernClasses",
+        "kernFlattening",
+        "kernFingerprint",
+        "kernDumpPipeline",
+        "flKerningData",
     ],
     entry_points={
         'console_scripts': [
             'dumpkerning=dumpkerning:main',
+            'dumpKerningToSQLite=dumpKerningToSQLite:main',
+            'kernServer=kernServer:main',
+            'compileKerningToGPOS=compileKerningToGPOS:main',
             'dumpKernFeatureFromOTF=dumpKernFeatureFromOTF:main',
             'convertKernedOTFtoKernedUFO=convertKernedOTFtoKernedUFO:main',
+            'flKerningData=flKerningData:main',
+            'getKerningPairsFromGlyphs=getKerningPairsFromGlyphs:main',
+            'getKerningPairsFromVFJ=getKerningPairsFromVFJ:main',
+            'kernFingerprint=kernFingerprint:main',
         ],
     },
     install_requires=["afdko"],
@@ -0,0 +1,91 @@
+import copy
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+from defcon import Font
+from fontTools import ttLib
+
+import compileKerningToGPOS as ckg
+from dumpkerning import extractKerning
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+OTF_FILE = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+UFO_FILE = ROUNDTRIP_DIR / 'ufo_kern_example.ufo'
+
+
+def make_target(tmp_path):
+    '''
+    Copy of the example font without any GPOS table.
+    '''
+    target = tmp_path / 'target.otf'
+    font = ttLib.TTFont(OTF_FILE)
+    del font['GPOS']
+    font.save(target)
+    return target
+
+
+def test_compile_from_otf(tmp_path):
+    output = tmp_path / 'output.otf'
+    ckg.compileKerning(OTF_FILE, make_target(tmp_path), output)
+    assert(extractKerning(output) == extractKerning(OTF_FILE))
+
+    # compiling over an existing kern feature replaces its lookups
+    ckg.compileKerning(OTF_FILE, output, output)
+    font = ttLib.TTFont(output)
+    assert(len(font['GPOS'].table.LookupList.Lookup) == 1)
+    assert(extractKerning(output) == extractKerning(OTF_FILE))
+
+
+def test_compile_from_ufo(tmp_path):
+    output = tmp_path / 'output.otf'
+    ckg.compileKerning(UFO_FILE, make_target(tmp_path), output)
+
+    glyph_order = set(ttLib.TTFont(OTF_FILE).getGlyphOrder())
+    ufo_kerning = {
+        pair: value for pair, value in extractKerning(UFO_FILE).items() if
+        value != 0 and set(pair) <= glyph_order}
+    assert(extractKerning(output) == ufo_kerning)
+
+
+def test_lookup_flags(tmp_path):
+    # source with two kern lookups, with different lookup flags
+    source = tmp_path / 'source.otf'
+    font = ttLib.TTFont(OTF_FILE)
+    table = font['GPOS'].table
+    lookup = table.LookupList.Lookup[0]
+    second = copy.deepcopy(lookup)
+    lookup.SubTable = lookup.SubTable[:1]
+    lookup.SubTableCount = 1
+    lookup.LookupFlag = 8  # IgnoreMarks
+    second.SubTable = second.SubTable[1:]
+    second.SubTableCount = 1
+    second.LookupFlag = 1  # RightToLeft
+    table.LookupList.Lookup.append(second)
+    table.LookupList.LookupCount = 2
+    table.FeatureList.FeatureRecord[0].Feature.LookupListIndex = [0, 1]
+    table.FeatureList.FeatureRecord[0].Feature.LookupCount = 2
+    font.save(source)
+
+    output = tmp_path / 'output.otf'
+    ckg.compileKerning(source, make_target(tmp_path), output)
+    lookups = ttLib.TTFont(output)['GPOS'].table.LookupList.Lookup
+    assert([lookup.LookupFlag for lookup in lookups] == [8, 1])
+    assert(extractKerning(output) == extractKerning(source))
+
+
+def test_float_values(tmp_path):
+    ufo = Font(UFO_FILE)
+    pair = next(
+        pair for pair in ufo.kerning.keys() if
+        not any(name.startswith('public.') for name in pair))
+    ufo.kerning[pair] = -12.6
+    source = tmp_path / 'float.ufo'
+    ufo.save(source)
+
+    output = tmp_path / 'output.otf'
+    ckg.compileKerning(source, make_target(tmp_path), output)
+    assert(extractKerning(output)[pair] == -13)
@@ -0,0 +1,132 @@
+import shutil
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+from defcon import Font
+from fontTools import ttLib
+
+import convertKernedOTFtoKernedUFO as ckf
+import dumpkerning as dk
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+
+
+def test_convert_font(tmp_path):
+    input_otf = tmp_path / 'otf_kern_example.otf'
+    shutil.copy(ROUNDTRIP_DIR / 'otf_kern_example.otf', input_otf)
+    ufo_path, glyph_count = ckf.convertFont(str(input_otf))
+    assert(Path(ufo_path) == tmp_path / 'otf_kern_example.ufo')
+
+    otf = ttLib.TTFont(input_otf)
+    assert(glyph_count == len(otf.getGlyphOrder()))
+    ufo = Font(ufo_path)
+    assert(ufo.glyphOrder == otf.getGlyphOrder())
+    assert(ufo.info.unitsPerEm == otf['head'].unitsPerEm)
+    assert(ufo.info.xHeight == otf['OS/2'].sxHeight)
+    cmap = otf.getBestCmap()
+    for gName, (width, lsb) in otf['hmtx'].metrics.items():
+        assert(ufo[gName].width == width)
+        assert(ufo[gName].unicodes == sorted(
+            uv for uv, name in cmap.items() if name == gName))
+    assert(any(len(glyph) for glyph in ufo))
+
+    assert(all(name.startswith('public.kern') for name in ufo.groups))
+    assert(
+        dk.extractKerning(Path(ufo_path)) == dk.extractKerning(input_otf))
+
+
+def test_convert_fonts(tmp_path):
+    for name in ['Font-Regular.otf', 'Font-Bold.otf']:
+        shutil.copy(ROUNDTRIP_DIR / 'otf_kern_example.otf', tmp_path / name)
+    (tmp_path / 'Font-Broken.otf').write_bytes(b'not a font')
+    (tmp_path / 'notes.txt').write_text('not a font either')
+
+    font_paths = ckf.collectFonts([str(tmp_path), str(tmp_path / '*.otf')])
+    assert(len(font_paths) == 3)
+
+    results = ckf.convertFonts(font_paths, jobs=2)
+    errors = {Path(result[0]).name: result[2] for result in results}
+    assert(errors['Font-Regular.otf'] is None)
+    assert(errors['Font-Bold.otf'] is None)
+    assert(errors['Font-Broken.otf'] is not None)
+    assert((tmp_path / 'Font-Bold.ufo').is_dir())
+
+    # existing UFOs are only replaced with overwrite
+    results = ckf.convertFonts(font_paths[:1], jobs=1)
+    assert('already exists' in results[0][2])
+    results = ckf.convertFonts(font_paths[:1], overwrite=True, jobs=1)
+    assert(results[0][2] is None)
+
+
+def test_convert_worker_errors(tmp_path, monkeypatch):
+    input_otf = tmp_path / 'otf_kern_example.otf'
+    shutil.copy(ROUNDTRIP_DIR / 'otf_kern_example.otf', input_otf)
+
+    def broken_table(font, formatVersion=3):
+        raise KeyError('GPOS')
+
+    # errors other than TTLibError/OSError only fail the font
+    monkeypatch.setattr(ckf, 'makeKernObjects', broken_table)
+    results = ckf.convertFonts([str(input_otf)], overwrite=True, jobs=1)
+    font_path, ufo_path, error, glyph_count, seconds = results[0]
+    assert(ufo_path is None)
+    assert(glyph_count == 0)
+    assert(error == "KeyError: 'GPOS'")
+
+
+def test_font_info(tmp_path):
+    input_otf = tmp_path / 'otf_kern_example.otf'
+    shutil.copy(ROUNDTRIP_DIR / 'otf_kern_example.otf', input_otf)
+    otf = ttLib.TTFont(input_otf)
+    private = otf['CFF '].cff.topDictIndex[0].Private.rawDict
+
+    # in-process: the values tx would write are taken from the OTF
+    ufo_path, glyph_count = ckf.convertFont(str(input_otf))
+    info = Font(ufo_path).info
+    assert(info.copyright.startswith('Copyright 2014'))
+    assert(info.trademark.startswith('Source is a trademark'))
+    assert(info.openTypeNameVersion.startswith('Version 1.000'))
+    assert((info.versionMajor, info.versionMinor) == (1, 0))
+    assert(info.postscriptUnderlinePosition == -50)
+    assert(info.postscriptBlueValues == private['BlueValues'])
+    assert(info.postscriptStemSnapV == private['StemSnapV'])
+    assert(info.openTypeOS2TypoAscender == otf['OS/2'].sTypoAscender)
+
+
+def test_font_info_tx(tmp_path, monkeypatch):
+    from fontTools.ufoLib import UFOWriter
+    from types import SimpleNamespace
+
+    input_otf = tmp_path / 'otf_kern_example.otf'
+    shutil.copy(ROUNDTRIP_DIR / 'otf_kern_example.otf', input_otf)
+    tx_info = SimpleNamespace(
+        familyName='Tx Family', copyright='tx copyright', versionMajor=2,
+        versionMinor=5, italicAngle=-12, postscriptBlueValues=[-10, 0],
+        ascender=1)
+
+    def fake_tx(otfPath, ufoPath, ignore_errors):
+        writer = UFOWriter(ufoPath, formatVersion=2)
+        writer.writeInfo(tx_info)
+        writer.getGlyphSet().writeContents()
+        writer.writeLayerContents()
+        writer.close()
+        return ufoPath
+
+    monkeypatch.setattr(ckf, 'convertOTFtoUFO', fake_tx)
+    ufo_path, glyph_count = ckf.convertFont(str(input_otf), use_tx=True)
+    ufo = Font(ufo_path)
+    info = ufo.info
+    for attr in [
+        'familyName', 'copyright', 'versionMajor', 'versionMinor',
+        'italicAngle', 'postscriptBlueValues'
+    ]:
+        assert(getattr(info, attr) == getattr(tx_info, attr))
+    # OS/2 values are added
+    otf = ttLib.TTFont(input_otf)
+    assert(info.ascender == otf['OS/2'].sTypoAscender)
+    assert(info.openTypeOS2VendorID == otf['OS/2'].achVendID)
+    assert(any(name.startswith('@MMK_L_') for name in ufo.groups))
@@ -0,0 +1,110 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import dumpKernFeatureFromOTF as dkf
+from getKerningPairsFromFEA import FEAKernReader
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+
+
+def make_pairs():
+    '''
+    Single pairs with some block structure, and a few exceptions.
+    '''
+    pairs = {}
+    for left in ['A', 'Aacute', 'Adieresis']:
+        for right in ['T', 'V', 'W', 'Y']:
+            pairs[(left, right)] = -80
+        for right in ['quotedbl', 'quotesingle']:
+            pairs[(left, right)] = -60
+    for right in ['A', 'Aacute', 'Adieresis', 'Lslash']:
+        pairs[('T', right)] = -70
+        pairs[('V', right)] = -70
+    pairs[('Adieresis', 'Y')] = -40
+    pairs[('L', 'T')] = -100
+    return pairs
+
+
+def test_compress_pairs(tmp_path):
+    pairs = make_pairs()
+    statements = dkf.compressPairs(pairs)
+    assert(len(statements) == 6)
+
+    # every pair ends up in exactly one statement
+    flat_pairs = {}
+    for lefts, rights, value in statements:
+        for left in lefts:
+            for right in rights:
+                assert((left, right) not in flat_pairs)
+                flat_pairs[(left, right)] = value
+    assert(flat_pairs == pairs)
+
+    fea_file = tmp_path / 'compressed.fea'
+    with open(fea_file, 'w') as blob:
+        for lefts, rights, value in statements:
+            blob.write(
+                f'enum pos [ {" ".join(lefts)} ] [ {" ".join(rights)} ] '
+                f'{value};\n')
+    assert(FEAKernReader(fea_file).flatKerningPairs == pairs)
+
+
+def test_make_kern_feature():
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    fea_data = dkf.makeKernFeature(input_otf)
+    assert(
+        '# 7 single pairs written as 3 statements '
+        '(compression ratio 2.33)' in fea_data)
+
+
+def test_split_class_pairs(tmp_path):
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    fea_data = dkf.makeKernFeature(input_otf)
+    assert('subtable;' not in fea_data)
+
+    size_limit = 300
+    fea_data = dkf.makeKernFeature(input_otf, size_limit)
+    assert(fea_data.count('subtable;') == 1)
+
+    fea_file = tmp_path / 'split.fea'
+    with open(fea_file, 'w') as blob:
+        blob.write('\n'.join(fea_data))
+    otf_kerning = dkf.getKerningPairsFromOTF.OTFKernReader(input_otf)
+    assert(
+        FEAKernReader(fea_file).flatKerningPairs ==
+        otf_kerning.kerningPairs)
+
+    class_sizes = {'@A': 2, '@B': 30, '@C': 1, '@D': 10}
+    pairs = [
+        (('@A', '@B'), -10), (('@A', '@D'), -20),
+        (('@C', '@B'), -30), (('@C', '@D'), -40),
+        (('@D', '@A'), -50)]
+    all_classes = {name: ['x'] * size for name, size in class_sizes.items()}
+    subtables = dkf.splitClassPairs(pairs, all_classes, 500)
+    assert([st.leftClasses for st in subtables] == [['@D', '@A', '@C']])
+    # left classes with identical right classes are kept together
+    subtables = dkf.splitClassPairs(pairs, all_classes, 400)
+    assert([st.leftClasses for st in subtables] == [['@D'], ['@A', '@C']])
+    assert(all(st.size <= 400 for st in subtables))
+    assert(sum(len(st.pairs) for st in subtables) == len(pairs))
+
+    # RTL kerning needs twice the space per class pair
+    subtables = dkf.splitClassPairs(pairs, all_classes, 420)
+    assert(len(subtables) == 1)
+    subtables = dkf.splitClassPairs(pairs, all_classes, 420, 4)
+    assert([st.leftClasses for st in subtables] == [['@D'], ['@A', '@C']])
+    assert(all(st.size <= 420 for st in subtables))
+
+
+def test_value_record_size():
+    otf_kerning = dkf.getKerningPairsFromOTF.OTFKernReader(
+        ROUNDTRIP_DIR / 'otf_kern_example.otf')
+    assert(dkf.getValueRecordSize(otf_kerning.pairPosList) == 2)
+    rtl = SimpleNamespace(Format=2, ValueFormat1=5, ValueFormat2=0)
+    assert(dkf.getValueRecordSize(
+        otf_kerning.pairPosList + [rtl]) == 4)
+    assert(dkf.getValueRecordSize([]) == 2)
@@ -0,0 +1,108 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import dumpkerning as dk
+import dumpKerningToSQLite as dks
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+
+
+def test_get_args():
+    args = dks.get_args(['family.db', 'dummy.otf', 'dummy.ufo'])
+    assert(args.db_file == 'family.db')
+    assert(args.sourceFiles == ['dummy.otf', 'dummy.ufo'])
+    assert(args.batch_size == dks.BATCH_SIZE)
+
+
+def test_export(tmp_path):
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    input_ufo = ROUNDTRIP_DIR / 'ufo_kern_example.ufo'
+    db_file = tmp_path / 'family.db'
+
+    dk.main(args=[str(input_otf), str(input_ufo), '--sqlite', str(db_file)])
+    # exporting again replaces the kerning of a known source
+    tables = dks.dumpKerningToSQLite(db_file, [input_otf], batch_size=10)
+    assert(tables == ['kerning_1'])
+
+    connection = sqlite3.connect(db_file)
+    sources = connection.execute(
+        'SELECT name, kerning_table, pair_count FROM sources').fetchall()
+    otf_kerning = dk.extractKerning(input_otf)
+    ufo_kerning = dk.extractKerning(input_ufo)
+    assert(sources == [
+        ('otf_kern_example.otf', 'kerning_1', len(otf_kerning)),
+        ('ufo_kern_example.ufo', 'kerning_2', len(ufo_kerning)),
+    ])
+
+    for table, kerning in [
+        ('kerning_1', otf_kerning), ('kerning_2', ufo_kerning)
+    ]:
+        rows = connection.execute(
+            f'SELECT left, right, value FROM {table}_names').fetchall()
+        assert({(left, right): value for left, right, value in rows} ==
+               kerning)
+
+    indexes = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' "
+        "AND tbl_name = 'kerning_1' ORDER BY name").fetchall()
+    assert(indexes == [
+        ('kerning_1_left',), ('kerning_1_right',), ('kerning_1_value',)])
+
+    rows = connection.execute(
+        "SELECT right, value FROM kerning_1_names "
+        "WHERE left = 'V' AND value < -100").fetchall()
+    assert(sorted(rows) == sorted(
+        (right, value) for (left, right), value in otf_kerning.items() if
+        left == 'V' and value < -100))
+    connection.close()
+
+
+def test_glyph_subset(tmp_path):
+    input_ufo = ROUNDTRIP_DIR / 'ufo_kern_example.ufo'
+    glyph_list = tmp_path / 'glyphs.txt'
+    glyph_list.write_text('A\nV\nAdieresis\nT\n')
+    db_file = tmp_path / 'family.db'
+
+    dk.main(args=[str(input_ufo), '--sqlite', str(db_file), '-g', str(
+        glyph_list)])
+    connection = sqlite3.connect(db_file)
+    rows = connection.execute(
+        'SELECT left, right, value FROM kerning_1_names').fetchall()
+    glyph_subset = dk.getGlyphSubset(input_ufo, glyph_list)
+    kerning = dk.extractKerning(input_ufo, glyph_subset)
+    assert(kerning)
+    assert({(left, right): value for left, right, value in rows} == kerning)
+    connection.close()
+
+
+def test_masters(tmp_path):
+    db_file = tmp_path / 'family.db'
+    sources = [
+        ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs',
+        ROUNDTRIP_DIR / 'vfj_kern_example.vfj']
+    tables = dks.dumpKerningToSQLite(db_file, sources)
+
+    expected = {}
+    for source in sources:
+        for label, kerning in dk.iterMasterKerning(source):
+            # named like the kerning dumps of the masters
+            dump = dk.makeOutputPath(source, label=label, mkdir=False)
+            expected[dump.with_suffix('').name] = kerning
+    assert(len(tables) == len(expected) == 5)
+
+    connection = sqlite3.connect(db_file)
+    sources = connection.execute(
+        'SELECT name, kerning_table, pair_count FROM sources').fetchall()
+    assert([name for name, table, count in sources] == list(expected))
+    for name, table, count in sources:
+        rows = connection.execute(
+            f'SELECT left, right, value FROM {table}_names').fetchall()
+        kerning = {(left, right): value for left, right, value in rows}
+        assert(kerning == expected[name])
+        assert(count == len(kerning))
+    connection.close()
@@ -36,6 +36,8 @@ def test_equality():
     input_fea = ROUNDTRIP_DIR / 'fea_kern_example.fea'
     input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
     input_ufo = ROUNDTRIP_DIR / 'ufo_kern_example.ufo'
+    # the same UFO in format 2, with @MMK_L_/@MMK_R_ kerning groups
+    input_ufo2 = ROUNDTRIP_DIR / 'ufo2_kern_example.ufo'
 
     fea_dump = dk.extractKerning(input_fea)
     otf_dump = dk.extractKerning(input_otf)
@@ -45,6 +47,7 @@ def test_equality():
     assert(fea_dump == otf_dump)
     assert(otf_dump == ufo_dump)
     assert(ufo_dump == fea_dump)
+    assert(dk.extractKerning(input_ufo2) == ufo_dump)
 
     fea_dump_file = input_fea.with_suffix('.dumped')
     otf_dump_file = input_otf.with_suffix('.dumped')
@@ -86,3 +89,167 @@ def test_main():
     assert(read_file(new_dump) == read_file(existing_dump))
     new_dump.unlink()
     output_dir.rmdir()
+
+
+def test_watch(tmp_path):
+    import os
+    import plistlib
+    import shutil
+
+    input_ufo = tmp_path / 'ufo_kern_example.ufo'
+    shutil.copytree(ROUNDTRIP_DIR / 'ufo_kern_example.ufo', input_ufo)
+    output_dir = tmp_path / 'dumps'
+    watcher = dk.KernDumpWatcher([input_ufo], output_dir)
+
+    dump_file = output_dir / 'ufo_kern_example.ufo.kerndump'
+    assert(watcher.poll() == [dump_file])
+    assert(watcher.poll() == [])
+    existing_dump = TEST_DIR / 'kerndumps_expected' / dump_file.name
+    assert(read_file(dump_file) == read_file(existing_dump))
+
+    def edit_plist(name, edit):
+        plist_path = input_ufo / name
+        with open(plist_path, 'rb') as blob:
+            data = plistlib.load(blob)
+        edit(data)
+        with open(plist_path, 'wb') as blob:
+            plistlib.dump(data, blob)
+        stat = plist_path.stat()
+        os.utime(plist_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def edit_kerning(data):
+        data['V']['public.kern2.LAT_A'] = -99
+        del data['Lcaron']['V']
+        data.setdefault('Y', {})['public.kern2.LAT_O'] = 0
+
+    # only kerning changed: incremental update
+    edit_plist('kerning.plist', edit_kerning)
+    ik = watcher.incremental[input_ufo]
+    assert(watcher.poll() == [dump_file])
+    assert(watcher.incremental[input_ufo] is ik)
+    assert(ik.allKerningPairs == dk.extractKerning(input_ufo))
+
+    # groups changed: full extraction
+    def edit_groups(data):
+        data['public.kern2.LAT_Y'].remove('Ydieresis')
+        data['public.kern2.LAT_A'].append('Ydieresis')
+
+    edit_plist('groups.plist', edit_groups)
+    assert(watcher.poll() == [dump_file])
+    assert(watcher.incremental[input_ufo] is not ik)
+    dumped = read_file(dump_file)
+    dk.dumpKerning(dk.extractKerning(input_ufo), dump_file)
+    assert(dumped == read_file(dump_file))
+
+
+def test_watch_errors(tmp_path, capsys):
+    import os
+    import shutil
+
+    input_ufo = tmp_path / 'ufo_kern_example.ufo'
+    shutil.copytree(ROUNDTRIP_DIR / 'ufo_kern_example.ufo', input_ufo)
+    glyph_list = tmp_path / 'glyphs.txt'
+    glyph_list.write_text('A\nV\nAdieresis\nT\n')
+    watcher = dk.KernDumpWatcher(
+        [input_ufo], tmp_path, glyph_list_file=glyph_list)
+    dump_file = tmp_path / 'ufo_kern_example.ufo.kerndump'
+    assert(watcher.poll() == [dump_file])
+    expected = dk.formatKerning(dk.extractKerning(
+        input_ufo, dk.getGlyphSubset(input_ufo, glyph_list)))
+    assert(read_file(dump_file) == expected)
+
+    # a half-saved plist is reported, and read again on the next poll
+    kerning_plist = input_ufo / 'kerning.plist'
+    saved = kerning_plist.read_bytes()
+    kerning_plist.write_bytes(saved[:len(saved) // 2])
+    assert(watcher.poll() == [])
+    assert('could not dump' in capsys.readouterr().err)
+    assert(watcher.poll() == [])
+
+    kerning_plist.write_bytes(saved.replace(b'<integer>-', b'<integer>-1'))
+    stat = kerning_plist.stat()
+    os.utime(kerning_plist, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert(watcher.poll() == [dump_file])
+    assert(watcher.poll() == [])
+    expected = dk.formatKerning(dk.extractKerning(
+        input_ufo, dk.getGlyphSubset(input_ufo, glyph_list)))
+    assert(read_file(dump_file) == expected)
+
+
+def test_glyph_subset():
+    glyph_subset = {'A', 'Adieresis', 'V', 'Y', 'quotedbl', 'w'}
+    for input_file in [
+        ROUNDTRIP_DIR / 'fea_kern_example.fea',
+        ROUNDTRIP_DIR / 'otf_kern_example.otf',
+        ROUNDTRIP_DIR / 'ufo_kern_example.ufo',
+    ]:
+        kerning = dk.extractKerning(input_file)
+        expected = {
+            (left, right): value for (left, right), value in kerning.items()
+            if left in glyph_subset and right in glyph_subset}
+        assert(expected)
+        assert(dk.extractKerning(input_file, glyph_subset) == expected)
+
+
+def test_glyphs_for_unicodes():
+    assert(dk.parseUnicodes('0041-0043, U+00C4') == {0x41, 0x42, 0x43, 0xC4})
+    unicodes = dk.parseUnicodes('0041,0056,00C4,0416')
+    expected = {'A', 'V', 'Adieresis'}
+    for input_file in [
+        ROUNDTRIP_DIR / 'otf_kern_example.otf',
+        ROUNDTRIP_DIR / 'ufo_kern_example.ufo',
+        ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs',
+        ROUNDTRIP_DIR / 'vfj_kern_example.vfj',
+    ]:
+        assert(dk.glyphsForUnicodes(input_file, unicodes) == expected)
+    input_fea = ROUNDTRIP_DIR / 'fea_kern_example.fea'
+    assert(dk.glyphsForUnicodes(input_fea, unicodes) == expected | {'uni0416'})
+
+
+def test_glyphs_masters(tmp_path):
+    input_glyphs = ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs'
+    dk.main(args=[str(input_glyphs), '--output', str(tmp_path)])
+    assert(sorted(path.name for path in tmp_path.iterdir()) == [
+        'glyphs_kern_example.glyphs.Bold_test.kerndump',
+        'glyphs_kern_example.glyphs.Regular.RTL.kerndump',
+        'glyphs_kern_example.glyphs.Regular.kerndump',
+    ])
+    # the first master has the same kerning as the example UFO
+    existing_dump = TEST_DIR / 'kerndumps_expected' / (
+        'ufo_kern_example.ufo.kerndump')
+    assert(
+        read_file(tmp_path / 'glyphs_kern_example.glyphs.Regular.kerndump') ==
+        read_file(existing_dump))
+    assert(read_file(
+        tmp_path / 'glyphs_kern_example.glyphs.Regular.RTL.kerndump') ==
+        'A V -7')
+
+
+def test_vfj_masters(tmp_path):
+    input_vfj = ROUNDTRIP_DIR / 'vfj_kern_example.vfj'
+    dk.main(args=[str(input_vfj), '--output', str(tmp_path)])
+    assert(sorted(path.name for path in tmp_path.iterdir()) == [
+        'vfj_kern_example.vfj.Bold.kerndump',
+        'vfj_kern_example.vfj.Regular.kerndump',
+    ])
+    existing_dump = TEST_DIR / 'kerndumps_expected' / (
+        'ufo_kern_example.ufo.kerndump')
+    assert(
+        read_file(tmp_path / 'vfj_kern_example.vfj.Regular.kerndump') ==
+        read_file(existing_dump))
+
+
+def test_lazy_imports(tmp_path):
+    import subprocess
+    input_fea = ROUNDTRIP_DIR / 'fea_kern_example.fea'
+    script = (
+        'import sys\n'
+        'import dumpkerning\n'
+        f'dumpkerning.main([{str(input_fea)!r}, "-o", {str(tmp_path)!r}])\n'
+        'print(sorted(m for m in sys.modules if m.split(".")[0] in '
+        '["fontTools", "defcon", "PIL", "numpy"]))\n')
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=TEST_DIR.parent,
+        capture_output=True, text=True, check=True)
+    assert(result.stdout.splitlines()[-1] == '[]')
+    assert((tmp_path / 'fea_kern_example.fea.kerndump').exists())
@@ -0,0 +1,76 @@
+import sys
+import json
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import flKerningData as fkd
+
+
+FIXTURE = {
+    'fileName': 'example.vfb',
+    'masters': 1,
+    'classes': [
+        "_A_LEFT: A' Aacute",
+        "_V_RIGHT: V' W",
+        "_O: O Q",
+        ".mtx_class: A",
+    ],
+    'kerning': [
+        ['A', 'V', [-50]],
+        ['Aacute', 'W', [0]],
+        ['O', 'V', [-20]],
+        ['V', 'O', [-15]],
+        ['T', 'o', [-80]],
+    ],
+}
+
+
+def test_parse_class():
+    assert(fkd.parseFLClass("_L_LC_LEFT: l lacute' lcaron") == (
+        '@L_LC_LEFT', 'lacute', ['l', 'lacute', 'lcaron'], True))
+    assert(fkd.parseFLClass('_O: O Q') == ('@O', 'O', ['O', 'Q'], False))
+    assert(fkd.groupSides('@A_LEFT') == [True, False])
+    assert(fkd.groupSides('@V_2ND') == [False, True])
+    assert(fkd.groupSides('@O') == [True, True])
+
+
+def test_kerning_data(capsys):
+    kD = fkd.FLKerningData(fkd.KerningDataFixture(FIXTURE))
+    assert(kD.groupOrder == ['@A_LEFT', '@V_RIGHT', '@O'])
+    assert(kD.leftGroups == ['@A_LEFT', '@O'])
+    assert(kD.rightGroups == ['@V_RIGHT', '@O'])
+    assert(kD.kerning == {
+        ('@A_LEFT', '@V_RIGHT'): -50,
+        ('Aacute', 'W'): 0,
+        ('@O', '@V_RIGHT'): -20,
+        ('V', '@O'): -15,
+        ('T', 'o'): -80,
+    })
+    out, err = capsys.readouterr()
+    assert('_O: O Q has no explicit key glyph' in out)
+
+    vkr = fkd.VFBkernReader(kD.groups, kD.kerning)
+    assert(vkr.allKerningPairs == {
+        ('A', 'V'): -50, ('A', 'W'): -50, ('Aacute', 'V'): -50,
+        ('O', 'V'): -20, ('O', 'W'): -20, ('Q', 'V'): -20, ('Q', 'W'): -20,
+        ('V', 'O'): -15, ('V', 'Q'): -15, ('T', 'o'): -80})
+
+
+def test_multiple_master():
+    fixture = dict(FIXTURE, masters=2, kerning=[['A', 'V', [-50, -70]]])
+    kD = fkd.FLKerningData(fkd.KerningDataFixture(fixture))
+    assert(kD.kerning == {('@A_LEFT', '@V_RIGHT'): '<-50 -70>'})
+
+
+def test_export_and_main(tmp_path):
+    json_path = tmp_path / 'example.kerndata.json'
+    fkd.exportKerningData(fkd.KerningDataFixture(FIXTURE), json_path)
+    with open(json_path) as blob:
+        assert(json.load(blob)['kerning'] == FIXTURE['kerning'])
+
+    fkd.main([str(json_path)])
+    dump_path = tmp_path / 'example.kerndata.kerndump'
+    lines = dump_path.read_text().splitlines()
+    assert(len(lines) == 10)
+    assert('A V -50' in lines)
@@ -92,3 +92,16 @@ def test_catchall():
     dump_file = REFERENCE_DIR / input_file.with_suffix(new_suffix).name
     kfr = gkp.FEAKernReader(input_file)
     assert('\n'.join(kfr.output) == read_file(dump_file))
+
+
+def test_glyph_subset():
+    input_file = TEST_DIR / 'fea_goadb_test.fea'
+    goadb_file = TEST_DIR / 'goadb'
+    kfr = gkp.FEAKernReader(input_file, goadb_file=goadb_file)
+    glyph_subset = {'uni0061', 'uni0062', 'uni0066', 'j'}
+    kfr_subset = gkp.FEAKernReader(
+        input_file, goadb_file=goadb_file, glyphSubset=glyph_subset)
+    assert kfr_subset.flatKerningPairs == {
+        ('uni0066', 'uni0061'): -1,
+        ('uni0066', 'uni0062'): -1,
+        ('j', 'j'): -1}
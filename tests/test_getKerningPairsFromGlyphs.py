@@ -0,0 +1,171 @@
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import getKerningPairsFromGlyphs as gkg
+import dumpkerning as dk
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+GLYPHS_EXAMPLE = ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs'
+
+GLYPHS_2 = '''{
+.appVersion = "1342";
+fontMaster = (
+{
+id = "A1B2";
+weight = Light;
+}
+);
+glyphs = (
+{
+glyphname = A;
+layers = (
+{
+layerId = "A1B2";
+paths = (
+{
+closed = 1;
+nodes = (
+"10 0 LINE",
+"490 0 LINE {name = \\"a;b\\";}"
+);
+}
+);
+width = 500;
+}
+);
+leftKerningGroup = A;
+rightKerningGroup = A;
+unicode = 0041;
+},
+{
+glyphname = Aacute;
+leftKerningGroup = A;
+rightKerningGroup = A;
+unicode = 00C1;
+},
+{
+glyphname = V;
+leftKerningGroup = V;
+unicode = 0056;
+},
+{
+glyphname = "a.sc";
+}
+);
+kerning = {
+"A1B2" = {
+"@MMK_L_A" = {
+"@MMK_R_V" = -60;
+V = -50;
+};
+Aacute = {
+V = 0;
+};
+};
+};
+unitsPerEm = 1000;
+}
+'''
+
+
+def test_get_args():
+    args = gkg.get_args(['dummy.glyphs'])
+    assert(args.glyphs_file == 'dummy.glyphs')
+
+
+def test_scanner():
+    data = (
+        b'{ a = (1, {b = "x;y}";}, ((2,3),(4,5))); '
+        b'c = "quote \\" ( brace"; d = "\\U00c4\\012"; e = <0a1b>; }')
+    scanner = gkg.OpenStepScanner(data)
+    keys = []
+    for key in scanner.iterDict():
+        keys.append(key)
+        if key == 'd':
+            assert(scanner.readValue() == 'Ä\n')
+        else:
+            scanner.skipValue()
+    assert(keys == ['a', 'c', 'd', 'e'])
+    assert(scanner.pos == len(data))
+
+    scanner = gkg.OpenStepScanner(data)
+    assert(scanner.readValue()['a'] == [
+        '1', {'b': 'x;y}'}, [['2', '3'], ['4', '5']]])
+
+
+def test_equality():
+    input_ufo = ROUNDTRIP_DIR / 'ufo_kern_example.ufo'
+    gkr = gkg.GlyphsKernReader(GLYPHS_EXAMPLE)
+    assert(gkr.formatVersion == 3)
+    assert(gkr.masterIDs == ['m01', 'm02'])
+    assert(gkr.masterNames['m02'] == 'Bold (test)')
+    assert(gkr.kerningPairs == dk.extractKerning(input_ufo))
+    assert(dk.extractKerning(GLYPHS_EXAMPLE) == gkr.kerningPairs)
+
+
+def test_masters():
+    gkr = gkg.GlyphsKernReader(GLYPHS_EXAMPLE)
+    regular = gkr.masterKerning('m01')
+    bold = gkr.masterKerning('m02')
+    assert(regular.keys() == bold.keys())
+    assert(all(bold[pair] == 2 * value for pair, value in regular.items()))
+    assert(gkr.masterKerning('m01', rtl=True) == {('A', 'V'): -7})
+    assert(gkr.masterKerning('m02', rtl=True) == {})
+
+
+def test_cmap():
+    gkr = gkg.GlyphsKernReader(GLYPHS_EXAMPLE)
+    assert(gkr.cmap[0x41] == 'A')
+    assert(gkr.unicodes['A'] == [0x41])
+
+
+def test_glyphs_2(tmp_path):
+    input_file = tmp_path / 'glyphs2.glyphs'
+    input_file.write_text(GLYPHS_2, encoding='utf-8')
+    gkr = gkg.GlyphsKernReader(input_file)
+    assert(gkr.formatVersion == 2)
+    assert(gkr.masterNames == {'A1B2': 'Light'})
+    assert(gkr.glyphOrder == ['A', 'Aacute', 'V', 'a.sc'])
+    assert(gkr.cmap == {0x41: 'A', 0xC1: 'Aacute', 0x56: 'V'})
+    assert(gkr.groups == {
+        '@MMK_L_A': ['A', 'Aacute'],
+        '@MMK_R_A': ['A', 'Aacute'],
+        '@MMK_R_V': ['V']})
+    assert(gkr.kerningPairs == {('A', 'V'): -50, ('Aacute', 'V'): 0})
+
+
+def test_package(tmp_path):
+    package = tmp_path / 'package.glyphspackage'
+    (package / 'glyphs').mkdir(parents=True)
+    # everything but the glyphs
+    head, tail = GLYPHS_2.split('glyphs = (')
+    fontinfo = head + 'kerning' + tail.split('\n);\nkerning', 1)[1]
+    (package / 'fontinfo.plist').write_text(fontinfo, encoding='utf-8')
+    (package / 'order.plist').write_text('(\nV,\nA\n)\n', encoding='utf-8')
+    (package / 'glyphs' / 'A_.glyph').write_text(
+        '{\nglyphname = A;\nrightKerningGroup = A;\nunicode = 0041;\n}\n')
+    (package / 'glyphs' / 'V_.glyph').write_text(
+        '{\nglyphname = V;\nleftKerningGroup = V;\nunicode = 0056;\n}\n')
+    (package / 'glyphs' / 'W_.glyph').write_text(
+        '{\nglyphname = W;\nleftKerningGroup = V;\n}\n')
+
+    gkr = gkg.GlyphsKernReader(package)
+    assert(gkr.glyphOrder == ['V', 'A', 'W'])
+    assert(gkr.kerningPairs == {
+        ('A', 'V'): -50, ('A', 'W'): -60, ('Aacute', 'V'): 0})
+
+
+def test_glyph_subset():
+    glyph_subset = {'A', 'Adieresis', 'V', 'Y', 'quotedbl', 'w'}
+    kerning = gkg.GlyphsKernReader(GLYPHS_EXAMPLE).kerningPairs
+    expected = {
+        (left, right): value for (left, right), value in kerning.items()
+        if left in glyph_subset and right in glyph_subset}
+    gkr = gkg.GlyphsKernReader(GLYPHS_EXAMPLE, glyphSubset=glyph_subset)
+    assert(gkr.kerningPairs == expected)
+    assert(gkr.masterKerning('m02') == {
+        pair: 2 * value for pair, value in expected.items()})
@@ -33,3 +33,15 @@ def test_catchall():
     dump_file = REFERENCE_DIR / input_file.with_suffix(new_suffix).name
     kfr = gkp.OTFKernReader(input_file)
     assert('\n'.join(kfr.output) == read_file(dump_file))
+
+
+def test_lazy_products():
+    input_file = TEST_DIR / 'roundtrip' / 'otf_kern_example.otf'
+    kfr = gkp.OTFKernReader(input_file)
+    assert(kfr.classPairs)
+    assert(kfr.singlePairs)
+    assert(kfr.allLeftClasses and kfr.allRightClasses)
+    # class structure and single pairs do not require flattening
+    assert('kerningPairs' not in vars(kfr))
+    assert('output' not in vars(kfr))
+    assert(len(kfr.output) == len(kfr.kerningPairs))
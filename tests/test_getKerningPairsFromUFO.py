@@ -49,3 +49,133 @@ def test_run(capsys):
     gkp.run(Font(input_file))
     out, err = capsys.readouterr()
     assert out == 'Total amount of kerning pairs: 134\n'
+
+
+def test_incremental_kerning():
+    input_file = TEST_DIR / 'roundtrip' / 'ufo_kern_example.ufo'
+    f = Font(input_file)
+    kerning = dict(f.kerning)
+    ik = gkp.IncrementalKerning(f.groups, kerning)
+    ukr = gkp.UFOkernReader(f, includeZero=True)
+    assert ik.allKerningPairs == ukr.allKerningPairs
+
+    # exception removed: the group-to-group value shows through again
+    del kerning[('Lcaron', 'V')]
+    kerning[('public.kern1.LAT_v', 'public.kern2.LAT_A')] = -5
+    affected = ik.updateKerning(kerning)
+    assert ('Lcaron', 'V') in affected
+    assert ('w', 'Adieresis') in affected
+    f.kerning.clear()
+    f.kerning.update(kerning)
+    ukr = gkp.UFOkernReader(f, includeZero=True)
+    assert ik.allKerningPairs == ukr.allKerningPairs
+
+
+def test_kerning_statistics():
+    input_file = TEST_DIR / 'roundtrip' / 'ufo_kern_example.ufo'
+    f = Font(input_file)
+    stats = gkp.KerningStatistics.fromFont(f)
+    updates = []
+    stats.observe(f, callback=updates.append)
+
+    def check():
+        ukr = gkp.UFOkernReader(f)
+        assert stats.amountOfPairs == len(ukr.allKerningPairs)
+        assert stats.absoluteKerning == ukr.absoluteKerning
+        assert stats.output == ukr.output
+        ukr = gkp.UFOkernReader(f, includeZero=True)
+        assert stats.allKerningPairs == ukr.allKerningPairs
+
+    check()
+    # exception set to zero, and deleted
+    f.kerning[('Lcaron', 'V')] = 0
+    check()
+    del f.kerning[('Lcaron', 'V')]
+    check()
+    f.kerning[('public.kern1.LAT_v', 'public.kern2.LAT_A')] = -5
+    check()
+    f.kerning[('Lcaron', 'V')] = 20
+    check()
+
+    # group membership changes
+    kern1 = [name for name in f.groups if name.startswith('public.kern1.')]
+    group = list(f.groups[kern1[0]])
+    f.groups[kern1[0]] = group[1:] + ['Lcaron']
+    check()
+    f.groups.update({kern1[1]: list(f.groups[kern1[1]]) + [group[0]]})
+    check()
+    del f.groups[kern1[0]]
+    check()
+    f.groups[kern1[0]] = group
+    check()
+
+    f.kerning.update({('A', 'V'): -33, ('V', 'A'): 0})
+    check()
+    # updates from iterators, which defcon consumes before notifying
+    f.kerning.update(((('A', 'V'), -44), (('T', 'o'), -12)))
+    check()
+    f.groups.update(
+        (name, list(f.groups[name])[1:]) for name in kern1[:2])
+    check()
+    f.groups.clear()
+    check()
+    f.kerning.clear()
+    check()
+    assert stats.amountOfPairs == 0
+    assert stats.absoluteKerning == 0
+    assert updates and updates[-1] is stats
+
+    updateCount = len(updates)
+    stats.stopObserving()
+    f.kerning[('A', 'V')] = -10
+    assert stats.amountOfPairs == 0
+    assert len(updates) == updateCount
+
+
+def test_incremental_matches_flattener():
+    '''
+    Random edits, including groups named like glyphs (without the group
+    indicator) and kerning referring to undefined groups.
+    '''
+    import random
+    from kernFlattening import flattenKerning
+
+    for seed in range(30):
+        rng = random.Random(seed)
+        glyphs = ['g%d' % i for i in range(8)]
+        group_names = ['@L%d' % i for i in range(3)] + [
+            '@R%d' % i for i in range(3)] + ['g0', '@undefined']
+        names = glyphs + group_names
+
+        def random_group():
+            return rng.sample(glyphs, rng.randint(0, 4))
+
+        groups = {name: random_group() for name in group_names[:-1]}
+        kerning = {
+            (rng.choice(names), rng.choice(names)): rng.choice([0, -10, 20])
+            for _ in range(25)}
+        ik = gkp.IncrementalKerning(groups, kerning, '@')
+        for _ in range(25):
+            action = rng.random()
+            key = rng.choice(names), rng.choice(names)
+            if action < 0.4:
+                kerning[key] = rng.choice([0, -10, 20, 30])
+                ik.setPair(key, kerning[key])
+            elif action < 0.6:
+                kerning.pop(key, None)
+                ik.deletePair(key)
+            elif action < 0.8:
+                name = rng.choice(group_names)
+                groups[name] = random_group()
+                ik.setGroup(name, groups[name])
+            elif action < 0.9:
+                name = rng.choice(group_names)
+                groups.pop(name, None)
+                ik.deleteGroup(name)
+            else:
+                kerning = {
+                    key: value for key, value in kerning.items() if
+                    rng.random() < 0.8}
+                ik.updateKerning(kerning)
+            assert(ik.allKerningPairs == flattenKerning(
+                groups, kerning, '@', includeZero=True))
@@ -0,0 +1,102 @@
+import json
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import getKerningPairsFromVFJ as gkv
+import dumpkerning as dk
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+VFJ_EXAMPLE = ROUNDTRIP_DIR / 'vfj_kern_example.vfj'
+
+
+def test_get_args():
+    args = gkv.get_args(['dummy.vfj'])
+    assert(args.vfj_file == 'dummy.vfj')
+
+
+def test_scanner():
+    data = (
+        b'{"a": [1, {"b": "x]}"}, [[2, 3], [4, [5, {}]]]], '
+        b'"c": "quote \\" [ brace", "d": "\\u00c4\\n", "e": -1.5e2, '
+        b'"f": [], "g": {}}')
+    scanner = gkv.JSONScanner(data)
+    keys = []
+    for key in scanner.iterObject():
+        keys.append(key)
+        if key in ['d', 'e']:
+            keys.append(scanner.readValue())
+        else:
+            scanner.skipValue()
+    assert(keys == ['a', 'c', 'd', 'Ä\n', 'e', -150.0, 'f', 'g'])
+    assert(scanner.pos == len(data))
+
+    scanner = gkv.JSONScanner(data)
+    assert(scanner.readValue() == json.loads(data))
+
+
+def test_equality():
+    input_ufo = ROUNDTRIP_DIR / 'ufo_kern_example.ufo'
+    vkr = gkv.VFJkernReader(VFJ_EXAMPLE)
+    assert(vkr.masterIDs == ['Regular', 'Bold'])
+    assert(vkr.kerningPairs == dk.extractKerning(input_ufo))
+    assert(dk.extractKerning(VFJ_EXAMPLE) == vkr.kerningPairs)
+
+
+def test_masters():
+    vkr = gkv.VFJkernReader(VFJ_EXAMPLE)
+    regular = vkr.masterKerning('Regular')
+    bold = vkr.masterKerning('Bold')
+    assert(regular.keys() == bold.keys())
+    assert(all(bold[pair] == 2 * value for pair, value in regular.items()))
+    assert(vkr.cmap[0xC4] == 'Adieresis')
+    assert(vkr.glyphOrder[-1] == '.notdef')
+
+
+def test_classes(tmp_path):
+    data = {'font': {
+        'glyphs': [
+            {'name': 'A', 'unicode': '0041,0061'},
+            {'name': 'Aacute', 'unicodes': [0xC1]},
+            {'name': 'V', 'layers': [{'elements': []}]},
+            {'name': 'W'},
+        ],
+        'masters': [
+            {'fontMaster': {'name': 'Light', 'kerning': {
+                'kerningClasses': [
+                    {'name': 'A', 'names': ['A', 'Aacute'], '1st': True},
+                    {'name': 'V', 'names': ['V', 'W']},
+                ],
+                'pairs': {
+                    '@A': {'@V': -60, 'W': -40},
+                    'Aacute': {'V': 0},
+                    '@V': {'@V': 10},
+                },
+            }}},
+            {'fontMaster': {'name': 'Light'}},
+        ],
+    }}
+    input_file = tmp_path / 'classes.vfj'
+    input_file.write_text(json.dumps(data))
+    vkr = gkv.VFJkernReader(input_file)
+    assert(vkr.masterNames == {'Light': 'Light', '2': 'Light'})
+    assert(vkr.cmap == {0x41: 'A', 0x61: 'A', 0xC1: 'Aacute'})
+    assert(vkr.kerningPairs == {
+        ('A', 'V'): -60, ('A', 'W'): -40,
+        ('Aacute', 'V'): 0, ('Aacute', 'W'): -40,
+        ('V', 'V'): 10, ('V', 'W'): 10, ('W', 'V'): 10, ('W', 'W'): 10,
+    })
+    assert(vkr.masterKerning('2') == {})
+
+
+def test_glyph_subset():
+    glyph_subset = {'A', 'Adieresis', 'V', 'Y', 'quotedbl', 'w'}
+    kerning = gkv.VFJkernReader(VFJ_EXAMPLE).kerningPairs
+    expected = {
+        (left, right): value for (left, right), value in kerning.items()
+        if left in glyph_subset and right in glyph_subset}
+    vkr = gkv.VFJkernReader(VFJ_EXAMPLE, glyphSubset=glyph_subset)
+    assert(vkr.kerningPairs == expected)
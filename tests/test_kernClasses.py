@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+from kernClasses import ClassRegistry, sortGlyphs, LEFT, RIGHT
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+
+
+def name_class(glyphs, flag):
+    return f'@{glyphs[0]}{flag}'
+
+
+def test_sort_glyphs():
+    assert(sortGlyphs(['b', 'uni0061', 'a']) == ['a', 'b', 'uni0061'])
+    assert(sortGlyphs(['uhorn', 'u']) == ['u', 'uhorn'])
+    assert(sortGlyphs(['oe', 'dotlessi']) == ['dotlessi', 'oe'])
+
+
+def test_registry():
+    registry = ClassRegistry(name_class, '_L', '_R')
+    # identical classes in different subtables are stored once
+    registry.add(['A', 'Aacute'], LEFT, 'class_0_1')
+    registry.add(['Aacute', 'A'], LEFT, 'class_1_1')
+    # different classes with the same key glyph
+    registry.add(['A', 'Agrave'], LEFT, 'class_1_2')
+    registry.add(['V', 'W'], RIGHT, 'class_0_1')
+    registry.add([], RIGHT, 'class_0_0')
+
+    assert(registry.classes == {
+        '@A_L': ['A', 'Aacute'],
+        '@A_L_2': ['A', 'Agrave'],
+        '@V_R': ['V', 'W']})
+    assert(registry.name(LEFT, 'class_1_1') == '@A_L')
+    assert(registry.name(RIGHT, 'class_0_0') is None)
+
+    # names do not depend on the order the classes were added in
+    reversed_registry = ClassRegistry(name_class, '_L', '_R')
+    for key in reversed(registry.keys):
+        side, glyphs = key
+        reversed_registry.add(glyphs, side)
+    assert(reversed_registry.classes == registry.classes)
+
+    class_pairs = registry.classPairs({
+        ('class_0_1', 'class_0_1'): -10,
+        ('class_1_1', 'class_0_1'): -20,
+        ('class_1_2', 'class_0_1'): -30,
+        ('class_1_2', 'class_0_0'): -40})
+    assert(class_pairs == {('@A_L', '@V_R'): -10, ('@A_L_2', '@V_R'): -30})
+
+
+def test_make_kern_objects():
+    from convertKernedOTFtoKernedUFO import makeKernObjects
+    from getKerningPairsFromOTF import OTFKernReader
+    from getKerningPairsFromUFO import IncrementalKerning
+
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    for formatVersion, prefix, indicator in [
+        (2, '@MMK_L_', '@'), (3, 'public.kern1.', 'public.')
+    ]:
+        groups, kerning = makeKernObjects(input_otf, formatVersion)
+        left_classes = [
+            tuple(glyphs) for name, glyphs in groups.items() if
+            name.startswith(prefix)]
+        assert(left_classes)
+        assert(len(set(left_classes)) == len(left_classes))
+        flat_kerning = IncrementalKerning(
+            groups, kerning, indicator).allKerningPairs
+        assert(flat_kerning == OTFKernReader(input_otf).kerningPairs)
@@ -0,0 +1,143 @@
+import asyncio
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import kernDumpPipeline as kdp
+import dumpkerning as dk
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+EXAMPLES = [
+    ROUNDTRIP_DIR / 'fea_kern_example.fea',
+    ROUNDTRIP_DIR / 'otf_kern_example.otf',
+    ROUNDTRIP_DIR / 'ufo2_kern_example.ufo',
+    ROUNDTRIP_DIR / 'ufo_kern_example.ufo',
+]
+
+
+class MemoryFileSystem(object):
+    '''
+    Files held in a dictionary; the pipeline never touches the disk.
+    '''
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+
+    async def read(self, path):
+        await asyncio.sleep(0)
+        try:
+            return self.files[Path(path)]
+        except KeyError:
+            raise FileNotFoundError(path)
+
+    async def write(self, path, data):
+        await asyncio.sleep(0)
+        self.files[Path(path)] = data
+
+
+def memory_sources(copies=1):
+    '''
+    The examples (as far as the pipeline reads them), copied to a fake
+    volume; returns the file system and the source paths.
+    '''
+    files = {}
+    sources = []
+    for index in range(copies):
+        for example in EXAMPLES:
+            source = Path('volume') / f'{index}' / example.name
+            sources.append(source)
+            for name, path in kdp.sourcePaths(example).items():
+                if path.exists():
+                    files[source / name if example.is_dir() else source] = (
+                        path.read_bytes())
+    return MemoryFileSystem(files), sources
+
+
+def test_equality(tmp_path):
+    sources = EXAMPLES + [
+        ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs',
+        ROUNDTRIP_DIR / 'vfj_kern_example.vfj']
+    written = kdp.dumpSources(sources, tmp_path / 'pipeline', jobs=2)
+    assert(len(written) == 9)
+    for source in sources:
+        if source.suffix in dk.MASTER_SOURCES:
+            dk.dumpMasterKerning(source, tmp_path / 'sequential')
+        else:
+            dk.dumpKerning(
+                dk.extractKerning(source),
+                dk.makeOutputPath(source, tmp_path / 'sequential'))
+    for dump in written:
+        expected = tmp_path / 'sequential' / dump.name
+        assert(dump.read_bytes() == expected.read_bytes())
+
+
+def test_glyph_subset(tmp_path):
+    glyph_subset = {'A', 'Adieresis', 'V', 'Y', 'quotedbl', 'w'}
+    written = kdp.dumpSources(
+        EXAMPLES, tmp_path, {source: glyph_subset for source in EXAMPLES},
+        jobs=1)
+    for source, dump in zip(EXAMPLES, sorted(written)):
+        expected = dk.formatKerning(dk.extractKerning(source, glyph_subset))
+        assert(dump.read_text() == expected)
+
+
+def test_memory_file_system():
+    file_system, sources = memory_sources()
+    written = kdp.dumpSources(
+        sources, 'dumps', fileSystem=file_system, jobs=1)
+    assert(sorted(written) == sorted(
+        Path('dumps') / (source.name + '.kerndump') for source in sources))
+    assert(not Path('dumps').exists())
+    for source in EXAMPLES:
+        dump = file_system.files[Path('dumps') / (source.name + '.kerndump')]
+        assert(dump.decode('utf-8') == dk.formatKerning(
+            dk.extractKerning(source)))
+
+
+def test_missing_source():
+    file_system, sources = memory_sources()
+    try:
+        kdp.dumpSources(
+            sources + [Path('volume/missing.fea')], 'dumps',
+            fileSystem=file_system, jobs=1)
+    except FileNotFoundError:
+        pass
+    else:
+        assert(False)
+
+
+def test_throttled_file_system():
+    '''
+    With 4 readers and 4 writers, the reads of several sources (and the
+    writes of several dumps) wait for the latency at the same time;
+    backpressure keeps most sources out of memory.
+    '''
+    file_system, sources = memory_sources(copies=4)
+    source_bytes = sum(len(data) for data in file_system.files.values())
+    throttled = kdp.ThrottledFileSystem(file_system, latency=0.02)
+    pipeline = kdp.DumpPipeline(
+        sources, 'dumps', fileSystem=throttled, jobs=1, readers=4,
+        queueSize=1)
+    written = asyncio.run(pipeline.run())
+    assert(len(written) == len(sources))
+    # more reads than the files of one source (a UFO has 4)
+    assert(throttled.maxPending['read'] > 4)
+    assert(throttled.maxPending['write'] > 1)
+    assert(throttled.pending == {'read': 0, 'write': 0})
+    # readers + queued + flattening + flattened + writers
+    assert(pipeline.maxInFlight <= 4 + 1 + 1 + 1 + 4)
+    assert(pipeline.maxInFlight < len(sources))
+    assert(pipeline.inFlight == 0)
+    assert(throttled.bytesRead == source_bytes)
+
+
+def test_main(tmp_path, capsys):
+    dk.main([str(source) for source in EXAMPLES] + [
+        '-o', str(tmp_path), '-j', '2'])
+    lines = capsys.readouterr().out.splitlines()
+    assert(len(lines) == len(EXAMPLES))
+    for source in EXAMPLES:
+        assert((tmp_path / (source.name + '.kerndump')).exists())
@@ -0,0 +1,115 @@
+import random
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import kernFingerprint as kfp
+import dumpkerning as dk
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+EXAMPLES = [
+    ROUNDTRIP_DIR / 'ufo_kern_example.ufo',
+    ROUNDTRIP_DIR / 'otf_kern_example.otf',
+    ROUNDTRIP_DIR / 'fea_kern_example.fea',
+    ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs',
+    ROUNDTRIP_DIR / 'vfj_kern_example.vfj',
+    ROUNDTRIP_DIR / 'ufo2_kern_example.ufo',
+]
+
+
+def test_get_args():
+    args = kfp.get_args(['a.ufo', 'b.otf', '-z'])
+    assert(args.sourceFiles == ['a.ufo', 'b.otf'])
+    assert(args.skip_zero is True)
+
+
+def test_order_independence():
+    kerning = dk.extractKerning(EXAMPLES[0])
+    items = list(kerning.items())
+    random.Random(1).shuffle(items)
+    fingerprint = kfp.KerningFingerprint()
+    fingerprint.update(items)
+    assert(fingerprint == kfp.fingerprintKerning(kerning))
+    assert(fingerprint.count == len(kerning))
+    assert(len(fingerprint.hexdigest()) == 16)
+    assert(kfp.pairHash('A', 'V', -50.0) == kfp.pairHash('A', 'V', -50))
+    assert(kfp.pairHash('A', 'V', -50) != kfp.pairHash('V', 'A', -50))
+    single = kfp.KerningFingerprint()
+    single.add('A', 'V', -50)
+    assert(single.digest == kfp.pairHash('A', 'V', -50))
+
+
+def test_formats():
+    fingerprints = [kfp.fingerprintSource(path) for path in EXAMPLES]
+    assert(all(fp == fingerprints[0] for fp in fingerprints))
+    for path, fingerprint in zip(EXAMPLES, fingerprints):
+        assert(fingerprint == kfp.fingerprintKerning(dk.extractKerning(path)))
+    ufo = kfp.fingerprintSource(EXAMPLES[0], includeZero=False)
+    otf = kfp.fingerprintSource(EXAMPLES[1], includeZero=False)
+    assert(ufo == otf)
+    assert(ufo.count <= fingerprints[0].count)
+
+
+def test_ufo2(tmp_path):
+    from fontTools.ufoLib import UFOWriter
+    ufo_path = tmp_path / 'font.ufo'
+    writer = UFOWriter(ufo_path, formatVersion=2)
+    writer.writeGroups({
+        '@MMK_L_A': ['A', 'Aacute'], '@MMK_R_V': ['V', 'W']})
+    writer.writeKerning({
+        ('@MMK_L_A', '@MMK_R_V'): -50, ('Aacute', 'W'): -20})
+    writer.getGlyphSet().writeContents()
+    writer.close()
+
+    fingerprint = kfp.fingerprintSource(ufo_path)
+    assert(fingerprint == kfp.fingerprintKerning({
+        ('A', 'V'): -50, ('A', 'W'): -50, ('Aacute', 'V'): -50,
+        ('Aacute', 'W'): -20}))
+
+
+def test_glyph_subset():
+    subset = {'A', 'Adieresis', 'V', 'Y', 'quotedbl', 'w'}
+    ufo = kfp.fingerprintSource(EXAMPLES[0], glyphSubset=subset)
+    fea = kfp.fingerprintSource(EXAMPLES[2], glyphSubset=subset)
+    assert(ufo == fea)
+    assert(set(ufo.rows) <= subset)
+
+
+def test_diff_rows():
+    kerning = dict(dk.extractKerning(EXAMPLES[0]))
+    before = kfp.fingerprintKerning(kerning)
+    (left, right), value = next(iter(kerning.items()))
+    kerning[(left, right)] = value + 1
+    kerning[('newLeft', right)] = 10
+    after = kfp.fingerprintKerning(kerning)
+    assert(before != after)
+    assert(before.diffRows(after) == sorted([left, 'newLeft']))
+
+    without_rows = kfp.fingerprintKerning(kerning, rows=False)
+    assert(without_rows == after)
+    assert(without_rows.rows is None)
+    try:
+        before.diffRows(without_rows)
+    except ValueError:
+        pass
+    else:
+        assert(False)
+
+
+def test_main(capsys):
+    sources = [str(path) for path in EXAMPLES[:3]]
+    assert(kfp.main(sources) == 0)
+    lines = capsys.readouterr().out.splitlines()
+    assert(len(lines) == 3)
+    assert(len({line.split()[0] for line in lines}) == 1)
+
+
+def test_main_differs(tmp_path, capsys):
+    fea = tmp_path / 'changed.fea'
+    fea.write_text('pos A V -1;\n')
+    assert(kfp.main([str(EXAMPLES[2]), str(fea)]) == 1)
+    lines = capsys.readouterr().out.splitlines()
+    assert(lines[-1].startswith(f'{fea} differs in '))
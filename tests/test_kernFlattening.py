@@ -0,0 +1,77 @@
+import sys
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import kernFlattening as kf
+
+
+GROUPS = {
+    '@L_A': ['A', 'Aacute'],
+    '@R_V': ['V', 'W'],
+    '@unused': ['x'],
+}
+
+KERNING = {
+    ('@L_A', '@R_V'): -50,
+    ('@L_A', 'W'): -40,
+    ('Aacute', '@R_V'): -30,
+    ('Aacute', 'V'): 0,
+    ('T', 'o'): -80,
+    ('@L_A', '@undefined'): -5,
+}
+
+
+def test_classify():
+    flattener = kf.KerningFlattener(GROUPS, KERNING, '@')
+    assert(flattener.groupNames == {'@L_A', '@R_V', '@undefined'})
+    assert(sorted(flattener.groups) == ['@L_A', '@R_V'])
+    assert([len(entries) for entries in flattener.ranked] == [2, 1, 1, 2])
+    assert(flattener.pairs(kf.GROUP_GLYPH) == {
+        ('A', 'W'): -40, ('Aacute', 'W'): -40})
+
+
+def test_flatten():
+    flat = kf.flattenKerning(GROUPS, KERNING, '@', includeZero=True)
+    assert(flat == {
+        ('A', 'V'): -50,
+        ('A', 'W'): -40,
+        ('Aacute', 'V'): 0,
+        ('Aacute', 'W'): -30,
+        ('T', 'o'): -80,
+        ('A', '@undefined'): -5,
+        ('Aacute', '@undefined'): -5,
+    })
+    flat = kf.flattenKerning(GROUPS, KERNING, '@')
+    assert(('Aacute', 'V') not in flat)
+    assert(len(flat) == 6)
+
+
+def test_flatten_subset():
+    flat = kf.flattenKerning(
+        GROUPS, KERNING, '@', glyphSubset={'A', 'V', 'T'})
+    assert(flat == {('A', 'V'): -50})
+
+
+def test_iter_rows():
+    import random
+    rng = random.Random(49)
+    glyphs = ['g%d' % i for i in range(12)]
+    groups = {
+        '@L%d' % i: rng.sample(glyphs, 4) for i in range(4)}
+    groups.update({
+        '@R%d' % i: rng.sample(glyphs, 4) for i in range(4)})
+    names = glyphs + list(groups)
+    kerning = {
+        (rng.choice(names), rng.choice(names)): rng.choice([0, -10, 20])
+        for _ in range(80)}
+    for subset in [None, set(glyphs[::2]), {'A', 'V', 'T'}]:
+        for data in [(GROUPS, KERNING), (groups, kerning)]:
+            flattener = kf.KerningFlattener(*data, '@', glyphSubset=subset)
+            for include_zero in [False, True]:
+                flat = flattener.flatten(include_zero)
+                pairs = list(flattener.iterPairs(include_zero))
+                assert(dict(pairs) == flat)
+                assert(len(pairs) == len(flat))
+                rows = list(flattener.iterRows(include_zero))
+                assert(len(rows) == len({left for left, _ in rows}))
@@ -0,0 +1,298 @@
+import io
+import sys
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+from PIL import Image, ImageDraw
+
+import kernMap
+from dumpkerning import extractKerning
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+
+
+def loop_pixel_map(glyph_order, all_kerned_pairs, cell_size, k_min, k_max):
+    '''
+    the original (one rectangle per kerned pair) renderer
+    '''
+    size_in_px = len(glyph_order) * cell_size
+    img = Image.new('RGB', (size_in_px, size_in_px), '#fff')
+    for row_index, g_name_a in enumerate(glyph_order):
+        for col_index, g_name_b in enumerate(glyph_order):
+            kv = all_kerned_pairs.get((g_name_a, g_name_b), None)
+            x = row_index * cell_size
+            y = col_index * cell_size
+            rect = [(x, y), (x + cell_size, y + cell_size)]
+            if kv is not None:
+                kc = kernMap.kern_color(kv, k_min, k_max, hex_values=True)
+                ImageDraw.Draw(img).rectangle(rect, fill=kc)
+    return img
+
+
+def png_bytes(img):
+    blob = io.BytesIO()
+    img.save(blob, format='png')
+    return blob.getvalue()
+
+
+def test_pixel_map():
+    for file_name in [
+        'otf_kern_example.otf', 'ufo_kern_example.ufo', 'fea_kern_example.fea',
+        'glyphs_kern_example.glyphs', 'vfj_kern_example.vfj'
+    ]:
+        input_path = ROUNDTRIP_DIR / file_name
+        glyph_order = kernMap.get_glyph_order(input_path)
+        kerning = extractKerning(input_path)
+        k_min, k_max = min(kerning.values()), max(kerning.values())
+        for cell_size in [1, 2, 5]:
+            img = kernMap.make_pixel_map(
+                glyph_order, kerning, cell_size, k_min, k_max, band_height=7)
+            reference = loop_pixel_map(
+                glyph_order, kerning, cell_size, k_min, k_max)
+            assert(png_bytes(img) == png_bytes(reference))
+
+
+def test_pixel_map_overlaps():
+    # dense kerning, so that many cell edges overlap
+    import random
+    random.seed(3)
+    glyph_order = [f'g{i}' for i in range(12)]
+    kerning = {
+        (left, right): random.choice([-60, -20, 0, 15, 40]) for
+        left in glyph_order for right in glyph_order if
+        random.random() < 0.6}
+    for cell_size in [1, 3]:
+        img = kernMap.make_pixel_map(
+            glyph_order, kerning, cell_size, -60, 40, band_height=4)
+        reference = loop_pixel_map(glyph_order, kerning, cell_size, -60, 40)
+        assert(img.tobytes() == reference.tobytes())
+
+
+def test_canvas_html():
+    import base64
+    import re
+    import numpy as np
+
+    input_path = ROUNDTRIP_DIR / 'ufo_kern_example.ufo'
+    glyph_order = kernMap.get_glyph_order(input_path)
+    kerning = extractKerning(input_path)
+    html = kernMap.make_canvas_html('test', glyph_order, kerning, 5)
+    assert('$' + 'lefts' not in html)
+
+    def decode(name, dtype):
+        data = re.search(f'{name} = decodeArray\\("(.*?)"', html).group(1)
+        return np.frombuffer(base64.b64decode(data), dtype=dtype)
+
+    value_type = re.search(
+        r'VALUES = decodeArray\(".*?", (\w+)\)', html).group(1)
+    assert(value_type == 'Int16Array')
+    lefts = decode('LEFTS', '<i4')
+    rights = decode('RIGHTS', '<i4')
+    values = decode('VALUES', '<i2')
+    decoded = {
+        (glyph_order[left], glyph_order[right]): value for
+        left, right, value in zip(lefts, rights, values)}
+    assert(decoded == {
+        pair: value for pair, value in kerning.items() if
+        set(pair) <= set(glyph_order)})
+
+
+def test_svg_map(tmp_path):
+    import random
+    import re
+    random.seed(5)
+    glyph_order = [f'g{i}' for i in range(20)]
+    kerning = {
+        (left, right): random.choice([-60, -58, -20, 0, 15, 40]) for
+        left in glyph_order for right in glyph_order if
+        random.random() < 0.5}
+
+    for color_steps in [0, 4]:
+        svg_path = tmp_path / f'map_{color_steps}.svg'
+        element_count, file_size = kernMap.write_svg_map(
+            svg_path, glyph_order, kerning, 3, -60, 40, color_steps,
+            chunk_size=7)
+        svg = svg_path.read_text()
+        assert(file_size == len(svg))
+        paths = re.findall(r'<path fill="(#\w+)" d="(.*?)"/>', svg)
+        assert(len(paths) == element_count)
+        assert(len(set(fill for fill, d in paths)) == element_count)
+
+        cells = {}
+        for fill, d in paths:
+            for x, y, w in re.findall(r'M(\d+) (\d+)h(\d+)v3h-\d+z', d):
+                for left in range(int(x) // 3, (int(x) + int(w)) // 3):
+                    pair = glyph_order[left], glyph_order[int(y) // 3]
+                    assert(pair not in cells)
+                    cells[pair] = fill
+        assert(set(cells) == set(kerning))
+        if color_steps == 0:
+            assert(cells == {
+                pair: kernMap.kern_color(value, -60, 40, hex_values=True) for
+                pair, value in kerning.items()})
+        else:
+            # -60 and -58 share a color bucket
+            assert(element_count < len(set(kerning.values())))
+
+
+def test_tile_pyramid(tmp_path):
+    import random
+    import numpy as np
+    random.seed(7)
+    glyph_order = [f'g{i}' for i in range(40)]
+    kerning = {
+        (left, right): random.choice([-60, -20, 0, 15, 40]) for
+        left in glyph_order for right in glyph_order if
+        random.random() < 0.3}
+    # a block of four pairs at level 1, in the first tile
+    for left, right, value in [
+        ('g2', 'g0', -60), ('g3', 'g0', -20), ('g2', 'g1', 40)
+    ]:
+        kerning[(left, right)] = value
+    kerning.pop(('g3', 'g1'), None)
+
+    # 4 cells per tile, 40 glyphs: levels 0 to 4
+    tile_count = kernMap.write_tile_pyramid(
+        tmp_path / 'max', glyph_order, kerning, 4, -60, 40, tile_size=16,
+        workers=1)
+    assert(sorted(p.name for p in (tmp_path / 'max').iterdir()) == [
+        '0', '1', '2', '3', '4', 'index.html'])
+    assert(tile_count == len(list((tmp_path / 'max').glob('*/*.png'))))
+    assert(len(list((tmp_path / 'max' / '4').glob('*.png'))) == 1)
+
+    def pixel(directory, level, tile, block):
+        img = Image.open(tmp_path / directory / str(level) / f'{tile}.png')
+        return img.getpixel((block[0] * 4, block[1] * 4))
+
+    def color(value):
+        hex_color = kernMap.kern_color(value, -60, 40, hex_values=True)
+        return tuple(int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+
+    for (left, right), value in list(kerning.items())[:20]:
+        left_index, right_index = int(left[1:]), int(right[1:])
+        tile = f'{left_index // 4}_{right_index // 4}'
+        block = left_index % 4, right_index % 4
+        assert(pixel('max', 0, tile, block) == color(value))
+    assert(pixel('max', 1, '0_0', (1, 0)) == color(-60))
+
+    # the same tiles from a process pool
+    kernMap.write_tile_pyramid(
+        tmp_path / 'pool', glyph_order, kerning, 4, -60, 40, tile_size=16,
+        workers=2)
+    for tile_path in (tmp_path / 'max').glob('*/*.png'):
+        pool_path = tmp_path / 'pool' / tile_path.parent.name / tile_path.name
+        assert(tile_path.read_bytes() == pool_path.read_bytes())
+
+    kernMap.write_tile_pyramid(
+        tmp_path / 'mean', glyph_order, kerning, 4, -60, 40, tile_size=16,
+        aggregate='mean', workers=1)
+    assert(pixel('mean', 1, '0_0', (1, 0)) == color(round(-40 / 3, 1)))
+
+    flat_index = np.array([0, 0, 0, 3])
+    values = np.array([-60., -20., 40., 5.])
+    counts, kerned = kernMap.aggregate_blocks(flat_index, values, 4, 'count')
+    assert(counts.tolist() == [3, 0, 0, 1])
+    assert(kerned.tolist() == [True, False, False, True])
+
+
+def test_diff_map():
+    glyph_order = ['A', 'V', 'T', 'o', 'a']
+    kerning_a = {
+        ('A', 'V'): -50, ('T', 'o'): -80, ('V', 'a'): -20, ('o', 'T'): 10}
+    kerning_b = {
+        ('A', 'V'): -60, ('T', 'o'): -70, ('o', 'T'): 10, ('a', 'T'): -5,
+        ('x', 'T'): -5}
+    cell_size = 3
+    img, counts = kernMap.make_diff_map(
+        glyph_order, kerning_a, kerning_b, cell_size)
+    assert(counts == {
+        'added': 1, 'removed': 1, 'increased': 1, 'decreased': 1,
+        'unchanged': 1})
+    assert(img.size == (15, 15))
+
+    colors = dict(zip(kernMap.DIFF_CATEGORIES, kernMap.DIFF_COLORS))
+    expected = {
+        ('a', 'T'): colors['added'],
+        ('V', 'a'): colors['removed'],
+        ('T', 'o'): colors['increased'],
+        ('A', 'V'): colors['decreased'],
+        ('o', 'T'): colors['unchanged'],
+        ('A', 'A'): '#ffffff',
+    }
+    for (left, right), hex_color in expected.items():
+        x = glyph_order.index(left) * cell_size + 1
+        y = glyph_order.index(right) * cell_size + 1
+        rgb = tuple(int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+        assert(img.getpixel((x, y)) == rgb)
+
+    # bands of one and two rows of cells
+    for band_height in [cell_size, 2 * cell_size]:
+        banded, _ = kernMap.make_diff_map(
+            glyph_order, kerning_a, kerning_b, cell_size, band_height)
+        assert(banded.tobytes() == img.tobytes())
+
+
+def test_overview(tmp_path):
+    import math
+    import random
+    random.seed(5)
+    glyph_order = [f'g{i}' for i in range(50)]
+    kerning = {
+        (random.choice(glyph_order), random.choice(glyph_order)):
+        random.randint(-100, 100) for i in range(400)}
+
+    block_of_glyph, labels = kernMap.fixed_blocks(glyph_order, 16)
+    assert(labels == ['g0…', 'g16…', 'g32…', 'g48…'])
+    stats = kernMap.block_statistics(
+        glyph_order, kerning, block_of_glyph, len(labels))
+
+    for block_y in range(len(labels)):
+        for block_x in range(len(labels)):
+            values = [
+                value for (left, right), value in kerning.items() if
+                glyph_order.index(left) // 16 == block_x and
+                glyph_order.index(right) // 16 == block_y]
+            assert(stats['count'][block_y, block_x] == len(values))
+            if values:
+                assert(stats['min'][block_y, block_x] == min(values))
+                assert(stats['max'][block_y, block_x] == max(values))
+                mean_abs = sum(abs(v) for v in values) / len(values)
+                assert(
+                    math.isclose(stats['mean'][block_y, block_x], mean_abs))
+            else:
+                assert(math.isnan(stats['mean'][block_y, block_x]))
+
+    glyph_list = tmp_path / 'glyphs.txt'
+    glyph_list.write_text(
+        '# first\ng0\ng1\n\n# second\ng2\ng40\n')
+    assert(kernMap.read_glyph_list(glyph_list) == ['g0', 'g1', 'g2', 'g40'])
+    block_of_glyph, labels = kernMap.section_blocks(glyph_list, glyph_order)
+    assert(labels == ['first', 'second', 'other'])
+    assert(block_of_glyph[:4].tolist() == [0, 0, 1, 2])
+    assert(block_of_glyph[40] == 1)
+
+    input_path = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    glyph_order = kernMap.get_glyph_order(input_path)
+    kerning = extractKerning(input_path)
+    for aggregate in ['max', 'mean', 'count']:
+        img, stats, labels = kernMap.make_overview(
+            input_path, glyph_order, kerning, 'unicode', None, 12, aggregate)
+        assert('Basic Latin' in labels)
+        assert(stats['count'].sum() == len(kerning))
+        assert(img.size[0] == img.size[1] > len(labels) * 12)
+
+
+def test_lazy_imports():
+    import subprocess
+    script = (
+        'import sys\n'
+        'import kernMap\n'
+        'print(sorted({m.split(".")[0] for m in sys.modules} & '
+        '{"fontTools", "defcon", "PIL"}))\n')
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=TEST_DIR.parent,
+        capture_output=True, text=True, check=True)
+    assert(result.stdout.strip() == '[]')
@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import dumpkerning as dk
+import kernServer as ks
+
+TEST_DIR = Path(__file__).parent
+ROUNDTRIP_DIR = TEST_DIR / 'roundtrip'
+
+
+def test_get_args():
+    args = ks.get_args([])
+    assert(args.port == 8765)
+    assert(args.memory == 1024)
+    args = ks.get_args(['--port', '0', '-m', '10'])
+    assert(args.port == 0)
+    assert(args.memory == 10)
+
+
+def test_cache(tmp_path):
+    input_fea = tmp_path / 'fea_kern_example.fea'
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    shutil.copy(ROUNDTRIP_DIR / 'fea_kern_example.fea', input_fea)
+
+    cache = ks.KerningCache()
+    entry = cache.get(input_fea)
+    assert(cache.get(input_fea) is entry)
+    assert(cache.loads == 1)
+
+    # modified sources are reloaded
+    stat = input_fea.stat()
+    os.utime(input_fea, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert(cache.get(input_fea) is not entry)
+    assert(cache.loads == 2)
+
+    # the memory ceiling evicts the least recently used source
+    cache.max_bytes = cache.size
+    cache.get(input_otf)
+    key = input_otf.resolve(), None, False
+    assert(list(cache.entries) == [key])
+    # the locks of evicted sources are dropped with them
+    assert(list(cache.pathLocks) == [key])
+
+
+def test_cache_masters():
+    input_glyphs = ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs'
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    reader = dk.readMasterSource(input_glyphs)
+    cache = ks.KerningCache()
+
+    for masterID in reader.masterIDs:
+        entry = cache.get(input_glyphs, reader.masterNames[masterID])
+        assert(entry.kerning == reader.masterKerning(masterID))
+    entry = cache.get(input_glyphs, 'Regular', rtl=True)
+    assert(entry.kerning == reader.masterKerning(reader.masterIDs[0], True))
+    assert(cache.loads == 3)
+
+    # rather than the kerning of one master, sources with several masters
+    # need a master name
+    for source, master in [
+        (input_glyphs, None),
+        (input_glyphs, 'Black'),
+        (input_otf, 'Regular'),
+    ]:
+        try:
+            cache.get(source, master)
+        except ks.MasterError:
+            pass
+        else:
+            assert(False)
+    # failed loads do not keep their locks
+    assert(len(cache.pathLocks) == 3)
+
+
+def test_server(tmp_path):
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    input_glyphs = ROUNDTRIP_DIR / 'glyphs_kern_example.glyphs'
+    broken_ufo = tmp_path / 'broken.ufo'
+    broken_ufo.mkdir()
+    kerning = dk.extractKerning(input_otf)
+    server = ks.make_server()
+    host, port = server.server_address
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def query(path, request):
+        data = json.dumps(request).encode('utf-8')
+        url = f'http://{host}:{port}{path}'
+        with urllib.request.urlopen(url, data) as response:
+            return json.loads(response.read())
+
+    try:
+        source = str(input_otf)
+        result = query(
+            '/pairs', {'source': source, 'pairs': [['V', 'A'], ['V', 'V']]})
+        assert(result['values'] == [kerning[('V', 'A')], None])
+
+        result = query('/row', {'source': source, 'glyph': 'V'})
+        assert(result['kerning'] == {
+            right: value for (left, right), value in kerning.items() if
+            left == 'V'})
+
+        result = query('/column', {'source': source, 'glyph': 'A'})
+        assert(result['kerning'] == {
+            left: value for (left, right), value in kerning.items() if
+            right == 'A'})
+
+        result = query('/stats', {'source': source})
+        assert(result['pairs'] == len(kerning))
+        assert(result['min'] == min(kerning.values()))
+        assert(server.cache.loads == 1)
+
+        result = query('/stats', {
+            'source': str(input_glyphs), 'master': 'Bold (test)'})
+        assert(result['pairs'] > 0)
+
+        # errors are answered, rather than closing the connection
+        for path, request, status in [
+            ('/pairs', {'source': source}, 400),
+            ('/stats', {'source': 'missing.ufo'}, 404),
+            ('/stats', {'source': str(broken_ufo)}, 422),
+            ('/stats', {'source': str(input_glyphs)}, 400),
+        ]:
+            try:
+                query(path, request)
+            except urllib.error.HTTPError as error:
+                assert(error.code == status)
+                assert('error' in json.loads(error.read()))
+            else:
+                assert(False)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_cache_concurrency(tmp_path, monkeypatch):
+    input_fea = tmp_path / 'fea_kern_example.fea'
+    input_otf = ROUNDTRIP_DIR / 'otf_kern_example.otf'
+    shutil.copy(ROUNDTRIP_DIR / 'fea_kern_example.fea', input_fea)
+    cache = ks.KerningCache()
+
+    # a slow load of the feature file does not block the font
+    loading = threading.Event()
+    release = threading.Event()
+    extract = ks.extractKerning
+
+    def slow_extract(path):
+        if path.suffix == '.fea':
+            loading.set()
+            assert(release.wait(10))
+        return extract(path)
+
+    monkeypatch.setattr(ks, 'extractKerning', slow_extract)
+    threads = [
+        threading.Thread(target=cache.get, args=(input_fea,))
+        for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert(loading.wait(10))
+    assert(cache.get(input_otf).kerning == extract(input_otf))
+    release.set()
+    for thread in threads:
+        thread.join()
+    # concurrent queries for the same source share one load
+    assert(cache.loads == 2)
@@ -0,0 +1,33 @@
+import sys
+
+if '..' not in sys.path:
+    sys.path.append('..')  # https://stackoverflow.com/a/16985066
+
+import mmapScanner as ms
+
+
+class AngleScanner(ms.MappedScanner):
+    BRACKETS = b'<>()'
+    QUOTE = b"'"
+
+
+def test_skip_brackets():
+    # deeper nesting than the pattern covers, and brackets in strings
+    data = b"(a <b (c <d (e) 'f>)'> g> 'h)\\' (') i) <j>"
+    scanner = AngleScanner(data)
+    scanner.skipBrackets()
+    assert(scanner.pos == data.index(b' <j>'))
+    assert(scanner.peek() == b'<')
+    scanner.skipBrackets()
+    assert(scanner.pos == len(data))
+
+
+def test_open_scanner(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_bytes(b'')
+    scanner = ms.openScanner(path, AngleScanner)
+    assert(scanner.peek() == b'')
+    path.write_bytes(b'  <x>')
+    scanner = ms.openScanner(path, AngleScanner)
+    scanner.expect(b'<')
+    assert(scanner.pos == 3)